@@ -0,0 +1,181 @@
+"""
+Measure the recall@k against exact search, the latency and the memory of several collection specs
+and search budgets.
+
+Usage:
+    python -m benchmarks.bench_recall [--url URL] [--points 20000] [--queries 200] [--k 10]
+        [--from-collection NAME]
+
+Uses a local in-memory Qdrant by default. The local mode always searches exhaustively and ignores
+the HNSW and quantization settings, so its recall is always 1: only a Qdrant server (`--url`) gives
+meaningful recall and latency numbers. The memory is the estimate of `CollectionSpec.estimate_memory`.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient, models
+
+from src.repository import tracks_repository
+from src.repository.collection_schema import CollectionSpec, provision_collection
+from src.utils import constants
+
+SPECS = {
+    "float32": CollectionSpec(),
+    "float32-m32": CollectionSpec(hnsw_m=32, hnsw_ef_construct=200),
+    "int8": CollectionSpec(quantization="scalar"),
+    "int8-on-disk": CollectionSpec(quantization="scalar", on_disk=True),
+    "pq-x16-on-disk": CollectionSpec(quantization="product", on_disk=True),
+}
+
+# (hnsw_ef, oversampling), None uses the setting of the collection
+BUDGETS = [(None, None), (32, None), (128, None), (128, 2.0)]
+
+UPSERT_BATCH_SIZE = 1000
+
+
+def synthetic_vectors(n: int, seed: int = 0) -> np.ndarray:
+    """Clustered vectors, closer to the track features than uniform noise."""
+
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(64, constants.EMBEDDINGS_DIMENSIONALITY))
+    labels = rng.integers(len(centers), size=n)
+    return (centers[labels] + rng.normal(scale=0.5, size=(n, centers.shape[1]))).astype(
+        np.float32
+    )
+
+
+async def collection_vectors(
+    client: AsyncQdrantClient, collection_name: str, n: int
+) -> np.ndarray:
+    vectors: list[list[float]] = []
+    offset = None
+    while len(vectors) < n:
+        records, offset = await client.scroll(
+            collection_name=collection_name,
+            offset=offset,
+            limit=min(1000, n - len(vectors)),
+            with_payload=False,
+            with_vectors=True,
+        )
+        vectors += [record.vector for record in records]  # type: ignore
+        if offset is None:
+            break
+    return np.array(vectors, dtype=np.float32)
+
+
+async def load(client: AsyncQdrantClient, collection_name: str, vectors: np.ndarray):
+    for start in range(0, len(vectors), UPSERT_BATCH_SIZE):
+        batch = vectors[start : start + UPSERT_BATCH_SIZE]
+        await client.upsert(
+            collection_name=collection_name,
+            points=models.Batch(
+                ids=list(range(start, start + len(batch))), vectors=batch.tolist()
+            ),
+            wait=True,
+        )
+
+    # The HNSW graph and the quantized vectors are built in the background
+    while (
+        await client.get_collection(collection_name=collection_name)
+    ).status != models.CollectionStatus.GREEN:
+        await asyncio.sleep(1)
+
+
+async def search_ids(
+    client: AsyncQdrantClient,
+    collection_name: str,
+    queries: np.ndarray,
+    k: int,
+    **search_options,
+) -> tuple[list[set], list[float]]:
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        points = await tracks_repository.get_most_similar_tracks(
+            track_embedding=query.tolist(),
+            limit=k,
+            with_payload=False,
+            client=client,
+            collection_name=collection_name,
+            **search_options,
+        )
+        latencies.append(time.perf_counter() - start)
+        results.append({point.id for point in points})
+    return results, latencies
+
+
+async def run(args: argparse.Namespace) -> None:
+    client = (
+        AsyncQdrantClient(url=args.url) if args.url else AsyncQdrantClient(":memory:")
+    )
+
+    if args.from_collection:
+        vectors = await collection_vectors(
+            client, args.from_collection, args.points + args.queries
+        )
+    else:
+        vectors = synthetic_vectors(args.points + args.queries)
+    # The queries are not in the collection, like the uploaded tracks
+    points, queries = vectors[: -args.queries], vectors[-args.queries :]
+
+    print(
+        f"{len(points)} points, {len(queries)} queries, recall@{args.k}\n"
+        f"{'spec':<16}{'hnsw_ef':>8}{'oversampling':>14}{'recall':>8}"
+        f"{'p50 ms':>9}{'p95 ms':>9}{'RAM MB':>9}"
+    )
+    for name, spec in SPECS.items():
+        collection_name = f"bench-recall-{name}"
+        await provision_collection(
+            spec, recreate=True, client=client, collection_name=collection_name
+        )
+        await load(client, collection_name, points)
+
+        exact, _ = await search_ids(
+            client, collection_name, queries, args.k, exact_search=True
+        )
+        for hnsw_ef, oversampling in BUDGETS:
+            approximate, latencies = await search_ids(
+                client,
+                collection_name,
+                queries,
+                args.k,
+                hnsw_ef=hnsw_ef,
+                oversampling=oversampling,
+            )
+            recall = statistics.mean(
+                len(found & expected) / len(expected)
+                for found, expected in zip(approximate, exact)
+                if expected
+            )
+            latencies_ms = sorted(latency * 1000 for latency in latencies)
+            print(
+                f"{name:<16}{hnsw_ef or '-':>8}{oversampling or '-':>14}{recall:>8.3f}"
+                f"{statistics.median(latencies_ms):>9.2f}"
+                f"{latencies_ms[int(0.95 * (len(latencies_ms) - 1))]:>9.2f}"
+                f"{spec.estimate_memory(len(points)) / 2**20:>9.1f}"
+            )
+
+        await client.delete_collection(collection_name=collection_name)
+
+    await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", help="The URL of a Qdrant server.")
+    parser.add_argument("--points", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument(
+        "--from-collection",
+        help="Benchmark with the vectors of this collection instead of synthetic ones.",
+    )
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
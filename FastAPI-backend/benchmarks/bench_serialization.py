@@ -0,0 +1,90 @@
+"""
+Compare the two ways a page of tracks becomes a response body:
+    - validated: the Tracks are validated when built from the records, validated again against
+      the response model of the route, and encoded with the standard encoder, as FastAPI does
+    - fast: the Tracks are built without validation and encoded with orjson
+
+Usage:
+    python -m benchmarks.bench_serialization [--tracks 1000] [--repeat 50]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Callable
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from qdrant_client.http.models.models import Record, ScoredPoint
+
+from src.models.enumerations import TrackFields
+from src.models.models import ScoredTrack, Track
+from src.utils.model_creation import record_to_track
+from src.utils.serialization import FastJSONResponse
+
+
+def make_records(n: int, scored: bool) -> list[Record | ScoredPoint]:
+    records: list[Record | ScoredPoint] = []
+    for i in range(n):
+        payload = {
+            TrackFields.TRACK_ID.value: i,
+            TrackFields.TRACK_TITLE.value: f"title {i}",
+            TrackFields.ARTIST_NAME.value: f"artist {i % 100}",
+            TrackFields.TRACK_DURATION.value: 180 + i % 120,
+            TrackFields.GENRE.value: "Rock",
+            TrackFields.TRACK_LISTENS.value: i * 37,
+        }
+        if scored:
+            records.append(
+                ScoredPoint(id=i, version=0, score=1 / (i + 1), payload=payload)
+            )
+        else:
+            records.append(Record(id=i, payload=payload))
+    return records
+
+
+def validated_body(records: list[Record | ScoredPoint], field) -> bytes:
+    tracks = [record_to_track(record, validate=True) for record in records]
+    content = asyncio.run(serialize_response(field=field, response_content=tracks))
+    return JSONResponse(content).body
+
+
+def fast_body(records: list[Record | ScoredPoint]) -> bytes:
+    tracks = [record_to_track(record, validate=False) for record in records]
+    return FastJSONResponse(tracks).body
+
+
+def measure(fn: Callable[[], bytes], repeat: int) -> float:
+    """The median duration of a call, in milliseconds."""
+
+    fn()
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tracks", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    for model, scored in ((Track, False), (ScoredTrack, True)):
+        records = make_records(args.tracks, scored)
+        field = create_response_field(name="response", type_=list[model])
+
+        validated = measure(lambda: validated_body(records, field), args.repeat)
+        fast = measure(lambda: fast_body(records), args.repeat)
+        print(
+            f"{args.tracks} {model.__name__}s: validated {validated:.2f} ms, "
+            f"fast {fast:.2f} ms, {validated / fast:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Compare the REST and gRPC transports of the Qdrant client on similarity searches and scrolls of
+the tracks collection, sequentially and with concurrent requests.
+
+Needs a Qdrant server with the tracks collection, configured as for the application
+(QDRANT_URL, QDRANT_COLLECTION_NAME, QDRANT_GRPC_PORT...).
+
+Usage:
+    python -m benchmarks.bench_transport [--searches 500] [--concurrency 16] [--scroll-pages 50]
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import statistics
+import time
+from typing import Awaitable, Callable
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient
+
+from src.repository import tracks_repository
+from src.repository.connection import ClientSettings, create_client
+from src.utils import constants
+
+SCROLL_PAGE_SIZE = 256
+
+
+async def timed(
+    operation: Callable[[], Awaitable], repeat: int, concurrency: int
+) -> tuple[list[float], float]:
+    """Run the operation `repeat` times, `concurrency` at a time. Returns the latencies and the throughput."""
+
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_once():
+        async with semaphore:
+            start = time.perf_counter()
+            await operation()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run_once() for _ in range(repeat)))
+    return latencies, repeat / (time.perf_counter() - start)
+
+
+def report(name: str, latencies: list[float], throughput: float) -> None:
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    print(
+        f"{name:<28}{statistics.median(latencies_ms):>9.2f}"
+        f"{latencies_ms[int(0.95 * (len(latencies_ms) - 1))]:>9.2f}{throughput:>10.0f}"
+    )
+
+
+async def benchmark(
+    transport: str, client: AsyncQdrantClient, args: argparse.Namespace
+) -> None:
+    rng = np.random.default_rng(0)
+    queries = iter(
+        rng.normal(
+            size=(args.searches * 2 + 1, constants.EMBEDDINGS_DIMENSIONALITY)
+        ).tolist()
+    )
+
+    async def search():
+        await tracks_repository.get_most_similar_tracks(
+            track_embedding=next(queries), limit=10, client=client
+        )
+
+    async def scroll():
+        offset = 0
+        for _ in range(args.scroll_pages):
+            _, offset = await tracks_repository.get_tracks(
+                offset=offset, limit=SCROLL_PAGE_SIZE, client=client
+            )
+            if offset is None:
+                break
+
+    # Opens the connections
+    await search()
+
+    report(f"{transport} search", *await timed(search, args.searches, 1))
+    report(
+        f"{transport} search x{args.concurrency}",
+        *await timed(search, args.searches, args.concurrency),
+    )
+    report(f"{transport} scroll {args.scroll_pages} pages", *await timed(scroll, 3, 1))
+
+
+async def run(args: argparse.Namespace) -> None:
+    settings = ClientSettings.from_env()
+
+    print(f"{'':<28}{'p50 ms':>9}{'p95 ms':>9}{'per s':>10}")
+    for transport, prefer_grpc in (("REST", False), ("gRPC", True)):
+        client = create_client(dataclasses.replace(settings, prefer_grpc=prefer_grpc))
+        try:
+            await benchmark(transport, client, args)
+        finally:
+            await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--searches", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--scroll-pages", type=int, default=50)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Build the preview clip and the waveform peaks of every track of the collection, next to its
+audio file. Served by /tracks-upload/get_preview and /tracks-upload/get_waveform.
+
+Usage:
+    python -m src.cli.build_artifacts [--workers N] [--collection NAME]
+
+Tracks whose audio file did not change since the last run are skipped, so the job can be run
+again after every ingestion.
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+from src.models.enumerations import TrackFields
+from src.repository import tracks_repository
+from src.service.extraction_pool import ExtractionPool
+from src.service.track_artifacts import build_track_artifacts
+
+logger = logging.getLogger(__name__)
+
+SCROLL_PAGE_SIZE = 256
+
+
+async def track_paths(collection_name: str) -> list[str]:
+    """The distinct paths of the audio files of the tracks, in the order of the collection."""
+
+    paths: dict[str, None] = {}
+    offset: int | None = 0
+    while offset is not None:
+        records, offset = await tracks_repository.get_tracks(
+            offset=offset,
+            limit=SCROLL_PAGE_SIZE,
+            with_payload=[TrackFields.TRACK_PATH.value],
+            collection_name=collection_name,
+        )
+        for record in records:
+            path = (record.payload or {}).get(TrackFields.TRACK_PATH.value)
+            if path:
+                paths[path] = None
+    return list(paths)
+
+
+async def build_artifacts(
+    collection_name: str = tracks_repository.COLLECTION_NAME,
+    workers: int | None = None,
+) -> tuple[int, int]:
+    """
+    Build the artifacts of every track in the pool, keeping two files per worker in flight.
+
+    Returns:
+        tuple[int, int]: The number of tracks with artifacts, and the number of failures.
+    """
+    try:
+        paths = await track_paths(collection_name)
+    finally:
+        await tracks_repository.close()
+    logger.info("Building the artifacts of %d tracks", len(paths))
+
+    pool = ExtractionPool(workers) if workers else ExtractionPool()
+    semaphore = asyncio.Semaphore(2 * pool.max_workers)
+    built, failed = 0, 0
+    start = time.perf_counter()
+
+    async def build(path: str) -> None:
+        nonlocal built, failed
+        async with semaphore:
+            try:
+                await pool.run(build_track_artifacts, path)
+            except Exception as e:
+                logger.warning("Could not build the artifacts of %s: %s", path, e)
+                failed += 1
+                return
+        built += 1
+        if built % 100 == 0:
+            logger.info(
+                "%d/%d tracks, %.2f tracks/s",
+                built,
+                len(paths),
+                built / (time.perf_counter() - start),
+            )
+
+    try:
+        await asyncio.gather(*(build(path) for path in paths))
+    finally:
+        pool.shutdown()
+    return built, failed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Build the previews and waveforms of the tracks of the collection."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="The number of worker processes. Default is EXTRACTION_POOL_WORKERS.",
+    )
+    parser.add_argument(
+        "--collection",
+        default=tracks_repository.COLLECTION_NAME,
+        help="The name of the collection.",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    start = time.perf_counter()
+    built, failed = asyncio.run(build_artifacts(args.collection, args.workers))
+    print(
+        f"Built the artifacts of {built} tracks ({failed} failed) "
+        f"in {time.perf_counter() - start:.1f} s."
+    )
+
+
+if __name__ == "__main__":
+    main()
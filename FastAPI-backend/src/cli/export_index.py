@@ -0,0 +1,55 @@
+"""
+Export the tracks collection to an in-process vector index.
+
+Usage:
+    python -m src.cli.export_index [--output DIR] [--collection NAME]
+
+Set SIMILARITY_BACKEND=numpy to serve the similarity searches from the exported index.
+"""
+
+import argparse
+import asyncio
+import time
+
+from src.repository import tracks_repository
+from src.repository.vector_index import VectorIndex, export_from_qdrant
+
+
+async def run(output: str, collection_name: str) -> VectorIndex:
+    try:
+        return await export_from_qdrant(
+            tracks_repository.get_client(),
+            collection_name,
+            output,
+            vector_name=tracks_repository.VECTOR_NAME,
+        )
+    finally:
+        await tracks_repository.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Export the tracks collection to an in-process vector index."
+    )
+    parser.add_argument(
+        "--output",
+        default=tracks_repository.VECTOR_INDEX_PATH,
+        help="The directory of the index.",
+    )
+    parser.add_argument(
+        "--collection",
+        default=tracks_repository.COLLECTION_NAME,
+        help="The name of the collection.",
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = asyncio.run(run(args.output, args.collection))
+    print(
+        f"Exported {len(index)} tracks to {args.output} "
+        f"in {time.perf_counter() - start:.1f} s."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Export the Keras genre classifier for the NumPy runtime.
+
+Usage:
+    python -m src.cli.export_model [--model mlp_model.keras] [--output mlp_model.npz]
+
+Set CLASSIFIER_RUNTIME=numpy to serve the exported model without TensorFlow. The .npz is not
+versioned: run the export again whenever the Keras model changes.
+"""
+
+import argparse
+import logging
+
+import numpy as np
+
+from src.service.artifact_registry import load_keras_model
+from src.service.numpy_mlp import from_keras_model
+from src.utils import constants
+
+logger = logging.getLogger(__name__)
+
+
+def export_model(model_path: str, output_path: str) -> float:
+    """
+    Export a Keras model to an .npz file and check that both give the same outputs.
+
+    Args:
+        model_path (str): The path of the Keras model.
+        output_path (str): The path of the exported model.
+
+    Returns:
+        float: The largest absolute difference between the outputs of the two models
+            on random standardized inputs.
+    """
+    keras_model = load_keras_model(model_path)
+    numpy_model = from_keras_model(keras_model)
+    numpy_model.save(output_path)
+
+    x = np.random.default_rng(0).standard_normal(
+        (256, constants.EMBEDDINGS_DIMENSIONALITY), dtype=np.float32
+    )
+    return float(
+        np.abs(keras_model.predict(x, verbose=0) - numpy_model.predict(x)).max()
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Export the Keras genre classifier for the NumPy runtime."
+    )
+    parser.add_argument("--model", default=constants.MODEL_SERIAZLIATION_PATH)
+    parser.add_argument("--output", default=constants.NUMPY_MODEL_SERIALIZATION_PATH)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    max_difference = export_model(args.model, args.output)
+    logger.info(
+        "Exported %s to %s, max difference %.2e",
+        args.model,
+        args.output,
+        max_difference,
+    )
+
+
+if __name__ == "__main__":
+    main()
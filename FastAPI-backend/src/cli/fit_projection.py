@@ -0,0 +1,205 @@
+"""
+Fit the projection of the embeddings to the compact vectors the similarity searches retrieve
+candidates on, and compare the two-stage search with the exact one for several dimensions.
+
+Usage:
+    python -m src.cli.fit_projection [--dimensions 16 32 64] [--whiten] [--sample 50000]
+        [--queries 500] [--k 10] [--rerank-factor 4] [--save 32] [--output PATH]
+
+For every dimension, the report gives the share of the variance the projection keeps, the
+recall@k of the two-stage search (candidates on the projection, reranked on the embeddings)
+against the exact search, the latency of both searches in process, and the RAM of the vectors and
+HNSW graphs of the collection before and after the migration (`src.cli.migrate_vectors`). The
+searches are exhaustive, so the recall only measures what the projection loses: in Qdrant, the
+HNSW search of the candidates loses a little more.
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import statistics
+import time
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient, models
+
+from src.repository import collection_schema, tracks_repository
+from src.repository.vector_index import VectorIndex
+from src.utils.projection import Projection
+
+
+async def sample_embeddings(
+    client: AsyncQdrantClient, collection_name: str, vector_name: str, n: int
+) -> tuple[np.ndarray, models.Distance, int]:
+    """The first `n` embeddings of the collection, their distance and the number of tracks."""
+
+    collection = await client.get_collection(collection_name=collection_name)
+    vectors_config = collection.config.params.vectors
+    if isinstance(vectors_config, dict):
+        vectors_config = vectors_config[vector_name]
+
+    vectors: list[list[float]] = []
+    offset = None
+    while len(vectors) < n:
+        records, offset = await client.scroll(
+            collection_name=collection_name,
+            offset=offset,
+            limit=min(1000, n - len(vectors)),
+            with_payload=False,
+            with_vectors=[vector_name] if vector_name else True,
+        )
+        vectors += [
+            record.vector[vector_name] if vector_name else record.vector  # type: ignore
+            for record in records
+        ]
+        if offset is None:
+            break
+    return (
+        np.array(vectors, dtype=np.float32),
+        vectors_config.distance,  # type: ignore
+        collection.points_count or len(vectors),
+    )
+
+
+def two_stage_search(
+    index: VectorIndex,
+    projection: Projection,
+    compact_index: VectorIndex,
+    query: np.ndarray,
+    k: int,
+    rerank_factor: int,
+) -> set[int]:
+    candidates = np.array(
+        [
+            point.id
+            for point in compact_index.search(
+                [projection.transform(query)], k * rerank_factor
+            )[0]
+        ]
+    )
+    # The ids of both indexes are the rows of the sample
+    vectors = np.asarray(index.vectors[candidates])
+    if index.distance == models.Distance.EUCLID:
+        similarities = -np.linalg.norm(vectors - query, axis=1)
+    elif index.distance == models.Distance.MANHATTAN:
+        similarities = -np.abs(vectors - query).sum(axis=1)
+    else:
+        similarities = vectors @ (
+            query / (np.linalg.norm(query) or 1)
+            if index.distance == models.Distance.COSINE
+            else query
+        )
+    return set(candidates[np.argsort(-similarities)[:k]].tolist())
+
+
+def timed(function, queries: np.ndarray) -> tuple[list, float]:
+    """The results of the function for every query, and its median latency in ms."""
+
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(function(query))
+        latencies.append(time.perf_counter() - start)
+    return results, statistics.median(latencies) * 1000
+
+
+async def run(args: argparse.Namespace) -> None:
+    try:
+        embeddings, distance, number_of_points = await sample_embeddings(
+            tracks_repository.get_client(),
+            args.collection,
+            tracks_repository.VECTOR_NAME,
+            args.sample + args.queries,
+        )
+    finally:
+        await tracks_repository.close()
+
+    # The queries are not in the sample, like the uploaded tracks
+    sample, queries = embeddings[: -args.queries], embeddings[-args.queries :]
+    index = VectorIndex(
+        ids=np.arange(len(sample)), vectors=sample, payloads={}, distance=distance
+    )
+    exact, exact_ms = timed(
+        lambda query: {point.id for point in index.search([query], args.k)[0]}, queries
+    )
+
+    spec = collection_schema.load_collection_spec(args.spec)
+    spec = dataclasses.replace(
+        spec, vector_size=sample.shape[1], distance=distance.value
+    )
+    print(
+        f"{len(sample)} tracks sampled, {len(queries)} queries, recall@{args.k}, "
+        f"{args.rerank_factor * args.k} candidates\n"
+        f"{'dimensions':<12}{'variance':>9}{'recall':>8}{'ms':>8}{'RAM MB':>9}\n"
+        f"{'exact':<12}{1:>9.3f}{1:>8.3f}{exact_ms:>8.2f}"
+        f"{spec.estimate_memory(number_of_points) / 2**20:>9.1f}"
+    )
+
+    for dimensions in args.dimensions:
+        projection = Projection.fit(
+            sample,
+            dimensions,
+            whiten=args.whiten,
+            normalize=distance == models.Distance.COSINE,
+        )
+        compact_index = VectorIndex(
+            ids=np.arange(len(sample)),
+            vectors=projection.transform(sample),
+            payloads={},
+            distance=models.Distance.EUCLID,
+        )
+        found, two_stage_ms = timed(
+            lambda query: two_stage_search(
+                index, projection, compact_index, query, args.k, args.rerank_factor
+            ),
+            queries,
+        )
+        recall = statistics.mean(len(f & e) / len(e) for f, e in zip(found, exact) if e)
+        # The embeddings stay on disk without a graph, only the projection is indexed in RAM
+        compact_spec = dataclasses.replace(
+            spec, vector_size=dimensions, quantization="none", on_disk=False
+        )
+        print(
+            f"{dimensions:<12}{projection.explained_variance_ratio:>9.3f}{recall:>8.3f}"
+            f"{two_stage_ms:>8.2f}"
+            f"{compact_spec.estimate_memory(number_of_points) / 2**20:>9.1f}"
+        )
+
+        if dimensions == args.save:
+            projection.save(args.output)
+            print(f"Saved the projection to {args.output}.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Fit the projection of the embeddings for the two-stage search."
+    )
+    parser.add_argument("--dimensions", type=int, nargs="+", default=[16, 32, 64])
+    parser.add_argument(
+        "--whiten",
+        action="store_true",
+        help="Scale the components to a unit variance.",
+    )
+    parser.add_argument("--sample", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument(
+        "--rerank-factor", type=int, default=tracks_repository.RERANK_FACTOR
+    )
+    parser.add_argument(
+        "--spec", help="A JSON file with the HNSW graph of the collection."
+    )
+    parser.add_argument(
+        "--save", type=int, help="Save the projection with this number of dimensions."
+    )
+    parser.add_argument("--output", default=tracks_repository.PROJECTION_PATH)
+    parser.add_argument(
+        "--collection",
+        default=tracks_repository.COLLECTION_NAME,
+        help="The name of the collection to sample.",
+    )
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+"""
+Ingest a directory of audio files into the tracks collection.
+
+Usage:
+    python -m src.cli.ingest AUDIO_DIR [--metadata tracks.csv] [--checkpoint ingest.checkpoint]
+
+The optional metadata CSV has a `file` column, with paths relative to AUDIO_DIR, and any of the
+columns `track_id`, `title`, `artist`, `genre` and `listens`. Missing values default to the
+numeric file name (or a hash of the path) for the ID, the file name for the title, "Unknown"
+for the artist, the predicted genre and 0 listens.
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import logging
+import os
+import time
+from typing import Any, AsyncIterator
+
+import librosa
+import numpy as np
+import soundfile as sf
+from qdrant_client import models
+
+from src.models.enumerations import TrackFields
+from src.repository import tracks_repository
+from src.service.artifact_registry import ArtifactBundle, artifact_registry
+from src.service.extraction_pool import ExtractionPool
+from src.service import track_operations
+from src.service.feature_extraction import extract_feature_vector
+from src.utils import constants
+
+logger = logging.getLogger(__name__)
+
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".flac", ".ogg", ".m4a")
+
+
+def find_audio_files(directory: str) -> list[str]:
+    """
+    Find the audio files in a directory tree.
+
+    Returns:
+        list[str]: The paths of the files relative to `directory`, sorted.
+    """
+    paths = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.lower().endswith(AUDIO_EXTENSIONS):
+                paths.append(os.path.relpath(os.path.join(root, name), directory))
+    return sorted(paths)
+
+
+def read_checkpoint(path: str) -> set[str]:
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {line.rstrip("\n") for line in f if line.strip()}
+
+
+def append_checkpoint(path: str, relative_paths: list[str]) -> None:
+    with open(path, "a", encoding="utf-8") as f:
+        f.writelines(f"{relative_path}\n" for relative_path in relative_paths)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def read_metadata(path: str | None) -> dict[str, dict[str, str]]:
+    if path is None:
+        return {}
+    with open(path, newline="", encoding="utf-8") as f:
+        return {os.path.normpath(row["file"]): row for row in csv.DictReader(f)}
+
+
+def default_track_id(relative_path: str) -> int:
+    stem = os.path.splitext(os.path.basename(relative_path))[0]
+    if stem.isdigit():
+        return int(stem)
+    # Qdrant IDs are unsigned 64-bit integers
+    return int(hashlib.sha1(relative_path.encode()).hexdigest()[:15], 16)
+
+
+def analyse_audio_file(path: str) -> tuple[np.ndarray, int]:
+    """
+    Compute the unscaled feature vector and the duration, in seconds, of an audio file.
+
+    This runs in the workers of the extraction pool.
+    """
+    try:
+        duration = sf.info(path).duration
+    except sf.LibsndfileError:
+        duration = librosa.get_duration(path=path)
+
+    return extract_feature_vector(path), int(round(duration))
+
+
+def build_points(
+    relative_paths: list[str],
+    analysed: list[tuple[np.ndarray, int]],
+    directory: str,
+    metadata: dict[str, dict[str, str]],
+    bundle: ArtifactBundle,
+) -> list[models.PointStruct]:
+    """
+    Scale the features of a batch of files and build the points to upsert.
+    """
+    vectors = bundle.scaler.transform(np.stack([vector for vector, _ in analysed]))
+
+    # One prediction for the whole batch, only used for files without a genre in the metadata
+    predicted_genres = [
+        constants.CLASS_NAMES_MODEL_ORDER[i]
+        for i in np.argmax(bundle.model.predict(vectors, verbose=0), axis=1)
+    ]
+
+    points = []
+    for relative_path, (_, duration), vector, predicted_genre in zip(
+        relative_paths, analysed, vectors, predicted_genres
+    ):
+        row: dict[str, Any] = metadata.get(os.path.normpath(relative_path), {})
+        track_id = int(row.get("track_id") or default_track_id(relative_path))
+
+        points.append(
+            models.PointStruct(
+                id=track_id,
+                vector=vector.astype(float).tolist(),
+                payload={
+                    TrackFields.TRACK_ID.value: track_id,
+                    TrackFields.TRACK_PATH.value: os.path.join(
+                        directory, relative_path
+                    ),
+                    TrackFields.TRACK_TITLE.value: row.get("title")
+                    or os.path.splitext(os.path.basename(relative_path))[0],
+                    TrackFields.ARTIST_NAME.value: row.get("artist") or "Unknown",
+                    TrackFields.TRACK_DURATION.value: duration,
+                    TrackFields.GENRE.value: row.get("genre") or predicted_genre,
+                    TrackFields.TRACK_LISTENS.value: int(row.get("listens") or 0),
+                },
+            )
+        )
+    return points
+
+
+async def analyse_files(
+    pool: ExtractionPool, directory: str, relative_paths: list[str], max_in_flight: int
+) -> AsyncIterator[tuple[str, tuple[np.ndarray, int] | None]]:
+    """
+    Analyse files in the pool, keeping at most `max_in_flight` of them submitted at a time.
+
+    Yields:
+        tuple[str, tuple[np.ndarray, int] | None]: The relative path of a file and its analysis,
+            or None if the file could not be analysed. Files are yielded as they complete.
+    """
+    remaining = iter(relative_paths)
+    in_flight: dict[asyncio.Future, str] = {}
+
+    def submit_next() -> None:
+        relative_path = next(remaining, None)
+        if relative_path is not None:
+            future = asyncio.ensure_future(
+                pool.run(analyse_audio_file, os.path.join(directory, relative_path))
+            )
+            in_flight[future] = relative_path
+
+    for _ in range(max_in_flight):
+        submit_next()
+
+    while in_flight:
+        done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+        for future in done:
+            relative_path = in_flight.pop(future)
+            try:
+                analysis = future.result()
+            except Exception as e:
+                logger.warning("Could not analyse %s: %s", relative_path, e)
+                analysis = None
+            submit_next()
+            yield relative_path, analysis
+
+
+async def ingest(
+    directory: str,
+    checkpoint_path: str,
+    metadata_path: str | None = None,
+    batch_size: int = 256,
+    workers: int | None = None,
+    collection_name: str = tracks_repository.COLLECTION_NAME,
+) -> None:
+    """
+    Extract the features of every audio file in `directory` and upsert them into the collection.
+
+    Files listed in the checkpoint are skipped; every file is added to it once its batch is
+    upserted, so an interrupted run resumes where it stopped.
+    """
+    bundle = artifact_registry.current
+    metadata = read_metadata(metadata_path)
+
+    done = read_checkpoint(checkpoint_path)
+    relative_paths = [p for p in find_audio_files(directory) if p not in done]
+    logger.info(
+        "%d files to ingest, %d already ingested", len(relative_paths), len(done)
+    )
+
+    pool = ExtractionPool(workers) if workers else ExtractionPool()
+    batch_paths: list[str] = []
+    batch_analysed: list[tuple[np.ndarray, int]] = []
+    ingested, failed = 0, 0
+    start = time.perf_counter()
+
+    async def flush() -> None:
+        nonlocal ingested
+        if not batch_paths:
+            return
+        # Also invalidates the cached results, see `track_operations.upsert_tracks`
+        await track_operations.upsert_tracks(
+            build_points(batch_paths, batch_analysed, directory, metadata, bundle),
+            collection_name=collection_name,
+        )
+        append_checkpoint(checkpoint_path, batch_paths)
+        ingested += len(batch_paths)
+        batch_paths.clear()
+        batch_analysed.clear()
+
+        elapsed = time.perf_counter() - start
+        logger.info(
+            "%d/%d files ingested, %.2f files/s",
+            ingested,
+            len(relative_paths),
+            ingested / elapsed,
+        )
+
+    try:
+        async for relative_path, analysis in analyse_files(
+            pool, directory, relative_paths, max_in_flight=2 * pool.max_workers
+        ):
+            if analysis is None:
+                failed += 1
+                continue
+            batch_paths.append(relative_path)
+            batch_analysed.append(analysis)
+            if len(batch_paths) >= batch_size:
+                await flush()
+        await flush()
+    finally:
+        pool.shutdown()
+        await tracks_repository.close()
+
+    elapsed = time.perf_counter() - start
+    logger.info(
+        "Ingested %d files (%d failed) in %.1fs, %.2f files/s",
+        ingested,
+        failed,
+        elapsed,
+        ingested / elapsed if elapsed else 0.0,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Ingest a directory of audio files into the tracks collection."
+    )
+    parser.add_argument("directory", help="The directory to walk for audio files.")
+    parser.add_argument(
+        "--metadata", help="A CSV file with the metadata of the tracks."
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default="ingest.checkpoint",
+        help="The file listing the ingested files, used to resume interrupted runs.",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=256, help="The number of points per upsert."
+    )
+    parser.add_argument(
+        "--workers", type=int, help="The number of extraction processes."
+    )
+    parser.add_argument(
+        "--collection",
+        default=tracks_repository.COLLECTION_NAME,
+        help="The name of the collection.",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    asyncio.run(
+        ingest(
+            directory=args.directory,
+            checkpoint_path=args.checkpoint,
+            metadata_path=args.metadata,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            collection_name=args.collection,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
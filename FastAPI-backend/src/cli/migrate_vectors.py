@@ -0,0 +1,83 @@
+"""
+Copy the tracks collection to a new collection with two named vectors: the embeddings, and their
+projection fitted by `src.cli.fit_projection`, which the similarity searches retrieve candidates on.
+
+Usage:
+    python -m src.cli.migrate_vectors TARGET [--projection PATH] [--spec SPEC.json] [--recreate]
+
+Then set QDRANT_COLLECTION_NAME=TARGET, QDRANT_VECTOR_NAME and QDRANT_COMPACT_VECTOR_NAME.
+"""
+
+import argparse
+import asyncio
+import time
+
+from src.repository import collection_schema, tracks_repository
+from src.utils.projection import Projection
+
+
+async def run(args: argparse.Namespace) -> int:
+    try:
+        return await collection_schema.migrate_to_named_vectors(
+            Projection.load(args.projection),
+            args.target,
+            vector_name=args.vector_name,
+            compact_vector_name=args.compact_vector_name,
+            spec=collection_schema.load_collection_spec(args.spec),
+            index_embeddings=args.index_embeddings,
+            recreate=args.recreate,
+            collection_name=args.collection,
+        )
+    finally:
+        await tracks_repository.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Copy the tracks collection, adding the projected embeddings as a named vector."
+    )
+    parser.add_argument("target", help="The name of the collection to create.")
+    parser.add_argument(
+        "--projection",
+        default=tracks_repository.PROJECTION_PATH,
+        help="The projection fitted by src.cli.fit_projection.",
+    )
+    parser.add_argument(
+        "--spec", help="A JSON file with the HNSW graph of the projected embeddings."
+    )
+    parser.add_argument(
+        "--vector-name",
+        default=tracks_repository.VECTOR_NAME or "embedding",
+        help="The name of the embeddings.",
+    )
+    parser.add_argument(
+        "--compact-vector-name",
+        default=tracks_repository.COMPACT_VECTOR_NAME or "compact",
+        help="The name of the projected embeddings.",
+    )
+    parser.add_argument(
+        "--index-embeddings",
+        action="store_true",
+        help="Also index the embeddings, and keep them in RAM.",
+    )
+    parser.add_argument(
+        "--recreate",
+        action="store_true",
+        help="Delete and recreate the target collection if it exists.",
+    )
+    parser.add_argument(
+        "--collection",
+        default=tracks_repository.COLLECTION_NAME,
+        help="The name of the collection to copy.",
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    copied = asyncio.run(run(args))
+    print(
+        f"Copied {copied} tracks to {args.target} in {time.perf_counter() - start:.1f} s."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Create the tracks collection from a spec, or bring an existing one closer to it, along with its
+payload indexes.
+
+Usage:
+    python -m src.cli.provision [--spec SPEC.json] [--recreate] [--collection NAME]
+
+Exits with status 1 if the collection still differs from the spec, which then needs `--recreate`.
+The distance of an existing collection is kept, even with `--recreate`, unless the spec sets one.
+"""
+
+import argparse
+import asyncio
+import sys
+
+from src.repository import collection_schema, tracks_repository
+
+
+async def run(
+    spec: collection_schema.CollectionSpec, recreate: bool, collection_name: str
+) -> tuple[list[str], collection_schema.SchemaReport, int]:
+    try:
+        differences = await collection_schema.provision_collection(
+            spec, recreate=recreate, collection_name=collection_name
+        )
+        report = await collection_schema.ensure_payload_indexes(
+            collection_name=collection_name
+        )
+        number_of_points = await tracks_repository.get_number_of_datapoints(
+            collection_name=collection_name
+        )
+        return differences, report, number_of_points
+    finally:
+        await tracks_repository.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Create, or update, the tracks collection from a spec."
+    )
+    parser.add_argument(
+        "--spec", help="A JSON file with the settings of the collection."
+    )
+    parser.add_argument(
+        "--recreate",
+        action="store_true",
+        help="Delete and recreate the collection if it exists. Its tracks are lost.",
+    )
+    parser.add_argument(
+        "--collection",
+        default=tracks_repository.COLLECTION_NAME,
+        help="The name of the collection.",
+    )
+    args = parser.parse_args()
+
+    spec = collection_schema.load_collection_spec(args.spec)
+    differences, report, number_of_points = asyncio.run(
+        run(spec, args.recreate, args.collection)
+    )
+
+    for setting in differences:
+        print(f"differs     {setting}")
+    for field_name in report.created:
+        print(f"created     index of {field_name}")
+    for field_name in report.mismatched:
+        print(f"mismatched  index of {field_name}")
+    print(
+        f"{number_of_points} tracks, about "
+        f"{spec.estimate_memory(number_of_points) / 2**20:.1f} MB of vectors and graph in RAM."
+    )
+
+    sys.exit(0 if not differences and report.ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Check, or create, the payload indexes of the tracks collection.
+
+Usage:
+    python -m src.cli.schema [--create] [--collection NAME]
+
+Exits with status 1 if any index is still missing or different from the expected one.
+"""
+
+import argparse
+import asyncio
+import sys
+
+from src.repository import collection_schema, tracks_repository
+
+
+async def run(create: bool, collection_name: str) -> collection_schema.SchemaReport:
+    try:
+        if create:
+            return await collection_schema.ensure_payload_indexes(
+                collection_name=collection_name
+            )
+        return await collection_schema.check_payload_indexes(
+            collection_name=collection_name
+        )
+    finally:
+        await tracks_repository.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Check, or create, the payload indexes of the tracks collection."
+    )
+    parser.add_argument(
+        "--create", action="store_true", help="Create the missing indexes."
+    )
+    parser.add_argument(
+        "--collection",
+        default=tracks_repository.COLLECTION_NAME,
+        help="The name of the collection.",
+    )
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.create, args.collection))
+
+    for field_name in report.created:
+        print(f"created     {field_name}")
+    for field_name in report.missing:
+        print(f"missing     {field_name}")
+    for field_name in report.mismatched:
+        print(f"mismatched  {field_name}")
+    if report.ok:
+        print("All the payload indexes are in place.")
+
+    sys.exit(0 if report.ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,38 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 import uvicorn
-from fastapi import FastAPI, Response
-from src.routers.tracks_library import tracks_library_router
+from fastapi import Depends, FastAPI, Response
+from src.repository import collection_schema, tracks_repository
+from src.repository.connection import ClientSettings
+from src.routers.tracks_library import NEXT_CURSOR_HEADER, tracks_library_router
 from src.routers.tracks_upload import tracks_upload_router
+from src.service.artifact_registry import artifact_registry
+from src.service.classification_model import inference_engine
+from src.service.extraction_pool import extraction_pool
+from src.service.result_cache import result_cache
+from src.service.upload_jobs import upload_jobs
+from src.utils.admin_auth import require_admin_token
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load and warm up the scaler and the model before serving any request
+    await asyncio.to_thread(artifact_registry.initialize)
+    await inference_engine.start()
+    extraction_pool.start()
+    await tracks_repository.connect(ClientSettings.from_env())
+    await collection_schema.provision_payload_indexes()
+    await upload_jobs.start()
+    yield
+    await upload_jobs.stop()
+    await tracks_repository.close()
+    await inference_engine.stop()
+    extraction_pool.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 @app.get("/ping")
@@ -12,6 +40,31 @@ def read_root():
     return Response(status_code=200, content="The application is running!")
 
 
+@app.get("/ready")
+def read_readiness():
+    if not artifact_registry.ready:
+        return Response(status_code=503, content="The artifacts are still loading.")
+    return Response(
+        status_code=200,
+        content=f"Serving artifacts version {artifact_registry.current.version}",
+    )
+
+
+@app.post("/artifacts/reload", dependencies=[Depends(require_admin_token)])
+async def reload_artifacts():
+    """
+    Reload the scaler and the model from disk in the worker that serves the request.
+
+    Every uvicorn worker holds its own registry, so with several workers only one of them
+    reloads. Restart the workers instead (e.g. with a rolling restart), or call the endpoint
+    until `/ready` reports the new version on every worker.
+    """
+    bundle = await asyncio.to_thread(artifact_registry.reload)
+    # A new version of the artifacts is a new generation of the cached results
+    await result_cache.invalidate()
+    return {"version": bundle.version}
+
+
 app.include_router(
     tracks_library_router, prefix="/tracks-library", tags=["tracks_library"]
 )
@@ -20,7 +73,7 @@ app.include_router(
 )
 
 origins = [
-    "http://localhost:3000", 
+    "http://localhost:3000",
 ]
 
 app.add_middleware(
@@ -29,6 +82,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 
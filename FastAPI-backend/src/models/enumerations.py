@@ -31,3 +31,10 @@ class TrackFields(str, Enum):
     TRACK_LISTENS = "meta_track_listens"
     TRACK_DURATION = "meta_track_duration"
     SIMILARITY_SCORE = "similarity_score"
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
@@ -10,3 +10,27 @@ class InvalidAttributeCombination(Exception):
     def __init__(self, message="Wrong combination of attributes passed"):
         self.message = message
         super().__init__(self.message)
+
+
+class AudioFileTooLarge(Exception):
+    """Exception raised for uploads that exceed the configured size or duration."""
+
+    def __init__(self, message="The uploaded audio file is too large"):
+        self.message = message
+        super().__init__(self.message)
+
+
+class InvalidCursor(Exception):
+    """Exception raised for pagination cursors that were not issued by the API."""
+
+    def __init__(self, message="The pagination cursor is invalid"):
+        self.message = message
+        super().__init__(self.message)
+
+
+class JobQueueFull(Exception):
+    """Exception raised for jobs submitted while the job queue is full."""
+
+    def __init__(self, message="Too many jobs are waiting, try again later"):
+        self.message = message
+        super().__init__(self.message)
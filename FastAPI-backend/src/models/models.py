@@ -1,5 +1,7 @@
 from pydantic import BaseModel
 
+from src.models.enumerations import JobStatus
+
 
 class Track(BaseModel):
     db_id: int | None = None
@@ -19,3 +21,23 @@ class ScoredTrack(Track):
 class UploadedTrack(BaseModel):
     most_similar_tracks: list[ScoredTrack]
     genre_prediction: dict[str, float]
+
+
+class UploadedTrackResult(BaseModel):
+    file_name: str | None = None
+    result: UploadedTrack | None = None
+    error: str | None = None
+
+
+class UploadJob(BaseModel):
+    job_id: str
+    status: JobStatus
+    # Jobs with a higher priority run first
+    priority: int
+    file_name: str | None = None
+    # Unix timestamps, in seconds
+    submitted_at: float
+    started_at: float | None = None
+    finished_at: float | None = None
+    result: UploadedTrack | None = None
+    error: str | None = None
@@ -0,0 +1,523 @@
+import json
+import logging
+import os
+from dataclasses import dataclass, field, replace
+
+from dotenv import load_dotenv
+from qdrant_client import AsyncQdrantClient, models
+
+from src.models.enumerations import TrackFields
+from src.repository import tracks_repository
+from src.utils import constants
+from src.utils.projection import Projection
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+# "create", "validate" or "off"
+PAYLOAD_INDEX_PROVISIONING = os.getenv(
+    "PAYLOAD_INDEX_PROVISIONING", constants.PAYLOAD_INDEX_PROVISIONING
+)
+
+IndexSchema = models.PayloadSchemaType | models.TextIndexParams
+QuantizationConfig = models.ScalarQuantization | models.ProductQuantization
+
+QUANTIZATIONS = ("none", "scalar", "product")
+
+MIGRATION_BATCH_SIZE = 256
+
+TEXT_INDEX = models.TextIndexParams(
+    type=models.TextIndexType.TEXT,
+    tokenizer=models.TokenizerType.WORD,
+    min_token_len=2,
+    max_token_len=20,
+    lowercase=True,
+)
+
+# The payload index every field needs, None for the fields that are never filtered on.
+# Qdrant keeps one index per field, so the artist name gets the full-text index its search
+# needs, and its exact matches are checked on the payload of the points the text index selects.
+PAYLOAD_INDEXES: dict[TrackFields, IndexSchema | None] = {
+    TrackFields.DB_ID: None,
+    TrackFields.TRACK_ID: None,
+    TrackFields.GENRE: models.PayloadSchemaType.KEYWORD,
+    TrackFields.TRACK_PATH: None,
+    TrackFields.TRACK_TITLE: TEXT_INDEX,
+    TrackFields.ARTIST_NAME: TEXT_INDEX,
+    TrackFields.TRACK_LISTENS: models.PayloadSchemaType.INTEGER,
+    TrackFields.TRACK_DURATION: None,
+    TrackFields.SIMILARITY_SCORE: None,
+}
+
+
+@dataclass
+class SchemaReport:
+    # Fields without an index
+    missing: list[str] = field(default_factory=list)
+    # Fields with an index of another type or with other settings
+    mismatched: list[str] = field(default_factory=list)
+    # Fields whose index was created
+    created: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.missing and not self.mismatched
+
+
+@dataclass
+class CollectionSpec:
+    """
+    How the vectors of the tracks collection are compared, indexed, compressed and stored.
+
+    A spec can be written as a JSON object with the same keys, e.g.
+    `{"quantization": "scalar", "on_disk": true, "hnsw_m": 32}`.
+    """
+
+    vector_size: int = constants.EMBEDDINGS_DIMENSIONALITY
+    # "Cosine", "Euclid" or "Dot". None keeps the distance of the existing collection, and creates
+    # a new one with the Euclidean distance the embeddings were designed for.
+    distance: str | None = None
+    # The links per node of the HNSW graph: more is more accurate, and takes more memory
+    hnsw_m: int = 16
+    # The candidates considered when linking a node: more is more accurate, and slower to index
+    hnsw_ef_construct: int = 100
+    hnsw_on_disk: bool = False
+    # "none", "scalar" (int8, 4x smaller) or "product"
+    quantization: str = "none"
+    # The compression of the product quantization: "x4", "x8", "x16", "x32" or "x64"
+    product_compression: str = models.CompressionRatio.X16.value
+    # Keeps the quantized vectors in RAM even if the original ones are on disk
+    quantized_always_ram: bool = True
+    # Keeps the original vectors on disk. With quantization, they are only read to rescore.
+    on_disk: bool = False
+
+    def __post_init__(self):
+        if self.distance is not None:
+            models.Distance(self.distance)
+        models.CompressionRatio(self.product_compression)
+        if self.quantization not in QUANTIZATIONS:
+            raise ValueError(
+                f"Unknown quantization {self.quantization!r}, expected one of {QUANTIZATIONS}"
+            )
+
+    def vectors_config(self) -> models.VectorParams:
+        return models.VectorParams(
+            size=self.vector_size,
+            distance=models.Distance(self.distance or models.Distance.EUCLID),
+            on_disk=self.on_disk,
+        )
+
+    def hnsw_config(self) -> models.HnswConfigDiff:
+        return models.HnswConfigDiff(
+            m=self.hnsw_m,
+            ef_construct=self.hnsw_ef_construct,
+            on_disk=self.hnsw_on_disk,
+        )
+
+    def quantization_config(self) -> QuantizationConfig | None:
+        if self.quantization == "scalar":
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8,
+                    # Clips the outliers, so that the int8 range covers the bulk of the values
+                    quantile=0.99,
+                    always_ram=self.quantized_always_ram,
+                )
+            )
+        if self.quantization == "product":
+            return models.ProductQuantization(
+                product=models.ProductQuantizationConfig(
+                    compression=models.CompressionRatio(self.product_compression),
+                    always_ram=self.quantized_always_ram,
+                )
+            )
+        return None
+
+    def estimate_memory(self, number_of_points: int) -> int:
+        """
+        Estimate the RAM the vectors and the HNSW graph of the collection take.
+
+        Args:
+            number_of_points (int): The number of tracks in the collection.
+
+        Returns:
+            int: The estimated size, in bytes.
+        """
+
+        original = number_of_points * self.vector_size * 4
+        if self.quantization == "scalar":
+            quantized = number_of_points * self.vector_size
+        elif self.quantization == "product":
+            ratio = int(self.product_compression.lstrip("x"))
+            quantized = original // ratio
+        else:
+            quantized = 0
+        # Every node has up to 2m links on the bottom layer of the graph, of 4 bytes each
+        graph = number_of_points * self.hnsw_m * 2 * 4
+
+        ram = 0 if self.on_disk else original
+        if self.quantized_always_ram or not self.on_disk:
+            ram += quantized
+        if not self.hnsw_on_disk:
+            ram += graph
+        return ram
+
+
+def load_collection_spec(path: str | None = None) -> CollectionSpec:
+    """
+    Load a collection spec from a JSON file.
+
+    Args:
+        path (str | None): The path of the file. None gives the default spec.
+
+    Returns:
+        CollectionSpec: The spec.
+
+    Raises:
+        ValueError: If the file has unknown keys or invalid values.
+    """
+
+    if path is None:
+        return CollectionSpec()
+    with open(path) as f:
+        try:
+            return CollectionSpec(**json.load(f))
+        except TypeError as e:
+            raise ValueError(f"Invalid collection spec {path}: {e}")
+
+
+def compare_collection_config(
+    config: models.CollectionConfig, spec: CollectionSpec
+) -> list[str]:
+    """
+    Compare the configuration of a collection with a spec.
+
+    Args:
+        config (models.CollectionConfig): The configuration of the collection.
+        spec (CollectionSpec): The spec.
+
+    Returns:
+        list[str]: The settings of the spec the collection does not have.
+    """
+
+    vectors = config.params.vectors
+    if not isinstance(vectors, models.VectorParams):
+        return ["vectors"]
+
+    differences = []
+    if vectors.size != spec.vector_size:
+        differences.append("vector_size")
+    if spec.distance is not None and vectors.distance != models.Distance(spec.distance):
+        differences.append("distance")
+    if bool(vectors.on_disk) != spec.on_disk:
+        differences.append("on_disk")
+    if config.hnsw_config.m != spec.hnsw_m:
+        differences.append("hnsw_m")
+    if config.hnsw_config.ef_construct != spec.hnsw_ef_construct:
+        differences.append("hnsw_ef_construct")
+    if bool(config.hnsw_config.on_disk) != spec.hnsw_on_disk:
+        differences.append("hnsw_on_disk")
+
+    quantization = vectors.quantization_config or config.quantization_config
+    if quantization != spec.quantization_config():
+        differences.append("quantization")
+    return differences
+
+
+async def provision_collection(
+    spec: CollectionSpec,
+    recreate: bool = False,
+    client: AsyncQdrantClient | None = None,
+    collection_name: str = tracks_repository.COLLECTION_NAME,
+) -> list[str]:
+    """
+    Create the collection as described by a spec, or bring an existing one closer to it.
+
+    The HNSW graph and the quantization of an existing collection are updated in place, and Qdrant
+    rebuilds them in the background. The size, the distance and the storage of the vectors can only
+    be changed by recreating the collection, which deletes its tracks. Unless the spec sets one, the
+    distance of an existing collection is kept, recreated or not.
+
+    Args:
+        spec (CollectionSpec): The spec.
+        recreate (bool): Whether to delete and recreate an existing collection. Default is False.
+        client (AsyncQdrantClient | None): The client instance to use. Default is the shared client instance.
+        collection_name (str): The name of the Qdrant collection. Default is the global collection name.
+
+    Returns:
+        list[str]: The settings of the spec the collection still does not have.
+    """
+    client = client or tracks_repository.get_client()
+
+    collections = await client.get_collections()
+    exists = any(c.name == collection_name for c in collections.collections)
+
+    if exists and spec.distance is None:
+        collection = await client.get_collection(collection_name=collection_name)
+        vectors = collection.config.params.vectors
+        if isinstance(vectors, models.VectorParams):
+            spec = replace(spec, distance=vectors.distance.value)
+
+    if not exists or recreate:
+        if exists:
+            await client.delete_collection(collection_name=collection_name)
+            logger.warning("Deleted the collection %s", collection_name)
+        await client.create_collection(
+            collection_name=collection_name,
+            vectors_config=spec.vectors_config(),
+            hnsw_config=spec.hnsw_config(),
+            quantization_config=spec.quantization_config(),
+        )
+        logger.info("Created the collection %s", collection_name)
+        return []
+
+    collection = await client.get_collection(collection_name=collection_name)
+    differences = compare_collection_config(collection.config, spec)
+    updatable = {"hnsw_m", "hnsw_ef_construct", "hnsw_on_disk", "quantization"}
+    if updatable & set(differences):
+        await client.update_collection(
+            collection_name=collection_name,
+            hnsw_config=spec.hnsw_config(),
+            quantization_config=spec.quantization_config() or models.Disabled.DISABLED,
+        )
+        logger.info("Updated the index and quantization of %s", collection_name)
+    return [difference for difference in differences if difference not in updatable]
+
+
+async def migrate_to_named_vectors(
+    projection: Projection,
+    target_collection_name: str,
+    vector_name: str,
+    compact_vector_name: str,
+    spec: CollectionSpec | None = None,
+    index_embeddings: bool = False,
+    recreate: bool = False,
+    batch_size: int = MIGRATION_BATCH_SIZE,
+    client: AsyncQdrantClient | None = None,
+    collection_name: str = tracks_repository.COLLECTION_NAME,
+) -> int:
+    """
+    Copy the tracks of a collection with a single unnamed vector to a new collection, with their
+    embeddings and their projection as two named vectors.
+
+    Qdrant can not add a vector to the points of an existing collection, so the tracks are copied,
+    and the application is then pointed at the new collection. The projected embeddings are indexed
+    by the HNSW graph of the spec. The embeddings are only compared with the candidates retrieved on
+    the projected ones, so by default they are kept on disk, without a graph.
+
+    Args:
+        projection (Projection): The projection of the embeddings.
+        target_collection_name (str): The name of the collection to create.
+        vector_name (str): The name of the embeddings in the new collection.
+        compact_vector_name (str): The name of the projected embeddings in the new collection.
+        spec (CollectionSpec | None): The HNSW graph of the projected embeddings. Default is the default spec.
+        index_embeddings (bool): Whether to also index the embeddings, for searches without candidates.
+            Default is False.
+        recreate (bool): Whether to delete and recreate the new collection if it exists. Default is False.
+        batch_size (int): The number of tracks per request. Default is `MIGRATION_BATCH_SIZE`.
+        client (AsyncQdrantClient | None): The client instance to use. Default is the shared client instance.
+        collection_name (str): The name of the collection to copy. Default is the global collection name.
+
+    Returns:
+        int: The number of copied tracks.
+
+    Raises:
+        ValueError: If the collection to copy has named vectors, or the new collection already exists.
+    """
+    client = client or tracks_repository.get_client()
+    spec = spec or CollectionSpec()
+
+    source = await client.get_collection(collection_name=collection_name)
+    embeddings_config = source.config.params.vectors
+    if not isinstance(embeddings_config, models.VectorParams):
+        raise ValueError(f"The collection {collection_name} already has named vectors")
+
+    collections = await client.get_collections()
+    if any(c.name == target_collection_name for c in collections.collections):
+        if not recreate:
+            raise ValueError(f"The collection {target_collection_name} already exists")
+        await client.delete_collection(collection_name=target_collection_name)
+        logger.warning("Deleted the collection %s", target_collection_name)
+
+    await client.create_collection(
+        collection_name=target_collection_name,
+        vectors_config={
+            vector_name: models.VectorParams(
+                size=embeddings_config.size,
+                distance=embeddings_config.distance,
+                on_disk=not index_embeddings,
+                hnsw_config=None if index_embeddings else models.HnswConfigDiff(m=0),
+            ),
+            # The projection approximates the distances of the embeddings by Euclidean ones
+            compact_vector_name: models.VectorParams(
+                size=projection.dimensions, distance=models.Distance.EUCLID
+            ),
+        },
+        hnsw_config=spec.hnsw_config(),
+    )
+    logger.info("Created the collection %s", target_collection_name)
+
+    copied = 0
+    offset = None
+    while True:
+        records, offset = await client.scroll(
+            collection_name=collection_name,
+            offset=offset,
+            limit=batch_size,
+            with_payload=True,
+            with_vectors=True,
+        )
+        if records:
+            projected = projection.transform([record.vector for record in records])
+            await client.upsert(
+                collection_name=target_collection_name,
+                points=[
+                    models.PointStruct(
+                        id=record.id,
+                        payload=record.payload,
+                        vector={
+                            vector_name: record.vector,  # type: ignore
+                            compact_vector_name: compact.tolist(),
+                        },
+                    )
+                    for record, compact in zip(records, projected)
+                ],
+                wait=True,
+            )
+            copied += len(records)
+        if offset is None:
+            break
+
+    await ensure_payload_indexes(client, target_collection_name)
+    return copied
+
+
+def compare_payload_schema(
+    payload_schema: dict[str, models.PayloadIndexInfo],
+    expected: dict[TrackFields, IndexSchema | None] = PAYLOAD_INDEXES,
+) -> SchemaReport:
+    """
+    Compare the payload indexes of a collection with the expected ones.
+
+    Args:
+        payload_schema (dict[str, models.PayloadIndexInfo]): The payload schema of the collection.
+        expected (dict[TrackFields, IndexSchema | None]): The expected index of every field.
+
+    Returns:
+        SchemaReport: The fields whose index is missing or different from the expected one.
+    """
+
+    report = SchemaReport()
+    for track_field, schema in expected.items():
+        if schema is None:
+            continue
+
+        index = payload_schema.get(track_field.value)
+        if index is None:
+            report.missing.append(track_field.value)
+        elif not _matches(index, schema):
+            report.mismatched.append(track_field.value)
+    return report
+
+
+async def check_payload_indexes(
+    client: AsyncQdrantClient | None = None,
+    collection_name: str = tracks_repository.COLLECTION_NAME,
+) -> SchemaReport:
+    """
+    Check that the collection has the expected payload indexes.
+
+    Args:
+        client (AsyncQdrantClient | None): The client instance to use. Default is the shared client instance.
+        collection_name (str): The name of the Qdrant collection. Default is the global collection name.
+
+    Returns:
+        SchemaReport: The fields whose index is missing or different from the expected one.
+    """
+    client = client or tracks_repository.get_client()
+
+    collection = await client.get_collection(collection_name=collection_name)
+    return compare_payload_schema(collection.payload_schema)
+
+
+async def ensure_payload_indexes(
+    client: AsyncQdrantClient | None = None,
+    collection_name: str = tracks_repository.COLLECTION_NAME,
+) -> SchemaReport:
+    """
+    Create the missing payload indexes of the collection.
+
+    Indexes with a different type or settings are reported, but not replaced, since dropping
+    an index on a large collection makes the queries that use it slow until it is rebuilt.
+
+    Args:
+        client (AsyncQdrantClient | None): The client instance to use. Default is the shared client instance.
+        collection_name (str): The name of the Qdrant collection. Default is the global collection name.
+
+    Returns:
+        SchemaReport: The created indexes, and the ones that are still different from the expected ones.
+    """
+    client = client or tracks_repository.get_client()
+
+    report = await check_payload_indexes(client, collection_name)
+    for field_name in report.missing:
+        await client.create_payload_index(
+            collection_name=collection_name,
+            field_name=field_name,
+            field_schema=PAYLOAD_INDEXES[TrackFields(field_name)],
+            wait=True,
+        )
+        logger.info("Created the payload index of %s", field_name)
+
+    report.created, report.missing = report.missing, []
+    return report
+
+
+async def provision_payload_indexes(
+    mode: str = PAYLOAD_INDEX_PROVISIONING,
+) -> SchemaReport | None:
+    """
+    Check, or create, the payload indexes when the application starts.
+
+    Problems are logged rather than raised, so the application still starts when Qdrant is not reachable yet.
+
+    Args:
+        mode (str): "create" to create the missing indexes, "validate" to only report them, "off" to skip.
+
+    Returns:
+        SchemaReport | None: The report, or None if skipped or failed.
+    """
+
+    if mode == "off":
+        return None
+
+    try:
+        report = await (
+            ensure_payload_indexes() if mode == "create" else check_payload_indexes()
+        )
+    except Exception as e:
+        logger.warning("Could not check the payload indexes: %s", e)
+        return None
+
+    if report.missing:
+        logger.warning(
+            "Missing payload indexes, filters on them scan the collection: %s",
+            ", ".join(report.missing),
+        )
+    if report.mismatched:
+        logger.warning(
+            "Payload indexes that differ from the expected ones: %s",
+            ", ".join(report.mismatched),
+        )
+    return report
+
+
+def _matches(index: models.PayloadIndexInfo, schema: IndexSchema) -> bool:
+    if isinstance(schema, models.TextIndexParams):
+        return (
+            index.data_type == models.PayloadSchemaType.TEXT
+            and index.params is not None
+            and index.params.tokenizer == schema.tokenizer
+            and bool(index.params.lowercase) == bool(schema.lowercase)
+        )
+    return index.data_type == schema
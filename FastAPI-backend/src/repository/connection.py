@@ -0,0 +1,74 @@
+import os
+from dataclasses import dataclass
+
+import httpx
+from dotenv import load_dotenv
+from qdrant_client import AsyncQdrantClient
+
+from src.utils import constants
+
+load_dotenv()
+
+
+@dataclass(frozen=True)
+class ClientSettings:
+    """How the application connects to Qdrant."""
+
+    url: str | None = None
+    # Sends the points and search requests over gRPC, which encodes the vectors as packed floats
+    # rather than JSON arrays. The collection management still goes over REST.
+    prefer_grpc: bool = False
+    grpc_port: int = 6334
+    # The timeout of every request, in seconds
+    timeout_seconds: int = constants.QDRANT_TIMEOUT_SECONDS
+    # The maximum number of concurrent REST connections, and of idle ones kept open
+    pool_size: int = constants.QDRANT_POOL_SIZE
+    # How long idle connections are kept open, and the interval of the gRPC keep-alive pings
+    keepalive_seconds: float = constants.QDRANT_KEEPALIVE_SECONDS
+
+    @classmethod
+    def from_env(cls) -> "ClientSettings":
+        return cls(
+            url=os.getenv("QDRANT_URL"),
+            prefer_grpc=os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true",
+            grpc_port=int(os.getenv("QDRANT_GRPC_PORT", 6334)),
+            timeout_seconds=int(
+                os.getenv("QDRANT_TIMEOUT_SECONDS", constants.QDRANT_TIMEOUT_SECONDS)
+            ),
+            pool_size=int(os.getenv("QDRANT_POOL_SIZE", constants.QDRANT_POOL_SIZE)),
+            keepalive_seconds=float(
+                os.getenv(
+                    "QDRANT_KEEPALIVE_SECONDS", constants.QDRANT_KEEPALIVE_SECONDS
+                )
+            ),
+        )
+
+
+def create_client(settings: ClientSettings | None = None) -> AsyncQdrantClient:
+    """
+    Create a Qdrant client. It only connects when it sends its first request.
+
+    Args:
+        settings (ClientSettings | None): The connection settings. Default is the settings of the environment.
+
+    Returns:
+        AsyncQdrantClient: The client.
+    """
+    settings = settings or ClientSettings.from_env()
+
+    return AsyncQdrantClient(
+        url=settings.url,
+        prefer_grpc=settings.prefer_grpc,
+        grpc_port=settings.grpc_port,
+        timeout=settings.timeout_seconds,
+        # Without limits, the client does not keep the connections to a local server alive
+        limits=httpx.Limits(
+            max_connections=settings.pool_size,
+            max_keepalive_connections=settings.pool_size,
+            keepalive_expiry=settings.keepalive_seconds,
+        ),
+        grpc_options={
+            "grpc.keepalive_time_ms": int(settings.keepalive_seconds * 1000),
+            "grpc.keepalive_permit_without_calls": 1,
+        },
+    )
@@ -1,27 +1,210 @@
+import asyncio
 import os
+import re
 
-from typing import Any, cast
+from typing import Any, Sequence, cast
 
+import grpc
 from dotenv import load_dotenv
-from qdrant_client import QdrantClient, models
+from qdrant_client import AsyncQdrantClient, models
+from qdrant_client.http.exceptions import UnexpectedResponse
 from qdrant_client.http.models.models import Record, ScoredPoint
 
 from src.models.exceptions.exceptions import DatabaseError, InvalidAttributeCombination
 from src.utils.repo_utils import generate_must_clauses
 from src.models.enumerations import TrackFields
+from src.repository.connection import ClientSettings, create_client
+from src.repository.vector_index import VectorIndex
+from src.utils import constants
+from src.utils.model_creation import TRACK_PAYLOAD_FIELDS
+from src.utils.projection import Projection
 
 load_dotenv()
-COLLECTION_NAME = os.environ["QDRANT_COLLECTION_NAME"]
-client = QdrantClient(url=os.getenv("QDRANT_URL"))
+# Checked when the application starts, so that the module can be imported without it
+COLLECTION_NAME = os.getenv("QDRANT_COLLECTION_NAME", "")
+# 0 uses the ef of the collection
+SEARCH_HNSW_EF = int(os.getenv("SEARCH_HNSW_EF", constants.SEARCH_HNSW_EF)) or None
+# 0 uses the oversampling of Qdrant, only relevant for quantized collections
+SEARCH_OVERSAMPLING = (
+    float(os.getenv("SEARCH_OVERSAMPLING", constants.SEARCH_OVERSAMPLING)) or None
+)
+# The time Qdrant may spend on a search or a recommendation, in seconds. 0 leaves it to the request
+# timeout. The retrievals, scrolls and upserts take no server-side timeout in qdrant-client 1.7,
+# they are only bounded by the request timeout (QDRANT_TIMEOUT_SECONDS).
+SEARCH_TIMEOUT_SECONDS = (
+    int(os.getenv("SEARCH_TIMEOUT_SECONDS", constants.SEARCH_TIMEOUT_SECONDS)) or None
+)
+
+# What to fetch of the payload: all of it, none of it, or only some fields
+PayloadSelection = bool | Sequence[str] | models.PayloadSelector
+
+# Only the fields a Track is built from
+TRACK_PAYLOAD = models.PayloadSelectorInclude(include=TRACK_PAYLOAD_FIELDS)
+
+# "qdrant", or "numpy" to run the similarity searches in process, on an exported `VectorIndex`
+SIMILARITY_BACKEND = os.getenv("SIMILARITY_BACKEND", constants.SIMILARITY_BACKEND)
+VECTOR_INDEX_PATH = os.getenv("VECTOR_INDEX_PATH", constants.VECTOR_INDEX_PATH)
+
+# The name of the embeddings, "" for a collection with a single unnamed vector
+VECTOR_NAME = os.getenv("QDRANT_VECTOR_NAME", constants.VECTOR_NAME)
+# The name of the projected embeddings (see `src/cli/migrate_vectors.py`). When set, the
+# similarity searches retrieve candidates on them, and rerank the candidates on the embeddings.
+COMPACT_VECTOR_NAME = os.getenv(
+    "QDRANT_COMPACT_VECTOR_NAME", constants.COMPACT_VECTOR_NAME
+)
+PROJECTION_PATH = os.getenv("PROJECTION_PATH", constants.PROJECTION_PATH)
+# How many candidates are retrieved on the projected embeddings per result
+RERANK_FACTOR = int(os.getenv("RERANK_FACTOR", constants.RERANK_FACTOR))
+
+# The errors of the server, and of the local mode, for a point that does not exist
+_MISSING_POINT = re.compile(
+    r"No point with id \S+ found|Point \S+ is not found in the collection"
+)
+
+_client: AsyncQdrantClient | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
+_client_settings: ClientSettings | None = None
+_vector_index: VectorIndex | None = None
+_projection: Projection | None = None
+_distances: dict[str, models.Distance] = {}
+
+
+def get_client() -> AsyncQdrantClient:
+    """
+    Get the client shared by the application, creating it on first use.
+
+    The client's connections and gRPC channels belong to the event loop they were opened in.
+    The application opens the client in its lifespan, and scripts in the loop they run in,
+    closing it with `close` before that loop ends.
+
+    Returns:
+        AsyncQdrantClient: The shared client instance.
+
+    Raises:
+        RuntimeError: If the client is still open in another event loop.
+    """
+    global _client, _client_loop
+
+    loop = asyncio.get_running_loop()
+    if _client is None:
+        _client = create_client(_client_settings)
+        _client_loop = loop
+    elif _client_loop is not loop:
+        raise RuntimeError(
+            "The Qdrant client is open in another event loop. Serve the application "
+            "within its lifespan, or `close` the client before its event loop ends."
+        )
+    return _client
+
+
+async def connect(settings: ClientSettings | None = None) -> AsyncQdrantClient:
+    """
+    Create the shared client. Called when the application starts.
+
+    Args:
+        settings (ClientSettings | None): The connection settings. Default is the settings of the environment.
+
+    Returns:
+        AsyncQdrantClient: The shared client instance.
+
+    Raises:
+        RuntimeError: If the name of the collection is not configured, or the projected
+            embeddings are configured without a name for the embeddings.
+    """
+    global _client_settings
+
+    if not COLLECTION_NAME:
+        raise RuntimeError("QDRANT_COLLECTION_NAME is not set")
+    if COMPACT_VECTOR_NAME and not VECTOR_NAME:
+        raise RuntimeError(
+            "QDRANT_COMPACT_VECTOR_NAME is set, but QDRANT_VECTOR_NAME is not"
+        )
+
+    await close()
+    _client_settings = settings
+    # Loaded before serving, rather than by the first search
+    await asyncio.to_thread(get_vector_index)
+    if COMPACT_VECTOR_NAME:
+        await asyncio.to_thread(get_projection)
+    return get_client()
+
+
+def get_vector_index() -> VectorIndex | None:
+    """
+    Get the in-process index of the tracks, loading it on first use.
+
+    Returns:
+        VectorIndex | None: The index, or None if the similarity searches run in Qdrant.
+    """
+    global _vector_index
+
+    if SIMILARITY_BACKEND != "numpy":
+        return None
+    if _vector_index is None:
+        _vector_index = VectorIndex.load(VECTOR_INDEX_PATH)
+    return _vector_index
+
+
+def get_projection() -> Projection:
+    """
+    Get the projection of the embeddings to the compact vectors, loading it on first use.
+
+    Returns:
+        Projection: The projection.
+    """
+    global _projection
+
+    if _projection is None:
+        _projection = Projection.load(PROJECTION_PATH)
+    return _projection
+
+
+async def close() -> None:
+    """Close the connections of the shared client. Called when the application stops."""
+    global _client, _client_loop
+
+    if _client is not None:
+        await _client.close()
+    _client, _client_loop = None, None
+
+
+def search_params(
+    exact_search: bool = False,
+    hnsw_ef: int | None = None,
+    oversampling: float | None = None,
+) -> models.SearchParams:
+    """
+    Build the parameters of a similarity search.
+
+    Args:
+        exact_search (bool): Whether to compare the query with every track instead of searching the HNSW graph.
+        hnsw_ef (int | None): The size of the candidate list of the HNSW search. None uses the ef of the collection.
+        oversampling (float | None): How many more candidates to fetch with the quantized vectors,
+            to rescore with the original ones. None uses the oversampling of Qdrant.
+
+    Returns:
+        models.SearchParams: The search parameters.
+    """
 
+    return models.SearchParams(
+        exact=exact_search,
+        hnsw_ef=hnsw_ef,
+        quantization=(
+            models.QuantizationSearchParams(rescore=True, oversampling=oversampling)
+            if oversampling
+            else None
+        ),
+    )
 
-def get_tracks(
+
+async def get_tracks(
     offset: int = 0,
     limit: int = 15,
     exact_match_filter: dict[str, Any] | None = None,
     track_listens_lower: int | None = None,
     track_listens_upper: int | None = None,
-    client: QdrantClient = client,
+    with_payload: PayloadSelection = TRACK_PAYLOAD,
+    client: AsyncQdrantClient | None = None,
     collection_name: str = COLLECTION_NAME,
 ) -> tuple[list[Record], int | None]:
     """
@@ -33,12 +216,14 @@ def get_tracks(
         exact_match_filter (dict[str, Any]): Filters for exact matches on track attributes. Default is None. Format of entries: (attribute_name, value)
         track_listens_lower (int | None): Lower bound for track listens count filter. Default is None.
         track_listens_upper (int | None): Upper bound for track listens count filter. Default is None.
-        client (QdrantClient): The QdrantClient instance to use. Default is the global client instance.
+        with_payload (PayloadSelection): The payload fields to include in the response. Default is the fields of a Track.
+        client (AsyncQdrantClient | None): The client instance to use. Default is the shared client instance.
         collection_name (str): The name of the Qdrant collection to query. Default is the global collection name.
 
     Returns:
         tuple[list[Record], int | None]: A tuple containing a list of records (tracks) and the index of the track on the next page.
     """
+    client = client or get_client()
 
     must_clauses = generate_must_clauses(exact_match_filter)
 
@@ -55,22 +240,22 @@ def get_tracks(
 
     return cast(
         tuple[list[Record], int | None],
-        client.scroll(
+        await client.scroll(
             collection_name=collection_name,
             offset=offset,
             limit=limit,
             scroll_filter=models.Filter(must=must_clauses),  # type: ignore
-            with_payload=True,
+            with_payload=with_payload,
             with_vectors=False,
         ),
     )
 
 
-def get_track_by_id(
+async def get_track_by_id(
     track_id: int,
-    with_payload: bool = True,
+    with_payload: PayloadSelection = TRACK_PAYLOAD,
     with_vectors: bool = False,
-    client: QdrantClient = client,
+    client: AsyncQdrantClient | None = None,
     collection_name: str = COLLECTION_NAME,
 ) -> Record | None:
     """
@@ -78,21 +263,24 @@ def get_track_by_id(
 
     Args:
         track_id (int): The unique identifier of the track.
-        with_payload (bool): Whether to include payload in the response. Default is True.
+        with_payload (PayloadSelection): The payload fields to include in the response. Default is the fields of a Track.
         with_vectors (bool): Whether to include vectors in the response. Default is False.
-        client (QdrantClient): The QdrantClient instance to use. Default is the global client instance.
+        client (AsyncQdrantClient | None): The client instance to use. Default is the shared client instance.
         collection_name (str): The name of the Qdrant collection to query. Default is the global collection name.
 
 
     Returns:
         Record | None: The retrieved track as a Record object, or None if the track doesn't exist.
     """
+    client = client or get_client()
 
-    tracks: list[Record] = client.retrieve(
-        collection_name=collection_name,
-        ids=[track_id],
-        with_payload=with_payload,
-        with_vectors=with_vectors,
+    tracks: list[Record] = _unname_vectors(
+        await client.retrieve(
+            collection_name=collection_name,
+            ids=[track_id],
+            with_payload=with_payload,
+            with_vectors=_vector_selection(with_vectors),
+        )
     )
     # the DB would not allow duplicate indexes
     if len(tracks) == 1:
@@ -103,31 +291,82 @@ def get_track_by_id(
         raise DatabaseError("Multiple tracks with the same ID found.")
 
 
-def get_most_similar_tracks(
+async def get_tracks_by_ids(
+    track_ids: list[int],
+    with_payload: PayloadSelection = TRACK_PAYLOAD,
+    with_vectors: bool = False,
+    client: AsyncQdrantClient | None = None,
+    collection_name: str = COLLECTION_NAME,
+) -> list[Record]:
+    """
+    Retrieve several tracks by their IDs, in a single request.
+
+    Args:
+        track_ids (list[int]): The unique identifiers of the tracks.
+        with_payload (PayloadSelection): The payload fields to include in the response. Default is the fields of a Track.
+        with_vectors (bool): Whether to include vectors in the response. Default is False.
+        client (AsyncQdrantClient | None): The client instance to use. Default is the shared client instance.
+        collection_name (str): The name of the Qdrant collection to query. Default is the global collection name.
+
+    Returns:
+        list[Record]: The tracks that exist, in the order of `track_ids`.
+
+    Raises:
+        DatabaseError: If any of the tracks does not exist.
+    """
+    client = client or get_client()
+
+    tracks: list[Record] = _unname_vectors(
+        await client.retrieve(
+            collection_name=collection_name,
+            ids=track_ids,
+            with_payload=with_payload,
+            with_vectors=_vector_selection(with_vectors),
+        )
+    )
+    tracks_by_id = {track.id: track for track in tracks}
+
+    missing = [track_id for track_id in track_ids if track_id not in tracks_by_id]
+    if missing:
+        raise DatabaseError(f"Track with id: {missing[0]} does not exist.")
+
+    return [tracks_by_id[track_id] for track_id in track_ids]
+
+
+async def get_most_similar_tracks(
     track_id: int | None = None,
     track_embedding: list[float] | None = None,
     limit: int = 10,
     exact_search: bool = False,
-    with_payload: bool = True,
+    hnsw_ef: int | None = SEARCH_HNSW_EF,
+    oversampling: float | None = SEARCH_OVERSAMPLING,
+    with_payload: PayloadSelection = TRACK_PAYLOAD,
     with_vectors: bool = False,
     exact_match_filter: dict[str, Any] | None = None,
-    client: QdrantClient = client,
+    client: AsyncQdrantClient | None = None,
     collection_name: str = COLLECTION_NAME,
 ) -> list[ScoredPoint]:
     """
     Retrieve a list of the most similar tracks to the given input, either by track ID or track embedding.
 
+    When searching by track ID, the track itself is not part of the results. With the "numpy"
+    `SIMILARITY_BACKEND` and no client given, the search runs in process, on the exported index.
+
     Args:
         track_id (int | None): The ID of the track for which to find similar tracks. Set to None if using track_embedding.
         track_embedding (list[float] | None): The embedding vector of the track for which to find similar tracks.
             Set to None if using track_id.
         limit (int): The maximum number of similar tracks to retrieve. Default is 10.
         exact_search (bool): Whether to perform an exact search or not. Default is False.
-        with_payload (bool): Whether to include payload data in the results. Default is True.
+        hnsw_ef (int | None): The size of the candidate list of the HNSW search: more is more accurate and slower.
+            Default is `SEARCH_HNSW_EF`, None uses the ef of the collection.
+        oversampling (float | None): How many more candidates to fetch with the quantized vectors, to rescore
+            with the original ones. Default is `SEARCH_OVERSAMPLING`, None uses the oversampling of Qdrant.
+        with_payload (PayloadSelection): The payload fields to include in the results. Default is the fields of a Track.
         with_vectors (bool): Whether to include vector data in the results. Default is False.
         exact_match_filter (dict[str, Any] | None): A dictionary specifying exact match filters for query clauses.
             Set to None if no exact match filters are needed.
-        client (QdrantClient): The QdrantClient instance to use. Default is the global client instance.
+        client (AsyncQdrantClient | None): The client instance to use. Default is the shared client instance.
         collection_name (str): The name of the Qdrant collection to query. Default is the global collection name.
 
 
@@ -149,39 +388,253 @@ def get_most_similar_tracks(
             "Only one of `track_id` or `track_embedding` can be non-None"
         )
 
-    if track_id is not None:
-        query_track = get_track_by_id(
-            client=client,
+    index = get_vector_index() if client is None else None
+    if index is not None:
+        results = await asyncio.to_thread(
+            index.recommend if track_id is not None else index.search,
+            [track_id] if track_id is not None else [track_embedding],  # type: ignore
+            limit,
+            exact_match_filter=exact_match_filter,
+            with_payload=with_payload,
+            with_vectors=with_vectors,
+        )
+        return results[0]
+
+    client = client or get_client()
+    must_clauses = generate_must_clauses(exact_match_filter)
+
+    try:
+        if COMPACT_VECTOR_NAME and not exact_search:
+            candidates = await _get_candidates(
+                client,
+                collection_name,
+                [track_id] if track_id is not None else None,
+                [track_embedding] if track_embedding is not None else None,
+                limit,
+                must_clauses,
+                search_params(False, hnsw_ef, oversampling),
+            )
+            if not candidates[0]:
+                return []
+            must_clauses = _rerank_clauses(must_clauses, candidates[0])
+            exact_search = True
+
+        if track_id is not None:
+            # The query track's vector is looked up by Qdrant itself, so it never leaves the database
+            return _unname_vectors(
+                await client.recommend(
+                    collection_name=collection_name,
+                    timeout=SEARCH_TIMEOUT_SECONDS,
+                    positive=[track_id],
+                    using=VECTOR_NAME or None,
+                    query_filter=models.Filter(must=must_clauses),  # type: ignore
+                    search_params=search_params(exact_search, hnsw_ef, oversampling),
+                    limit=limit,
+                    with_vectors=_vector_selection(with_vectors),
+                    with_payload=with_payload,
+                )
+            )
+    except (UnexpectedResponse, grpc.RpcError, ValueError) as e:
+        if track_id is None or not _is_missing_point(e):
+            raise
+        raise DatabaseError(f"Track with id: {track_id} does not exist.")
+
+    return _unname_vectors(
+        await client.search(
             collection_name=collection_name,
-            track_id=track_id,
-            with_payload=False,
-            with_vectors=True,
-        )  # noqa: E501
+            timeout=SEARCH_TIMEOUT_SECONDS,
+            query_vector=_query_vector(track_embedding, VECTOR_NAME),  # type: ignore
+            query_filter=models.Filter(must=must_clauses),  # type: ignore
+            search_params=search_params(exact_search, hnsw_ef, oversampling),
+            limit=limit,
+            with_vectors=_vector_selection(with_vectors),
+            with_payload=with_payload,
+        )
+    )
 
-        if query_track is None:
-            raise DatabaseError(f"Track with id: {track_id} does not exist.")
 
-        track_embedding = cast(list[float], query_track.vector)
+async def get_most_similar_tracks_batch(
+    track_embeddings: list[list[float]],
+    limit: int = 10,
+    exact_search: bool = False,
+    hnsw_ef: int | None = SEARCH_HNSW_EF,
+    oversampling: float | None = SEARCH_OVERSAMPLING,
+    with_payload: PayloadSelection = TRACK_PAYLOAD,
+    with_vectors: bool = False,
+    exact_match_filter: dict[str, Any] | None = None,
+    client: AsyncQdrantClient | None = None,
+    collection_name: str = COLLECTION_NAME,
+) -> list[list[ScoredPoint]]:
+    """
+    Retrieve the most similar tracks for each of the given track embeddings, in a single request.
+
+    Args:
+        track_embeddings (list[list[float]]): The embedding vectors of the tracks for which to find similar tracks.
+        limit (int): The maximum number of similar tracks to retrieve per embedding. Default is 10.
+        exact_search (bool): Whether to perform an exact search or not. Default is False.
+        hnsw_ef (int | None): The size of the candidate list of the HNSW search: more is more accurate and slower.
+            Default is `SEARCH_HNSW_EF`, None uses the ef of the collection.
+        oversampling (float | None): How many more candidates to fetch with the quantized vectors, to rescore
+            with the original ones. Default is `SEARCH_OVERSAMPLING`, None uses the oversampling of Qdrant.
+        with_payload (PayloadSelection): The payload fields to include in the results. Default is the fields of a Track.
+        with_vectors (bool): Whether to include vector data in the results. Default is False.
+        exact_match_filter (dict[str, Any] | None): A dictionary specifying exact match filters for query clauses.
+            Set to None if no exact match filters are needed.
+        client (AsyncQdrantClient | None): The client instance to use. Default is the shared client instance.
+        collection_name (str): The name of the Qdrant collection to query. Default is the global collection name.
 
+    Returns:
+        list[list[ScoredPoint]]: For each embedding, in the same order, the most similar tracks found.
+    """
+    if not track_embeddings:
+        return []
+
+    index = get_vector_index() if client is None else None
+    if index is not None:
+        return await asyncio.to_thread(
+            index.search,
+            track_embeddings,
+            limit,
+            exact_match_filter=exact_match_filter,
+            with_payload=with_payload,
+            with_vectors=with_vectors,
+        )
+
+    client = client or get_client()
     must_clauses = generate_must_clauses(exact_match_filter)
+    clauses = [must_clauses] * len(track_embeddings)
+
+    if COMPACT_VECTOR_NAME and not exact_search:
+        candidates = await _get_candidates(
+            client,
+            collection_name,
+            None,
+            track_embeddings,
+            limit,
+            must_clauses,
+            search_params(False, hnsw_ef, oversampling),
+        )
+        clauses = [_rerank_clauses(must_clauses, ids) for ids in candidates]
+        exact_search = True
 
-    return client.search(
-        collection_name=collection_name,
-        query_vector=track_embedding,  # type: ignore
-        query_filter=models.Filter(must=must_clauses),  # type: ignore
-        search_params=models.SearchParams(exact=exact_search),
-        limit=limit,
-        with_vectors=with_vectors,
-        with_payload=with_payload,
-    )
+    return [
+        _unname_vectors(points)
+        for points in await client.search_batch(
+            collection_name=collection_name,
+            timeout=SEARCH_TIMEOUT_SECONDS,
+            requests=[
+                models.SearchRequest(
+                    vector=_query_vector(
+                        list(map(float, track_embedding)), VECTOR_NAME
+                    ),
+                    filter=models.Filter(must=must),  # type: ignore
+                    params=search_params(exact_search, hnsw_ef, oversampling),
+                    limit=limit,
+                    with_vector=_vector_selection(with_vectors),
+                    with_payload=with_payload,
+                )
+                for track_embedding, must in zip(track_embeddings, clauses)
+            ],
+        )
+    ]
 
 
-def get_tracks_full_text_match(
+async def get_most_similar_tracks_batch_by_ids(
+    track_ids: list[int],
+    limit: int = 10,
+    exact_search: bool = False,
+    hnsw_ef: int | None = SEARCH_HNSW_EF,
+    oversampling: float | None = SEARCH_OVERSAMPLING,
+    with_payload: PayloadSelection = TRACK_PAYLOAD,
+    with_vectors: bool = False,
+    client: AsyncQdrantClient | None = None,
+    collection_name: str = COLLECTION_NAME,
+) -> list[list[ScoredPoint]]:
+    """
+    Retrieve the most similar tracks for each of the given tracks, in a single request.
+
+    The vectors of the query tracks are looked up by Qdrant, and the query tracks are not part of their results.
+
+    Args:
+        track_ids (list[int]): The IDs of the tracks for which to find similar tracks.
+        limit (int): The maximum number of similar tracks to retrieve per track. Default is 10.
+        exact_search (bool): Whether to perform an exact search or not. Default is False.
+        hnsw_ef (int | None): The size of the candidate list of the HNSW search: more is more accurate and slower.
+            Default is `SEARCH_HNSW_EF`, None uses the ef of the collection.
+        oversampling (float | None): How many more candidates to fetch with the quantized vectors, to rescore
+            with the original ones. Default is `SEARCH_OVERSAMPLING`, None uses the oversampling of Qdrant.
+        with_payload (PayloadSelection): The payload fields to include in the results. Default is the fields of a Track.
+        with_vectors (bool): Whether to include vector data in the results. Default is False.
+        client (AsyncQdrantClient | None): The client instance to use. Default is the shared client instance.
+        collection_name (str): The name of the Qdrant collection to query. Default is the global collection name.
+
+    Returns:
+        list[list[ScoredPoint]]: For each track, in the same order, the most similar tracks found.
+
+    Raises:
+        DatabaseError: If any of the tracks does not exist.
+    """
+    if not track_ids:
+        return []
+
+    index = get_vector_index() if client is None else None
+    if index is not None:
+        return await asyncio.to_thread(
+            index.recommend,
+            track_ids,
+            limit,
+            with_payload=with_payload,
+            with_vectors=with_vectors,
+        )
+
+    client = client or get_client()
+    clauses: list[list[models.Condition]] = [[]] * len(track_ids)
+    try:
+        if COMPACT_VECTOR_NAME and not exact_search:
+            candidates = await _get_candidates(
+                client,
+                collection_name,
+                track_ids,
+                None,
+                limit,
+                [],
+                search_params(False, hnsw_ef, oversampling),
+            )
+            clauses = [_rerank_clauses([], ids) for ids in candidates]
+            exact_search = True
+
+        return [
+            _unname_vectors(points)
+            for points in await client.recommend_batch(
+                collection_name=collection_name,
+                timeout=SEARCH_TIMEOUT_SECONDS,
+                requests=[
+                    models.RecommendRequest(
+                        positive=[track_id],
+                        using=VECTOR_NAME or None,
+                        filter=models.Filter(must=must) if must else None,
+                        params=search_params(exact_search, hnsw_ef, oversampling),
+                        limit=limit,
+                        with_vector=_vector_selection(with_vectors),
+                        with_payload=with_payload,
+                    )
+                    for track_id, must in zip(track_ids, clauses)
+                ],
+            )
+        ]
+    except (UnexpectedResponse, grpc.RpcError, ValueError) as e:
+        if not _is_missing_point(e):
+            raise
+        raise DatabaseError("One of the tracks does not exist.")
+
+
+async def get_tracks_full_text_match(
     match_string: str,
-    offset: int,
+    offset: int | str | None,
     limit: int,
     enum_field: TrackFields,
-    client: QdrantClient = client,
+    with_payload: PayloadSelection = TRACK_PAYLOAD,
+    client: AsyncQdrantClient | None = None,
     collection_name: str = COLLECTION_NAME,
 ) -> tuple[list[Record], int | None]:
     """
@@ -189,23 +642,25 @@ def get_tracks_full_text_match(
 
     Args:
         match_string (str): The string to match against the specified field.
-        offset (int): The starting index for pagination.
+        offset (int | str | None): The ID of the first track to retrieve. None starts from the beginning.
         limit (int): The maximum number of tracks to retrieve.
         enum_field (TrackFields): An enumeration representing the field to match against.
-        client (QdrantClient): The QdrantClient instance to use. Default is the global client instance.
+        with_payload (PayloadSelection): The payload fields to include in the response. Default is the fields of a Track.
+        client (AsyncQdrantClient | None): The client instance to use. Default is the shared client instance.
         collection_name (str): The name of the Qdrant collection to query. Default is the global collection name.
 
     Returns:
         tuple[list[Record], int | None]: A tuple containing a list of records (tracks) and the index of the track on the next page.
     """
+    client = client or get_client()
 
     return cast(
         tuple[list[Record], int | None],
-        client.scroll(
+        await client.scroll(
             collection_name=collection_name,
             offset=offset,
             limit=limit,
-            with_payload=True,
+            with_payload=with_payload,
             with_vectors=False,
             scroll_filter=models.Filter(
                 must=[
@@ -219,18 +674,180 @@ def get_tracks_full_text_match(
     )
 
 
-def get_number_of_datapoints(
-    client: QdrantClient = client, collection_name: str = COLLECTION_NAME
+async def upsert_tracks(
+    points: list[models.PointStruct],
+    client: AsyncQdrantClient | None = None,
+    collection_name: str = COLLECTION_NAME,
+) -> None:
+    """
+    Insert the given tracks, or update them if tracks with the same IDs already exist.
+
+    In a collection with named vectors, the embeddings are stored as `VECTOR_NAME`, along with
+    their projection as `COMPACT_VECTOR_NAME` if it is set.
+
+    Args:
+        points (list[models.PointStruct]): The tracks, with their embeddings and payloads.
+        client (AsyncQdrantClient | None): The client instance to use. Default is the shared client instance.
+        collection_name (str): The name of the Qdrant collection. Default is the global collection name.
+    """
+    client = client or get_client()
+
+    if VECTOR_NAME:
+        points = _with_named_vectors(points)
+    await client.upsert(collection_name=collection_name, points=points, wait=True)
+
+
+async def get_number_of_datapoints(
+    client: AsyncQdrantClient | None = None, collection_name: str = COLLECTION_NAME
 ) -> int:
     """
     Get the total number of data points in the specified collection.
 
     Args:
-        client (QdrantClient): The QdrantClient instance to use. Default is the global client instance.
+        client (AsyncQdrantClient | None): The client instance to use. Default is the shared client instance.
         collection_name (str): The name of the Qdrant collection. Default is the global collection name.
 
     Returns:
         int: The total number of data points in the collection.
     """
+    client = client or get_client()
+
+    return (await client.get_collection(collection_name=collection_name)).points_count
+
+
+async def get_distance(
+    client: AsyncQdrantClient | None = None, collection_name: str = COLLECTION_NAME
+) -> models.Distance:
+    """
+    Get the metric the similarity searches compare the embeddings with. It is fetched once per collection.
+
+    Args:
+        client (AsyncQdrantClient | None): The client instance to use. Default is the shared client instance.
+        collection_name (str): The name of the Qdrant collection. Default is the global collection name.
+
+    Returns:
+        models.Distance: The distance of the embeddings.
+    """
+    index = get_vector_index()
+    if index is not None:
+        return index.distance
+
+    if collection_name not in _distances:
+        client = client or get_client()
+        vectors = (
+            await client.get_collection(collection_name=collection_name)
+        ).config.params.vectors
+        if isinstance(vectors, dict):
+            vectors = vectors[VECTOR_NAME]
+        _distances[collection_name] = vectors.distance  # type: ignore
+    return _distances[collection_name]
+
+
+def _is_missing_point(e: Exception) -> bool:
+    # Qdrant answers 404 over REST and NOT_FOUND over gRPC, the local mode raises a ValueError.
+    # A missing collection or vector gets the same codes, so only the message tells them apart.
+    if isinstance(e, UnexpectedResponse):
+        message = e.content.decode("utf-8", "replace") if e.status_code == 404 else ""
+    elif isinstance(e, grpc.RpcError):
+        message = (
+            e.details() if e.code() == grpc.StatusCode.NOT_FOUND else ""  # type: ignore
+        )
+    else:
+        message = str(e)
+    return _MISSING_POINT.search(message or "") is not None
 
-    return client.get_collection(collection_name=collection_name).points_count
+
+async def _get_candidates(
+    client: AsyncQdrantClient,
+    collection_name: str,
+    track_ids: list[int] | None,
+    track_embeddings: list[list[float]] | None,
+    limit: int,
+    must_clauses: list[models.Condition],
+    params: models.SearchParams,
+) -> list[list[int]]:
+    # The first stage of a search: the candidates most similar on the projected embeddings
+    query_filter = models.Filter(must=must_clauses) if must_clauses else None
+    if track_ids is not None:
+        results = await client.recommend_batch(
+            collection_name=collection_name,
+            timeout=SEARCH_TIMEOUT_SECONDS,
+            requests=[
+                models.RecommendRequest(
+                    positive=[track_id],
+                    using=COMPACT_VECTOR_NAME,
+                    filter=query_filter,
+                    params=params,
+                    limit=limit * RERANK_FACTOR,
+                    with_payload=False,
+                )
+                for track_id in track_ids
+            ],
+        )
+    else:
+        projected = get_projection().transform(track_embeddings).tolist()  # type: ignore
+        results = await client.search_batch(
+            collection_name=collection_name,
+            timeout=SEARCH_TIMEOUT_SECONDS,
+            requests=[
+                models.SearchRequest(
+                    vector=models.NamedVector(name=COMPACT_VECTOR_NAME, vector=vector),
+                    filter=query_filter,
+                    params=params,
+                    limit=limit * RERANK_FACTOR,
+                    with_payload=False,
+                )
+                for vector in projected
+            ],
+        )
+    return [[cast(int, point.id) for point in points] for points in results]
+
+
+def _rerank_clauses(
+    must_clauses: list[models.Condition], candidates: list[int]
+) -> list[models.Condition]:
+    # The second stage compares the query with the embeddings of the candidates only
+    return [*must_clauses, models.HasIdCondition(has_id=candidates)]  # type: ignore
+
+
+def _query_vector(
+    vector: list[float], vector_name: str
+) -> list[float] | models.NamedVector:
+    return (
+        models.NamedVector(name=vector_name, vector=vector) if vector_name else vector
+    )
+
+
+def _vector_selection(with_vectors: bool) -> bool | list[str]:
+    # The embeddings only, without their projection
+    return [VECTOR_NAME] if with_vectors and VECTOR_NAME else with_vectors
+
+
+def _unname_vectors(points: list) -> list:
+    # The callers get the embeddings as a list, whether the collection names its vectors or not
+    if VECTOR_NAME:
+        for point in points:
+            if isinstance(point.vector, dict):
+                point.vector = point.vector.get(VECTOR_NAME)
+    return points
+
+
+def _with_named_vectors(points: list[models.PointStruct]) -> list[models.PointStruct]:
+    embeddings = [point.vector for point in points if isinstance(point.vector, list)]
+    if not embeddings:
+        return points
+    projected = iter(
+        get_projection().transform(embeddings).tolist() if COMPACT_VECTOR_NAME else []
+    )
+
+    named = []
+    for point in points:
+        if isinstance(point.vector, list):
+            vectors = {VECTOR_NAME: point.vector}
+            if COMPACT_VECTOR_NAME:
+                vectors[COMPACT_VECTOR_NAME] = next(projected)
+            point = models.PointStruct(
+                id=point.id, vector=vectors, payload=point.payload
+            )
+        named.append(point)
+    return named
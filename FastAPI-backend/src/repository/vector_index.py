@@ -0,0 +1,423 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Sequence
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient, models
+from qdrant_client.http.models.models import ScoredPoint
+
+from src.models.exceptions.exceptions import DatabaseError
+
+VECTORS_FILE = "vectors.npy"
+IDS_FILE = "ids.npy"
+PAYLOADS_FILE = "payloads.json"
+META_FILE = "meta.json"
+
+# The rows scored at a time, which bounds the memory of the scores of a batch of queries
+SEARCH_BLOCK_SIZE = 65_536
+# The rows compared with a query at a time by the Manhattan distance, which bounds the memory
+# of their differences with the query
+MANHATTAN_BLOCK_SIZE = 4_096
+
+SUPPORTED_DISTANCES = (
+    models.Distance.COSINE,
+    models.Distance.DOT,
+    models.Distance.EUCLID,
+    models.Distance.MANHATTAN,
+)
+# The distances Qdrant scores with the distance itself, where lower is more similar
+_DISTANCE_SCORES = (models.Distance.EUCLID, models.Distance.MANHATTAN)
+
+EXPORT_BATCH_SIZE = 1_000
+
+
+class VectorIndex:
+    """
+    An exact similarity index of the tracks, searched in process with NumPy.
+
+    The embeddings are a memory-mapped matrix, so only the pages a search reads are loaded, and the
+    payloads are a table with one array per field. Searches compare the queries with every track,
+    one block of rows at a time, and give the same results as an exact search in Qdrant.
+
+    Like Qdrant, a cosine index keeps its embeddings normalized. Those of a memory-mapped matrix
+    were normalized when it was saved.
+    """
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        vectors: np.ndarray,
+        payloads: dict[str, np.ndarray],
+        distance: models.Distance = models.Distance.COSINE,
+    ):
+        if distance not in SUPPORTED_DISTANCES:
+            raise ValueError(
+                f"Unsupported distance {distance!r}, expected one of {SUPPORTED_DISTANCES}"
+            )
+        if distance == models.Distance.COSINE and not isinstance(vectors, np.memmap):
+            vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+
+        self.ids = ids
+        self.vectors = vectors
+        self.payloads = payloads
+        self.distance = distance
+        self._rows = {int(track_id): row for row, track_id in enumerate(ids)}
+        # The squared norms, computed once, turn the Euclidean distances into a matrix product
+        self._squared_norms = (
+            np.concatenate(
+                [
+                    np.einsum("ij,ij->i", block, block)
+                    for block in self._blocks(self.vectors)
+                ]
+            )
+            if distance == models.Distance.EUCLID and len(vectors)
+            else None
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def load(cls, directory: str | os.PathLike) -> "VectorIndex":
+        """
+        Load an index saved by `save`, memory-mapping its embeddings.
+
+        Args:
+            directory (str | os.PathLike): The directory of the index.
+
+        Returns:
+            VectorIndex: The index.
+        """
+
+        directory = Path(directory)
+        meta = json.loads((directory / META_FILE).read_text())
+        payloads = json.loads((directory / PAYLOADS_FILE).read_text())
+        return cls(
+            ids=np.load(directory / IDS_FILE),
+            vectors=np.load(directory / VECTORS_FILE, mmap_mode="r"),
+            payloads={field: _column(values) for field, values in payloads.items()},
+            distance=models.Distance(meta["distance"]),
+        )
+
+    def save(self, directory: str | os.PathLike) -> None:
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / VECTORS_FILE, np.asarray(self.vectors, dtype=np.float32))
+        _save_table(directory, self.ids, self.payloads, self.distance)
+
+    def search(
+        self,
+        queries: Sequence[Sequence[float]] | np.ndarray,
+        limit: int,
+        exact_match_filter: dict[str, Any] | None = None,
+        exclude_ids: Sequence[int | None] | None = None,
+        with_payload: Any = True,
+        with_vectors: bool = False,
+    ) -> list[list[ScoredPoint]]:
+        """
+        Find the most similar tracks to each query.
+
+        Args:
+            queries (Sequence[Sequence[float]] | np.ndarray): The query embeddings.
+            limit (int): The maximum number of tracks per query.
+            exact_match_filter (dict[str, Any] | None): The values the payload fields of the tracks must have.
+            exclude_ids (Sequence[int | None] | None): For each query, a track to leave out of its results.
+            with_payload (Any): The payload fields to include, as for Qdrant: a bool, a list of fields or a selector.
+            with_vectors (bool): Whether to include the embeddings of the tracks.
+
+        Returns:
+            list[list[ScoredPoint]]: For each query, the most similar tracks, the most similar first.
+        """
+
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        # `np.argpartition` needs 0 < limit <= the number of candidates
+        limit = min(limit, len(self))
+        if limit <= 0:
+            return [[] for _ in queries]
+        if self.distance == models.Distance.COSINE:
+            queries = _normalize(queries)
+
+        allowed = self._filter_mask(exact_match_filter)
+        excluded_rows = [
+            self._rows.get(track_id) if track_id is not None else None
+            for track_id in (exclude_ids or [None] * len(queries))
+        ]
+
+        # The best rows so far and their similarities, where higher is always better
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        best_similarities = np.empty((len(queries), 0), dtype=np.float32)
+        for start, block in zip(
+            range(0, len(self), SEARCH_BLOCK_SIZE), self._blocks(self.vectors)
+        ):
+            similarities = self._similarities(queries, block, start)
+            if allowed is not None:
+                similarities[:, ~allowed[start : start + len(block)]] = -np.inf
+            for query, row in enumerate(excluded_rows):
+                if row is not None and start <= row < start + len(block):
+                    similarities[query, row - start] = -np.inf
+
+            k = min(limit, len(block))
+            top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+            best_rows = np.concatenate([best_rows, top + start], axis=1)
+            best_similarities = np.concatenate(
+                [best_similarities, np.take_along_axis(similarities, top, axis=1)],
+                axis=1,
+            )
+            if best_rows.shape[1] > limit:
+                keep = np.argpartition(-best_similarities, limit - 1, axis=1)[:, :limit]
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+                best_similarities = np.take_along_axis(best_similarities, keep, axis=1)
+
+        results = []
+        for rows, similarities in zip(best_rows, best_similarities):
+            order = np.argsort(-similarities, kind="stable")
+            results.append(
+                [
+                    ScoredPoint(
+                        id=int(self.ids[rows[i]]),
+                        version=0,
+                        score=self._score(float(similarities[i])),
+                        payload=self._payload(rows[i], with_payload),
+                        vector=self.vectors[rows[i]].tolist() if with_vectors else None,
+                    )
+                    for i in order
+                    if np.isfinite(similarities[i])
+                ]
+            )
+        return results
+
+    def recommend(
+        self,
+        track_ids: Sequence[int],
+        limit: int,
+        exact_match_filter: dict[str, Any] | None = None,
+        with_payload: Any = True,
+        with_vectors: bool = False,
+    ) -> list[list[ScoredPoint]]:
+        """
+        Find the most similar tracks to each of the given tracks, which are not part of their own results.
+
+        Args:
+            track_ids (Sequence[int]): The IDs of the tracks.
+            limit (int): The maximum number of tracks per query.
+            exact_match_filter (dict[str, Any] | None): The values the payload fields of the tracks must have.
+            with_payload (Any): The payload fields to include, as for Qdrant: a bool, a list of fields or a selector.
+            with_vectors (bool): Whether to include the embeddings of the tracks.
+
+        Returns:
+            list[list[ScoredPoint]]: For each track, the most similar tracks, the most similar first.
+
+        Raises:
+            DatabaseError: If any of the tracks is not in the index.
+        """
+
+        return self.search(
+            self.vectors[[self._row(track_id) for track_id in track_ids]],
+            limit,
+            exact_match_filter=exact_match_filter,
+            exclude_ids=track_ids,
+            with_payload=with_payload,
+            with_vectors=with_vectors,
+        )
+
+    def _row(self, track_id: int) -> int:
+        row = self._rows.get(track_id)
+        if row is None:
+            raise DatabaseError(f"Track with id: {track_id} does not exist.")
+        return row
+
+    def _blocks(self, vectors: np.ndarray):
+        for start in range(0, len(vectors), SEARCH_BLOCK_SIZE):
+            yield np.asarray(
+                vectors[start : start + SEARCH_BLOCK_SIZE], dtype=np.float32
+            )
+
+    def _similarities(
+        self, queries: np.ndarray, block: np.ndarray, start: int
+    ) -> np.ndarray:
+        if self.distance == models.Distance.MANHATTAN:
+            distances = np.empty((len(queries), len(block)), dtype=np.float32)
+            for query, vector in enumerate(queries):
+                for row in range(0, len(block), MANHATTAN_BLOCK_SIZE):
+                    rows = block[row : row + MANHATTAN_BLOCK_SIZE]
+                    distances[query, row : row + len(rows)] = np.abs(rows - vector).sum(
+                        axis=1
+                    )
+            # Negated, so that the closest tracks have the highest similarity
+            return -distances
+
+        products = queries @ block.T
+        if self.distance != models.Distance.EUCLID:
+            return products
+
+        squared_distances = (
+            self._squared_norms[start : start + len(block)]  # type: ignore
+            - 2 * products
+            + np.einsum("ij,ij->i", queries, queries)[:, None]
+        )
+        # Negated, so that the closest tracks have the highest similarity
+        return -np.sqrt(np.maximum(squared_distances, 0))
+
+    def _score(self, similarity: float) -> float:
+        # Qdrant scores the Euclidean and Manhattan searches with the distance itself
+        return -similarity if self.distance in _DISTANCE_SCORES else similarity
+
+    def _filter_mask(
+        self, exact_match_filter: dict[str, Any] | None
+    ) -> np.ndarray | None:
+        if not exact_match_filter:
+            return None
+
+        mask = np.ones(len(self), dtype=bool)
+        for field, value in exact_match_filter.items():
+            column = self.payloads.get(field)
+            if column is None:
+                # Like in Qdrant, no track matches a field none of them has
+                return np.zeros(len(self), dtype=bool)
+            mask &= column == value
+        return mask
+
+    def _payload(self, row: int, with_payload: Any) -> dict[str, Any] | None:
+        if with_payload is False:
+            return None
+
+        if isinstance(with_payload, models.PayloadSelectorInclude):
+            fields = with_payload.include
+        elif isinstance(with_payload, models.PayloadSelectorExclude):
+            fields = [
+                field for field in self.payloads if field not in with_payload.exclude
+            ]
+        elif isinstance(with_payload, (list, tuple)):
+            fields = with_payload
+        else:
+            fields = self.payloads
+
+        payload = {}
+        for field in fields:
+            column = self.payloads.get(field)
+            if column is not None and column[row] is not None:
+                payload[field] = (
+                    column[row].item() if hasattr(column[row], "item") else column[row]
+                )
+        return payload
+
+
+async def export_from_qdrant(
+    client: AsyncQdrantClient,
+    collection_name: str,
+    directory: str | os.PathLike,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    vector_name: str = "",
+) -> VectorIndex:
+    """
+    Export the tracks of a Qdrant collection to an index, scrolling through the collection.
+
+    The embeddings are written to the memory-mapped file as they arrive, so the export does not
+    hold the whole matrix in memory.
+
+    Args:
+        client (AsyncQdrantClient): The client instance to use.
+        collection_name (str): The name of the Qdrant collection.
+        directory (str | os.PathLike): The directory to save the index to.
+        batch_size (int): The number of tracks per scroll request.
+        vector_name (str): The name of the embeddings, "" for a collection with a single unnamed vector.
+
+    Returns:
+        VectorIndex: The exported index.
+    """
+
+    collection = await client.get_collection(collection_name=collection_name)
+    vectors_config = collection.config.params.vectors
+    if vector_name and isinstance(vectors_config, dict):
+        vectors_config = vectors_config.get(vector_name)
+    if not isinstance(vectors_config, models.VectorParams):
+        raise ValueError(
+            f"The collection has no vector named {vector_name!r}"
+            if vector_name
+            else "Only collections with a single unnamed vector can be exported"
+        )
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    # Sized for the tracks counted now, and trimmed to the tracks actually exported
+    capacity = collection.points_count or 0
+    vectors = np.lib.format.open_memmap(
+        directory / VECTORS_FILE,
+        mode="w+",
+        dtype=np.float32,
+        shape=(capacity, vectors_config.size),
+    )
+
+    ids: list[int] = []
+    payloads: list[dict[str, Any]] = []
+    offset = None
+    while True:
+        records, offset = await client.scroll(
+            collection_name=collection_name,
+            offset=offset,
+            limit=batch_size,
+            with_payload=True,
+            with_vectors=[vector_name] if vector_name else True,
+        )
+        records = records[: capacity - len(ids)]
+        if records:
+            vectors[len(ids) : len(ids) + len(records)] = [
+                record.vector[vector_name] if vector_name else record.vector  # type: ignore
+                for record in records
+            ]
+            ids += [int(record.id) for record in records]
+            payloads += [record.payload or {} for record in records]
+        if offset is None or len(ids) == capacity:
+            break
+
+    vectors.flush()
+    if len(ids) < capacity:
+        # Tracks were deleted during the export
+        trimmed = np.array(vectors[: len(ids)])
+        del vectors
+        np.save(directory / VECTORS_FILE, trimmed)
+
+    fields = sorted({field for payload in payloads for field in payload})
+    _save_table(
+        directory,
+        np.array(ids, dtype=np.int64),
+        {
+            field: _column([payload.get(field) for payload in payloads])
+            for field in fields
+        },
+        vectors_config.distance,
+    )
+    return VectorIndex.load(directory)
+
+
+def _save_table(
+    directory: Path,
+    ids: np.ndarray,
+    payloads: dict[str, np.ndarray],
+    distance: models.Distance,
+) -> None:
+    np.save(directory / IDS_FILE, ids)
+    (directory / PAYLOADS_FILE).write_text(
+        json.dumps({field: column.tolist() for field, column in payloads.items()})
+    )
+    (directory / META_FILE).write_text(
+        json.dumps({"distance": distance.value, "size": len(ids)})
+    )
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def _column(values: list[Any]) -> np.ndarray:
+    # Numeric fields become numeric arrays, the others, with missing values, object arrays
+    if values and all(
+        isinstance(value, (int, float)) and not isinstance(value, bool)
+        for value in values
+    ):
+        return np.array(values)
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
@@ -1,77 +1,157 @@
-from typing import Annotated
-from fastapi import APIRouter, HTTPException, Query
-from src.models.exceptions.exceptions import DatabaseError
+from typing import Annotated, Any, AsyncIterator
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from src.models.exceptions.exceptions import DatabaseError, InvalidCursor
 
 from src.service import track_operations, playlist_enrichment
+from src.service.result_cache import result_cache
 from src.models.models import ScoredTrack, Track
 from src.models.enumerations import GenreEnum, TrackFields
+from src.utils.admin_auth import require_admin_token
+from src.utils.pagination import decode_cursor, encode_cursor
+from src.utils.serialization import dumps, fast_response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+FULL_TEXT_SEARCH_DESCRIPTION = """Performs Full Text Match on the {field} field in the db.
+    With a `limit`, returns one page of tracks and the cursor of the next page in the
+    `X-Next-Cursor` header, which is absent on the last page. Without a `limit`, streams all
+    the matching tracks, as a JSON array or as NDJSON if requested with `Accept: application/x-ndjson`."""
 
 tracks_library_router = APIRouter()
 
 
 @tracks_library_router.get(
     "/get_tracks/track-title",
-    description="Performs Full Text Match on the track title field in the db",
+    description=FULL_TEXT_SEARCH_DESCRIPTION.format(field="track title"),
+    response_model=list[Track],
 )
-def get_tracks_by_name(
+async def get_tracks_by_name(
+    request: Request,
+    response: Response,
     track_title: str,
     offset: Annotated[int, Query(ge=0)] = 0,
     limit: Annotated[int | None, Query(ge=1)] = None,
-) -> list[Track]:
-    return track_operations.get_tracks_by_full_text_match(
-        track_title, offset, limit, TrackFields.TRACK_TITLE
+    cursor: str | None = None,
+) -> Response | list[Track]:
+    return await _full_text_search(
+        request, response, track_title, offset, limit, cursor, TrackFields.TRACK_TITLE
     )
 
 
 @tracks_library_router.get(
     "/get_tracks/artist-name",
-    description="Performs Full Text Match on the track artist field in the db",
+    description=FULL_TEXT_SEARCH_DESCRIPTION.format(field="track artist"),
+    response_model=list[Track],
 )
-def get_tracks_by_artist(
+async def get_tracks_by_artist(
+    request: Request,
+    response: Response,
     artist_name: str,
     offset: Annotated[int, Query(ge=0)] = 0,
     limit: Annotated[int | None, Query(ge=1)] = None,
-) -> list[Track]:
-    return track_operations.get_tracks_by_full_text_match(
-        artist_name, offset, limit, TrackFields.ARTIST_NAME
+    cursor: str | None = None,
+) -> Response | list[Track]:
+    return await _full_text_search(
+        request, response, artist_name, offset, limit, cursor, TrackFields.ARTIST_NAME
     )
 
 
+async def _full_text_search(
+    request: Request,
+    response: Response,
+    match_string: str,
+    offset: int,
+    limit: int | None,
+    cursor: str | None,
+    enum_field: TrackFields,
+) -> Response | list[Track]:
+    try:
+        start = decode_cursor(cursor) if cursor else offset
+    except InvalidCursor as ic:
+        raise HTTPException(status_code=400, detail=ic.message)
+
+    if limit:
+        tracks, next_page_offset = await track_operations.get_tracks_by_full_text_match(
+            match_string, start, limit, enum_field
+        )
+        page = fast_response(tracks)
+        next_cursor = encode_cursor(next_page_offset)
+        if next_cursor:
+            # The headers of the injected response are lost when a response is returned
+            headers = page.headers if isinstance(page, Response) else response.headers
+            headers[NEXT_CURSOR_HEADER] = next_cursor
+        return page
+
+    pages = track_operations.stream_tracks_by_full_text_match(
+        match_string, start, enum_field
+    )
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        return StreamingResponse(_ndjson(pages), media_type=NDJSON_MEDIA_TYPE)
+    return StreamingResponse(_json_array(pages), media_type="application/json")
+
+
+async def _ndjson(pages: AsyncIterator[list[Track]]) -> AsyncIterator[bytes]:
+    async for tracks in pages:
+        yield b"".join(dumps(track) + b"\n" for track in tracks)
+
+
+async def _json_array(pages: AsyncIterator[list[Track]]) -> AsyncIterator[bytes]:
+    yield b"["
+    separator = b""
+    async for tracks in pages:
+        # The page without its brackets
+        yield separator + dumps(tracks)[1:-1]
+        separator = b","
+    yield b"]"
+
+
 @tracks_library_router.get(
     "/get_tracks_pagination",
     description="""Returns a tuple containing the list of 'limit'-number of Tracks, 
     as well as the offset of the track of the next page. (tracks, next_page_track_id)""",
+    response_model=tuple[list[Track], int | None],
 )
-def get_tracks_pagination(
+async def get_tracks_pagination(
     offset: Annotated[int, Query(ge=0)],
     limit: Annotated[int, Query(ge=1)],
     track_listens_lower_bound: Annotated[int | None, Query(ge=0)] = None,
     track_listens_upper_bound: Annotated[int | None, Query(ge=0)] = None,
     genre: GenreEnum | None = None,
-) -> tuple[list[Track], int | None]:
+) -> Response | tuple[list[Track], int | None]:
     exact_match_filter = dict(
         [
             (TrackFields.GENRE, genre.value if genre else None),
         ]
     )
 
-    return track_operations.get_tracks(
-        offset=offset,
-        limit=limit,
-        track_listens_lower_bound=track_listens_lower_bound,
-        track_listens_upper_bound=track_listens_upper_bound,
-        exact_match_filter={
-            k: v for k, v in exact_match_filter.items() if v is not None
-        },
+    return fast_response(
+        await track_operations.get_tracks(
+            offset=offset,
+            limit=limit,
+            track_listens_lower_bound=track_listens_lower_bound,
+            track_listens_upper_bound=track_listens_upper_bound,
+            exact_match_filter={
+                k: v for k, v in exact_match_filter.items() if v is not None
+            },
+        )
     )
 
 
-@tracks_library_router.get("/similar_tracks")
-def get_most_similar_tracks(
+@tracks_library_router.get(
+    "/similar_tracks",
+    description="""Returns the tracks most similar to the given one. `hnsw_ef` and `oversampling`
+    raise the search budget of the request, trading latency for recall.""",
+    response_model=list[ScoredTrack],
+)
+async def get_most_similar_tracks(
     track_id: Annotated[int, Query(ge=0)],
     number_of_similar_tracks: Annotated[int, Query(ge=1)] = 10,
     artist_name: str | None = None,
-) -> list[ScoredTrack]:
+    hnsw_ef: Annotated[int | None, Query(ge=1)] = None,
+    oversampling: Annotated[float | None, Query(ge=1)] = None,
+) -> Response | list[ScoredTrack]:
     exact_match_filter = dict(
         [
             (TrackFields.ARTIST_NAME, artist_name),
@@ -79,33 +159,57 @@ def get_most_similar_tracks(
     )
 
     try:
-        return track_operations.find_n_most_similar_tracks_by_id(
-            track_id=track_id,
-            n=number_of_similar_tracks,
-            exact_match_filter={
-                k: v for k, v in exact_match_filter.items() if v is not None
-            },
+        return fast_response(
+            await track_operations.find_n_most_similar_tracks_by_id(
+                track_id=track_id,
+                n=number_of_similar_tracks,
+                exact_match_filter={
+                    k: v for k, v in exact_match_filter.items() if v is not None
+                },
+                hnsw_ef=hnsw_ef,
+                oversampling=oversampling,
+            )
         )
     except DatabaseError as dbe:
         raise HTTPException(status_code=404, detail=dbe.message)
 
 
+@tracks_library_router.get("/cache/stats")
+async def get_result_cache_stats() -> dict[str, Any]:
+    return result_cache.stats()
+
+
+@tracks_library_router.post("/cache/invalidate", dependencies=[Depends(require_admin_token)])
+async def invalidate_result_cache():
+    # Only drops the cache of the worker that serves the request, unless it is shared in Redis
+    await result_cache.invalidate()
+    return Response(status_code=204)
+
+
 @tracks_library_router.get("/{track_id}")
-def get_track_by_id(track_id: int) -> Track:
+async def get_track_by_id(track_id: int) -> Track:
     if track_id < 0:
         raise HTTPException(status_code=400, detail="All track IDs must be positive integers")
     try:
-        return track_operations.get_track_by_id(track_id=track_id)
+        return await track_operations.get_track_by_id(track_id=track_id)
     except DatabaseError as dbe:
         raise HTTPException(status_code=404, detail=dbe.message)
 
 
-@tracks_library_router.post("/enrich_playlist")
-def enrich_playlist(track_ids: list[int]) -> list[Track]:
+@tracks_library_router.post("/enrich_playlist", response_model=list[Track])
+async def enrich_playlist(
+    track_ids: list[int],
+    number_of_additions: Annotated[int | None, Query(ge=0)] = None,
+    seed: int | None = None,
+) -> Response | list[Track]:
     if any(id < 0 for id in track_ids):
         raise HTTPException(status_code=400, detail="All track IDs must be positive integers")
     
     try:
-        return playlist_enrichment.enrich(track_ids)
+        return fast_response(
+            await playlist_enrichment.enrich(
+                track_ids, number_of_additions=number_of_additions, seed=seed
+            )
+        )
     except DatabaseError as dbe:
         raise HTTPException(status_code=404, detail=dbe.message)
@@ -1,30 +1,96 @@
-from typing import Annotated
-from fastapi import APIRouter, HTTPException, Query, UploadFile
-from fastapi.responses import FileResponse
-from src.models.exceptions.exceptions import DatabaseError
-from src.models.models import UploadedTrack
+import os
+from typing import Annotated, Any
+
+import anyio
+
+from fastapi import APIRouter, Header, HTTPException, Query, Request, UploadFile
+from fastapi.responses import Response
+from src.models.exceptions.exceptions import (
+    AudioFileTooLarge,
+    DatabaseError,
+    JobQueueFull,
+)
+from src.models.models import UploadedTrack, UploadedTrackResult, UploadJob
 
 from src.service import track_operations
-from src.utils.constants import NUMBER_OF_GENRES
+from src.service.feature_cache import feature_cache
+from src.service.audio_decoding import stage_upload
+from src.service.track_artifacts import read_artifacts
+from src.service.upload_jobs import upload_jobs
+from src.utils.admin_auth import require_admin_token
+from src.utils.constants import (
+    MAX_UPLOAD_BATCH_FILES,
+    NUMBER_OF_GENRES,
+    UPLOAD_JOB_MAX_WAIT_SECONDS,
+)
+from src.utils.file_responses import ARTIFACT_CACHE_CONTROL, file_response
 
 tracks_upload_router = APIRouter()
 
 
 @tracks_upload_router.get("/get_audio/{track_id}")
-async def get_audio(track_id: int):
+async def get_audio(track_id: int, request: Request) -> Response:
     if track_id < 0:
-        raise HTTPException(status_code=400, detail="The ID of the track must be a positive integer")
+        raise HTTPException(
+            status_code=400, detail="The ID of the track must be a positive integer"
+        )
     try:
-        track = track_operations.get_track_by_id(track_id)
+        track_path = await track_operations.get_track_path(track_id)
     except DatabaseError as dbe:
         raise HTTPException(status_code=404, detail=dbe.message)
 
     try:
-        return FileResponse(track.track_path, media_type='audio/mpeg')
+        # Serves the byte ranges of seeking players, and 304s to the clients with a fresh copy
+        return await file_response(track_path, request.headers, media_type="audio/mpeg")
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Track not found")
 
 
+@tracks_upload_router.get("/get_preview/{track_id}")
+async def get_preview(track_id: int, request: Request) -> Response:
+    return await _get_track_artifact(track_id, request, "preview", "audio/mpeg")
+
+
+@tracks_upload_router.get("/get_waveform/{track_id}")
+async def get_waveform(track_id: int, request: Request) -> Response:
+    return await _get_track_artifact(
+        track_id, request, "waveform", "application/octet-stream"
+    )
+
+
+async def _get_track_artifact(
+    track_id: int, request: Request, kind: str, media_type: str
+) -> Response:
+    if track_id < 0:
+        raise HTTPException(
+            status_code=400, detail="The ID of the track must be a positive integer"
+        )
+    try:
+        track_path = await track_operations.get_track_path(track_id)
+    except DatabaseError as dbe:
+        raise HTTPException(status_code=404, detail=dbe.message)
+
+    # Built by `src.cli.build_artifacts`, next to the audio file in the payload of the track
+    artifacts = await anyio.to_thread.run_sync(read_artifacts, track_path)
+    if artifacts is None:
+        raise HTTPException(status_code=404, detail=f"The track has no {kind} yet")
+    try:
+        return await file_response(
+            artifacts.path(track_path, kind),
+            request.headers,
+            media_type=media_type,
+            cache_control=ARTIFACT_CACHE_CONTROL,
+            etag=f"{artifacts.content_hash[:16]}-{kind}",
+        )
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"The track has no {kind} yet")
+
+
+@tracks_upload_router.get("/feature-cache/stats")
+async def get_feature_cache_stats() -> dict[str, Any]:
+    return feature_cache.stats()
+
+
 @tracks_upload_router.post("/upload-track")
 async def upload_audio_file(
     file: UploadFile,
@@ -36,6 +102,105 @@ async def upload_audio_file(
             status_code=400, detail="Only audio/mpeg (MP3) files are allowed."
         )
 
-    return await track_operations.clf_and_most_similar_tracks(
-        file, top_n_genres, top_n_similar
+    try:
+        return await track_operations.clf_and_most_similar_tracks(
+            file, top_n_genres, top_n_similar
+        )
+    except AudioFileTooLarge as e:
+        raise HTTPException(status_code=413, detail=e.message)
+
+
+@tracks_upload_router.post("/upload-track/jobs", status_code=202)
+async def submit_upload_job(
+    file: UploadFile,
+    request: Request,
+    response: Response,
+    top_n_genres: Annotated[int, Query(le=NUMBER_OF_GENRES)] = 5,
+    top_n_similar: Annotated[int, Query(ge=0)] = 10,
+    priority: Annotated[int, Query(ge=0, le=9)] = 0,
+    x_admin_token: Annotated[str | None, Header()] = None,
+) -> UploadJob:
+    # The jobs are kept by the worker process that queued them, see `UploadJobQueue`
+    if file.content_type != "audio/mpeg":
+        raise HTTPException(
+            status_code=400, detail="Only audio/mpeg (MP3) files are allowed."
+        )
+    # Any client could otherwise jump the queue
+    if priority > 0:
+        require_admin_token(x_admin_token)
+
+    # The file is staged before answering, the analysis runs in the background
+    try:
+        staged = await stage_upload(file)
+    except AudioFileTooLarge as e:
+        raise HTTPException(status_code=413, detail=e.message)
+
+    track_name = file.filename or "Unknown"
+    try:
+        job = upload_jobs.submit(
+            lambda: track_operations.clf_and_most_similar_tracks_staged(
+                staged, track_name, top_n_genres, top_n_similar
+            ),
+            priority=priority,
+            file_name=file.filename,
+            cleanup=lambda: os.remove(staged.path),
+        )
+    except JobQueueFull as e:
+        os.remove(staged.path)
+        raise HTTPException(
+            status_code=503, detail=e.message, headers={"Retry-After": "5"}
+        )
+
+    response.headers["Location"] = str(
+        request.url_for("get_upload_job", job_id=job.job_id)
     )
+    return job
+
+
+@tracks_upload_router.get("/upload-track/jobs/{job_id}")
+async def get_upload_job(
+    job_id: str,
+    wait: Annotated[float, Query(ge=0, le=UPLOAD_JOB_MAX_WAIT_SECONDS)] = 0,
+) -> UploadJob:
+    # With `wait`, answers as soon as the job finishes, or once `wait` seconds have passed
+    job = await upload_jobs.wait(job_id, timeout=wait)
+    if job is None:
+        raise HTTPException(
+            status_code=404, detail="The job does not exist, or its result expired."
+        )
+    return job
+
+
+@tracks_upload_router.get("/upload-track/jobs-stats")
+async def get_upload_job_stats() -> dict[str, int]:
+    return upload_jobs.stats()
+
+
+@tracks_upload_router.post("/upload-tracks")
+async def upload_audio_files(
+    files: list[UploadFile],
+    top_n_genres: Annotated[int, Query(le=NUMBER_OF_GENRES)] = 5,
+    top_n_similar: Annotated[int, Query(ge=0)] = 10,
+) -> list[UploadedTrackResult]:
+    if len(files) > MAX_UPLOAD_BATCH_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_UPLOAD_BATCH_FILES} files can be uploaded at once.",
+        )
+
+    mp3_files = [file for file in files if file.content_type == "audio/mpeg"]
+    results = iter(
+        await track_operations.clf_and_most_similar_tracks_batch(
+            mp3_files, top_n_genres, top_n_similar
+        )
+    )
+
+    return [
+        next(results)
+        if file.content_type == "audio/mpeg"
+        else UploadedTrackResult(
+            file_name=file.filename,
+            error="Only audio/mpeg (MP3) files are allowed.",
+        )
+        for file in files
+    ]
@@ -0,0 +1,217 @@
+import hashlib
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any
+
+import joblib
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+from src.service.numpy_mlp import NumpyMLP
+from src.utils import constants
+from src.utils.feature_extraction import generate_model_ordered_columns
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+SCALER_PATH = os.getenv("SCALER_PATH", constants.SCALER_SERAZLIZATION_PATH)
+CLASSIFIER_RUNTIME = os.getenv("CLASSIFIER_RUNTIME", constants.CLASSIFIER_RUNTIME)
+MODEL_PATH = (
+    os.getenv("NUMPY_MODEL_PATH", constants.NUMPY_MODEL_SERIALIZATION_PATH)
+    if CLASSIFIER_RUNTIME == "numpy"
+    else os.getenv("MODEL_PATH", constants.MODEL_SERIAZLIATION_PATH)
+)
+
+
+@dataclass(frozen=True)
+class ArtifactBundle:
+    """A scaler and a model that were trained together, along with the feature layout they expect."""
+
+    version: str
+    scaler: Any
+    model: Any
+    columns: pd.MultiIndex
+
+
+def load_keras_model(model_path: str) -> Any:
+    # TensorFlow is imported here so that importing the registry stays cheap
+    import tensorflow as tf
+
+    return tf.keras.models.load_model(model_path)
+
+
+def load_model(model_path: str) -> Any:
+    """
+    Load a model, exported for the NumPy runtime if the path is an .npz file,
+    or serialized by Keras otherwise.
+
+    Args:
+        model_path (str): The path of the model.
+
+    Returns:
+        Any: The model. Both runtimes expose `predict(x, verbose=0)`.
+    """
+    if model_path.endswith(".npz"):
+        return NumpyMLP.load(model_path)
+    return load_keras_model(model_path)
+
+
+def artifacts_version(*paths: str) -> str:
+    """
+    Compute a version identifier from the contents of the given artifact files.
+
+    Args:
+        *paths (str): The paths of the artifact files.
+
+    Returns:
+        str: A short hex digest that changes whenever any of the files change.
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def load_bundle(
+    scaler_path: str = SCALER_PATH,
+    model_path: str = MODEL_PATH,
+    version: str | None = None,
+) -> ArtifactBundle:
+    """
+    Load a scaler and a model from disk and warm them up.
+
+    Args:
+        scaler_path (str): The path of the serialized scaler.
+        model_path (str): The path of the serialized model.
+        version (str | None): The version of the bundle. Derived from the file contents if None.
+
+    Returns:
+        ArtifactBundle: The loaded, warmed up bundle.
+    """
+    bundle = ArtifactBundle(
+        version=version or artifacts_version(scaler_path, model_path),
+        scaler=joblib.load(scaler_path),
+        model=load_model(model_path),
+        columns=generate_model_ordered_columns(),
+    )
+    warmup(bundle)
+    return bundle
+
+
+def warmup(bundle: ArtifactBundle) -> None:
+    """
+    Run a dummy inference through the bundle, so that the first real request does not pay
+    for the tracing of the model's graph.
+
+    Args:
+        bundle (ArtifactBundle): The bundle to warm up.
+    """
+    x = np.zeros((1, len(bundle.columns)), dtype=np.float32)
+    bundle.model.predict(bundle.scaler.transform(x), verbose=0)
+
+
+class ArtifactRegistry:
+    """
+    Holds the scaler and the model used for serving.
+
+    Both artifacts are kept in a single immutable bundle, so replacing them is one reference
+    assignment and a request that takes `current` once always uses a matching scaler/model pair.
+
+    The registry lives in one process: a reload only affects the worker it runs in.
+    """
+
+    def __init__(self, scaler_path: str = SCALER_PATH, model_path: str = MODEL_PATH):
+        self.scaler_path = scaler_path
+        self.model_path = model_path
+        self._bundle: ArtifactBundle | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        """Whether a warmed up bundle is available."""
+        return self._bundle is not None
+
+    @property
+    def current(self) -> ArtifactBundle:
+        """The bundle in use. It is loaded the first time it is needed, if `initialize` was not called."""
+        bundle = self._bundle
+        if bundle is None:
+            bundle = self.initialize()
+        return bundle
+
+    def initialize(self) -> ArtifactBundle:
+        """
+        Load and warm up the configured artifacts, unless that was already done.
+
+        Returns:
+            ArtifactBundle: The bundle in use.
+        """
+        with self._lock:
+            if self._bundle is None:
+                self._bundle = load_bundle(self.scaler_path, self.model_path)
+                logger.info("Loaded artifacts version %s", self._bundle.version)
+            return self._bundle
+
+    def reload(
+        self,
+        scaler_path: str | None = None,
+        model_path: str | None = None,
+        version: str | None = None,
+    ) -> ArtifactBundle:
+        """
+        Load a new version of the artifacts and swap it in once it is warmed up.
+
+        Requests that already took the previous bundle keep using it until they finish.
+
+        Args:
+            scaler_path (str | None): The path of the new scaler. Defaults to the configured path.
+            model_path (str | None): The path of the new model. Defaults to the configured path.
+            version (str | None): The version of the new bundle. Derived from the file contents if None.
+
+        Returns:
+            ArtifactBundle: The bundle that is now in use.
+        """
+        scaler_path = scaler_path or self.scaler_path
+        model_path = model_path or self.model_path
+
+        # Loading happens outside the lock, the old bundle keeps serving meanwhile
+        bundle = load_bundle(scaler_path, model_path, version)
+        return self.swap(bundle, scaler_path, model_path)
+
+    def swap(
+        self,
+        bundle: ArtifactBundle,
+        scaler_path: str | None = None,
+        model_path: str | None = None,
+    ) -> ArtifactBundle:
+        """
+        Atomically replace the bundle in use.
+
+        Args:
+            bundle (ArtifactBundle): The new, already warmed up bundle.
+            scaler_path (str | None): The path the new scaler was loaded from, if any.
+            model_path (str | None): The path the new model was loaded from, if any.
+
+        Returns:
+            ArtifactBundle: The bundle that is now in use.
+        """
+        with self._lock:
+            previous = self._bundle
+            self._bundle = bundle
+            self.scaler_path = scaler_path or self.scaler_path
+            self.model_path = model_path or self.model_path
+
+        logger.info(
+            "Swapped artifacts version %s for %s",
+            previous.version if previous else None,
+            bundle.version,
+        )
+        return bundle
+
+
+artifact_registry = ArtifactRegistry()
@@ -0,0 +1,196 @@
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+
+import librosa
+import numpy as np
+import soundfile as sf
+import soxr
+from dotenv import load_dotenv
+from fastapi import UploadFile
+
+from src.models.exceptions.exceptions import AudioFileTooLarge
+from src.utils import constants
+
+load_dotenv()
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", constants.MAX_UPLOAD_BYTES))
+MAX_AUDIO_DURATION_SECONDS = float(
+    os.getenv("MAX_AUDIO_DURATION_SECONDS", constants.MAX_AUDIO_DURATION_SECONDS)
+)
+ANALYSIS_WINDOW_SECONDS = float(
+    os.getenv("ANALYSIS_WINDOW_SECONDS", constants.ANALYSIS_WINDOW_SECONDS)
+)
+ANALYSIS_SAMPLE_RATE = int(
+    os.getenv("ANALYSIS_SAMPLE_RATE", constants.ANALYSIS_SAMPLE_RATE)
+)
+
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+DECODE_BLOCK_FRAMES = 64 * 1024
+
+
+@dataclass(frozen=True)
+class StagedUpload:
+    path: str
+    # Hex SHA-256 digest of the contents of the file
+    content_hash: str
+    size: int
+
+
+async def stage_upload(
+    file: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES
+) -> StagedUpload:
+    """
+    Copy an upload, chunk by chunk, to a temporary file that the extraction workers can read,
+    hashing its contents on the way.
+
+    The caller is responsible for deleting the file.
+
+    Args:
+        file (UploadFile): The uploaded file.
+        max_bytes (int): The maximum accepted size of the file.
+
+    Returns:
+        StagedUpload: The path of the temporary file, along with the hash and size of its contents.
+
+    Raises:
+        AudioFileTooLarge: If the file is larger than `max_bytes`.
+    """
+    suffix = os.path.splitext(file.filename or "")[1]
+    size = 0
+    digest = hashlib.sha256()
+
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as staged:
+        try:
+            while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise AudioFileTooLarge(
+                        f"The uploaded file is larger than {max_bytes} bytes."
+                    )
+                digest.update(chunk)
+                staged.write(chunk)
+        except BaseException:
+            staged.close()
+            os.remove(staged.name)
+            raise
+
+    return StagedUpload(path=staged.name, content_hash=digest.hexdigest(), size=size)
+
+
+def analysis_window(
+    total_frames: int, sample_rate: int, window_seconds: float
+) -> tuple[int, int]:
+    """
+    Get the frames to analyse: a window of `window_seconds` in the middle of the track,
+    or the whole track if it is shorter or the window is disabled.
+
+    Returns:
+        tuple[int, int]: The first frame and the number of frames.
+    """
+    window_frames = int(window_seconds * sample_rate)
+    if window_frames <= 0 or window_frames >= total_frames:
+        return 0, total_frames
+    return (total_frames - window_frames) // 2, window_frames
+
+
+def decode_audio(
+    path: str,
+    target_sample_rate: int = ANALYSIS_SAMPLE_RATE,
+    window_seconds: float = ANALYSIS_WINDOW_SECONDS,
+    max_duration_seconds: float = MAX_AUDIO_DURATION_SECONDS,
+) -> tuple[np.ndarray, int]:
+    """
+    Decode an audio file into a mono float32 signal, block by block.
+
+    The duration is checked before anything is decoded. Every block is downmixed and
+    resampled as it is read, so at no point does the whole multichannel signal sit in memory.
+
+    Args:
+        path (str): The path of the audio file.
+        target_sample_rate (int): The sample rate of the returned signal. 0 keeps the rate of the file.
+        window_seconds (float): The length of the analysed window, centered in the track.
+            0 analyses the whole track.
+        max_duration_seconds (float): The maximum accepted duration of the track.
+
+    Returns:
+        tuple[np.ndarray, int]: The signal and its sample rate.
+
+    Raises:
+        AudioFileTooLarge: If the track is longer than `max_duration_seconds`.
+    """
+    try:
+        audio_file = sf.SoundFile(path)
+    except sf.LibsndfileError:
+        # Formats libsndfile does not know are decoded by audioread, through librosa
+        return _decode_audio_fallback(
+            path, target_sample_rate, window_seconds, max_duration_seconds
+        )
+
+    with audio_file:
+        sample_rate = audio_file.samplerate
+        _check_duration(audio_file.frames / sample_rate, max_duration_seconds)
+
+        start, frames = analysis_window(audio_file.frames, sample_rate, window_seconds)
+        audio_file.seek(start)
+        if start + frames >= audio_file.frames:
+            # The frame count of compressed formats is only an estimate, so the
+            # stream is read until the decoder runs out of data
+            frames = -1
+
+        resampler = (
+            soxr.ResampleStream(sample_rate, target_sample_rate, 1, dtype="float32")
+            if target_sample_rate and target_sample_rate != sample_rate
+            else None
+        )
+
+        blocks = []
+        while frames != 0:
+            block_frames = (
+                DECODE_BLOCK_FRAMES if frames < 0 else min(frames, DECODE_BLOCK_FRAMES)
+            )
+            block = audio_file.read(block_frames, dtype="float32", always_2d=True)
+            if len(block) == 0:
+                break
+            if frames > 0:
+                frames -= len(block)
+
+            mono = block.mean(axis=1, dtype=np.float32)
+            blocks.append(resampler.resample_chunk(mono) if resampler else mono)
+
+        if resampler:
+            blocks.append(resampler.resample_chunk(np.empty(0, np.float32), last=True))
+            sample_rate = target_sample_rate
+
+    signal = np.concatenate(blocks) if blocks else np.empty(0, np.float32)
+    return signal, sample_rate
+
+
+def _decode_audio_fallback(
+    path: str,
+    target_sample_rate: int,
+    window_seconds: float,
+    max_duration_seconds: float,
+) -> tuple[np.ndarray, int]:
+    duration = librosa.get_duration(path=path)
+    _check_duration(duration, max_duration_seconds)
+
+    offset, window = 0.0, None
+    if 0 < window_seconds < duration:
+        offset, window = (duration - window_seconds) / 2, window_seconds
+
+    signal, sample_rate = librosa.load(
+        path,
+        sr=target_sample_rate or None,
+        mono=True,
+        offset=offset,
+        duration=window,
+    )
+    return signal, int(sample_rate)
+
+
+def _check_duration(duration: float, max_duration_seconds: float) -> None:
+    if max_duration_seconds > 0 and duration > max_duration_seconds:
+        raise AudioFileTooLarge(
+            f"The uploaded track is longer than {max_duration_seconds:.0f} seconds."
+        )
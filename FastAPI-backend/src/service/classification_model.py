@@ -1,38 +1,75 @@
+import asyncio
+
 import pandas as pd
-import tensorflow as tf
 
+from src.service.artifact_registry import ArtifactBundle, artifact_registry
+from src.service.inference_engine import InferenceEngine
 from src.utils import constants
 from src.utils.feature_extraction import check_feature_ordering
 
+# The model is loaded once per process and shared by all the requests
+inference_engine = InferenceEngine(model_provider=lambda: artifact_registry.current.model)
+
 
-def classify_track(track_x: pd.DataFrame) -> pd.DataFrame:
+def classify_track(
+    track_x: pd.DataFrame, bundle: ArtifactBundle | None = None
+) -> pd.DataFrame:
     """
     Classify a track based on its features using a pre-trained neural network model.
 
     Args:
         track_x (pd.DataFrame): A DataFrame containing the features of the track to be classified.
+        bundle (ArtifactBundle | None): The artifacts to use. Defaults to the ones currently registered.
 
     Returns:
         pd.DataFrame: A DataFrame containing the classification results for the input track.
             The columns represent class labels, and the values are the corresponding probabilities.
     """
-    if not check_feature_ordering(track_x):
-        raise ValueError(
-            """The ordering of the features of the passed dataframe do not match 
-            the ordering of the features on which the model was trained."""
-        )
+    _validate_feature_ordering(track_x)
+
+    return pd.DataFrame(
+        inference_engine.predict(
+            track_x.values, model=bundle.model if bundle else None
+        ),
+        columns=constants.CLASS_NAMES_MODEL_ORDER,
+        index=track_x.index,
+    )
+
+
+async def classify_track_async(
+    track_x: pd.DataFrame, bundle: ArtifactBundle | None = None
+) -> pd.DataFrame:
+    """
+    Classify a track like `classify_track`, but batch the prediction together with
+    the ones of other concurrent requests.
 
-    # Loading the model
-    mlp_clf = tf.keras.models.load_model(constants.MODEL_SERIAZLIATION_PATH)
+    Args:
+        track_x (pd.DataFrame): A DataFrame containing the features of the track to be classified.
+        bundle (ArtifactBundle | None): The artifacts to use. Defaults to the ones currently registered.
+
+    Returns:
+        pd.DataFrame: A DataFrame containing the classification results for the input track.
+            The columns represent class labels, and the values are the corresponding probabilities.
+    """
+    _validate_feature_ordering(track_x)
 
-    # Making the prediction
-    track_y = pd.DataFrame(
-        mlp_clf.predict(track_x.values, verbose=0),
+    model = bundle.model if bundle else None
+    predictions = await asyncio.gather(
+        *(inference_engine.submit(row, model=model) for row in track_x.values)
+    )
+    return pd.DataFrame(
+        predictions,
         columns=constants.CLASS_NAMES_MODEL_ORDER,
         index=track_x.index,
     )
 
-    return track_y
+
+def _validate_feature_ordering(track_x: pd.DataFrame) -> None:
+    if not check_feature_ordering(track_x):
+        raise ValueError(
+            """The ordering of the features of the passed dataframe do not match
+            the ordering of the features on which the model was trained."""
+        )
 
 
 def get_top_n_genres_present(track_y: pd.DataFrame, top_n: int = 5) -> dict[str, float]:
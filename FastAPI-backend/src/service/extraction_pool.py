@@ -0,0 +1,71 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+# 0 means one worker per core
+EXTRACTION_POOL_WORKERS = int(os.getenv("EXTRACTION_POOL_WORKERS", 0)) or os.cpu_count() or 1
+
+
+def _initialize_worker() -> None:
+    """
+    Import librosa and run it once on a short signal, so that its lazy imports, numba
+    compilation and filter caches are paid for when the worker starts, not by the first upload.
+    """
+    from src.service.feature_extraction import extract_audio_features_raw
+
+    sample_rate = 22050
+    signal = np.random.default_rng(0).standard_normal(sample_rate).astype(np.float32)
+    extract_audio_features_raw(signal, sample_rate)
+
+
+class ExtractionPool:
+    """A process pool that runs the CPU bound audio feature extraction off the event loop."""
+
+    def __init__(self, max_workers: int = EXTRACTION_POOL_WORKERS):
+        self.max_workers = max_workers
+        self._executor: ProcessPoolExecutor | None = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                # Forking a process that already runs TensorFlow threads is not safe
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_initialize_worker,
+            )
+        return self._executor
+
+    def start(self) -> None:
+        # Submitting no-op tasks makes the pool spawn (and warm up) its workers right away
+        for _ in range(self.max_workers):
+            self.executor.submit(int)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a function in one of the pool's workers.
+
+        Args:
+            fn (Callable[..., Any]): A picklable, module level function.
+            *args (Any): The arguments of the function. They have to be picklable.
+
+        Returns:
+            Any: The value returned by the function.
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, fn, *args
+        )
+
+
+extraction_pool = ExtractionPool()
@@ -0,0 +1,215 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+from dotenv import load_dotenv
+
+from src.service import audio_decoding
+from src.utils import constants
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+FEATURE_CACHE_DIR = os.getenv("FEATURE_CACHE_DIR", constants.FEATURE_CACHE_DIR)
+# 0 disables the cache
+FEATURE_CACHE_MAX_BYTES = int(
+    os.getenv("FEATURE_CACHE_MAX_BYTES", constants.FEATURE_CACHE_MAX_BYTES)
+)
+
+
+@dataclass(frozen=True)
+class CachedFeatures:
+    # The scaled feature vector, in the order on which the model was trained
+    vector: np.ndarray
+    # The genre probabilities, in `constants.CLASS_NAMES_MODEL_ORDER`
+    genre_distribution: np.ndarray | None = None
+
+
+def extraction_fingerprint() -> str:
+    """
+    Describe everything besides the audio and the artifacts that the features depend on.
+
+    Returns:
+        str: A string that changes whenever the extraction code or the decoding settings change.
+    """
+    return "|".join(
+        map(
+            str,
+            (
+                constants.FEATURE_EXTRACTION_VERSION,
+                audio_decoding.ANALYSIS_WINDOW_SECONDS,
+                audio_decoding.ANALYSIS_SAMPLE_RATE,
+            ),
+        )
+    )
+
+
+class FeatureCache:
+    """
+    An on-disk cache of extracted features, keyed by the contents of the audio file.
+
+    Every entry is a small .npz file; reading an entry bumps its modification time, and
+    the least recently used entries are deleted once the cache grows over `max_bytes`.
+    Since entries are plain files written atomically, workers on the same host can share it.
+    """
+
+    def __init__(
+        self, directory: str = FEATURE_CACHE_DIR, max_bytes: int = FEATURE_CACHE_MAX_BYTES
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size_bytes: int | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def key(content_hash: str, artifacts_version: str) -> str:
+        """
+        Build the key of an audio file's features.
+
+        Args:
+            content_hash (str): The hash of the contents of the audio file.
+            artifacts_version (str): The version of the scaler and the model used.
+
+        Returns:
+            str: The key of the entry.
+        """
+        return hashlib.sha256(
+            "|".join(
+                (content_hash, extraction_fingerprint(), artifacts_version)
+            ).encode()
+        ).hexdigest()
+
+    def get(self, key: str) -> CachedFeatures | None:
+        """
+        Retrieve an entry, if it is present.
+
+        Args:
+            key (str): The key of the entry.
+
+        Returns:
+            CachedFeatures | None: The cached features, or None on a miss.
+        """
+        if not self.enabled:
+            return None
+
+        path = self._path(key)
+        try:
+            with np.load(path) as entry:
+                cached = CachedFeatures(
+                    vector=entry["vector"],
+                    genre_distribution=entry["genre_distribution"]
+                    if "genre_distribution" in entry
+                    else None,
+                )
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            # Missing, or evicted/corrupted while reading
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return cached
+
+    def put(self, key: str, features: CachedFeatures) -> None:
+        """
+        Store an entry, evicting the least recently used ones if the cache is full.
+
+        Args:
+            key (str): The key of the entry.
+            features (CachedFeatures): The features to store.
+        """
+        if not self.enabled:
+            return
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        arrays = dict(vector=np.asarray(features.vector, dtype=np.float32))
+        if features.genre_distribution is not None:
+            arrays["genre_distribution"] = np.asarray(
+                features.genre_distribution, dtype=np.float32
+            )
+
+        # Written to a temporary file and renamed, so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **arrays)
+        replaced_size = os.path.getsize(path) if os.path.exists(path) else 0
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._size_bytes is None:
+                # The first scan of the directory already counts the new entry
+                self._current_size()
+            else:
+                self._size_bytes += os.path.getsize(path) - replaced_size
+
+            if self._current_size() > self.max_bytes:
+                self._evict()
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            hit_rate=self.hits / lookups if lookups else 0.0,
+            size_bytes=self._current_size() if self.enabled else 0,
+            max_bytes=self.max_bytes,
+        )
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.npz")
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".npz"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _current_size(self) -> int:
+        if self._size_bytes is None:
+            self._size_bytes = sum(size for _, size, _ in self._entries())
+        return self._size_bytes
+
+    def _evict(self) -> None:
+        # Other workers may have written entries too, so the directory is the source of truth
+        entries = sorted(self._entries())
+        size = sum(size for _, size, _ in entries)
+
+        # Evict down to 90% of the limit, so that eviction does not run on every write
+        target = int(self.max_bytes * 0.9)
+        for _, entry_size, path in entries:
+            if size <= target:
+                break
+            try:
+                os.remove(path)
+                size -= entry_size
+            except FileNotFoundError:
+                pass
+
+        self._size_bytes = size
+        logger.debug("Feature cache evicted down to %d bytes", size)
+
+
+feature_cache = FeatureCache()
@@ -1,73 +1,122 @@
-import io
+import logging
+import os
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Callable
 
-import joblib
 import librosa
 import numpy as np
 import pandas as pd
 from fastapi import UploadFile
 
-from src.utils import constants
-from src.utils.feature_extraction import feature_stats, generate_columns
-
-
-async def extract_features(file: UploadFile, scale: bool = True) -> pd.DataFrame:
-    contents = await file.read()
-    audio_data, sample_rate = librosa.load(io.BytesIO(contents), sr=None, mono=True)
-
-    (
-        chroma,
-        zcr,
-        rmse,
-        spectral_contrast,
-        spectral_rolloff,
-        mfcc,
-    ) = extract_audio_features_raw(audio_data, sample_rate)
-
-    features_df = raw_features_to_df(
-        file.filename or "Unknown",
-        chroma,
-        zcr,
-        rmse,
-        spectral_contrast,
-        spectral_rolloff,
-        mfcc,
-    )
+from src.service.artifact_registry import ArtifactBundle, artifact_registry
+from src.service.audio_decoding import StagedUpload, decode_audio, stage_upload
+from src.service.extraction_pool import extraction_pool
+from src.utils.feature_extraction import (
+    feature_vector,
+    feature_vector_to_df,
+    generate_columns,
+)
+
+logger = logging.getLogger(__name__)
 
-    if scale:
-        standard_scaler = joblib.load(constants.SCALER_SERAZLIZATION_PATH)
 
-        # The ordeding of the featues on which the scaler was fit
-        features_ordered = features_df[constants.SCALER_FEATURES_ORDER]
+async def extract_features(
+    file: UploadFile, scale: bool = True, bundle: ArtifactBundle | None = None
+) -> pd.DataFrame:
+    # The upload is copied chunk by chunk, the workers decode it from disk
+    staged = await stage_upload(file)
+    try:
+        return await extract_staged_features(
+            staged, file.filename or "Unknown", scale=scale, bundle=bundle
+        )
+    finally:
+        os.remove(staged.path)
+
+
+async def extract_staged_features(
+    staged: StagedUpload,
+    track_name: str,
+    scale: bool = True,
+    bundle: ArtifactBundle | None = None,
+) -> pd.DataFrame:
+    # Decoding and the spectral analysis are CPU bound, they would block the event loop
+    vector = await extraction_pool.run(extract_feature_vector, staged.path)
 
+    bundle = bundle or artifact_registry.current
+
+    # The ordeding of the featues on which the scaler was fit
+    features_ordered = feature_vector_to_df(vector, track_name)
+
+    if scale:
         scaled_df = pd.DataFrame(
-            standard_scaler.transform(features_ordered),
+            bundle.scaler.transform(features_ordered.values),
             index=features_ordered.index,
             columns=features_ordered.columns,
         )
         return scaled_df
 
-    return features_df[constants.SCALER_FEATURES_ORDER]
+    return features_ordered
 
 
-def extract_audio_features_raw(
-    audio_data: np.ndarray, sample_rate: float
-) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
-    chroma = extract_chroma_features(audio_data, sample_rate)
-    zcr = librosa.feature.zero_crossing_rate(
-        audio_data, frame_length=2048, hop_length=512
-    )
-    stft = np.abs(librosa.stft(audio_data, n_fft=2048, hop_length=512))
-    rmse = librosa.feature.rms(S=stft)
-    spectral_contrast = librosa.feature.spectral_contrast(S=stft, n_bands=6)
-    spectral_rolloff = librosa.feature.spectral_rolloff(S=stft)
-    mel = librosa.feature.melspectrogram(sr=sample_rate, S=stft**2)
-    mfcc = librosa.feature.mfcc(S=librosa.power_to_db(mel), n_mfcc=20)
+def extract_feature_vector(path: str) -> np.ndarray:
+    """
+    Decode an audio file and compute its feature vector.
 
-    return chroma, zcr, rmse, spectral_contrast, spectral_rolloff, mfcc
+    This runs in the workers of the extraction pool, so it only takes and returns
+    compact, picklable values.
 
+    Args:
+        path (str): The path of the audio file.
 
-def extract_chroma_features(audio_data: np.ndarray, sample_rate: float) -> np.ndarray:
-    cqt = np.abs(
+    Returns:
+        np.ndarray: A float32 vector of the unscaled features, in the order on which the scaler was fit.
+
+    Raises:
+        AudioFileTooLarge: If the track is longer than the configured maximum duration.
+    """
+    # The graph decodes the signal itself, so it is released once the STFT and the CQT are done
+    descriptors, _ = compute_feature_graph_from_loader(lambda: decode_audio(path))
+
+    return feature_vector(descriptors)
+
+
+@dataclass(frozen=True)
+class FeatureNode:
+    """
+    A step of the spectral analysis.
+
+    `compute` is called with the sample rate followed by the values of `inputs`.
+    """
+
+    name: str
+    inputs: tuple[str, ...]
+    compute: Callable[..., np.ndarray]
+
+
+@dataclass
+class StageReport:
+    name: str
+    seconds: float
+    output_bytes: int
+    # Bytes held by the intermediates and outputs that are still alive after the stage
+    live_bytes: int
+    # Peak of the memory allocated while the stage ran, only measured when tracemalloc is tracing
+    peak_bytes: int | None = None
+
+
+@dataclass
+class FeatureGraphReport:
+    stages: list[StageReport] = field(default_factory=list)
+
+    @property
+    def peak_live_bytes(self) -> int:
+        return max((stage.live_bytes for stage in self.stages), default=0)
+
+
+def _cqt_magnitude(sample_rate: float, audio_data: np.ndarray) -> np.ndarray:
+    return np.abs(
         librosa.cqt(
             audio_data,
             sr=sample_rate,
@@ -76,9 +125,181 @@ def extract_chroma_features(audio_data: np.ndarray, sample_rate: float) -> np.nd
             n_bins=7 * 12,
             tuning=None,
         )
+    ).astype(np.float32, copy=False)
+
+
+def _stft_magnitude(sample_rate: float, audio_data: np.ndarray) -> np.ndarray:
+    return np.abs(librosa.stft(audio_data, n_fft=2048, hop_length=512)).astype(
+        np.float32, copy=False
     )
 
-    return librosa.feature.chroma_cqt(C=cqt, n_chroma=12, n_octaves=7)
+
+# The nodes are listed in topological order; "audio" is the input of the graph.
+# spectral_contrast and spectral_rolloff keep librosa's default sample rate,
+# which is what the scaler and the model were fit on.
+FEATURE_GRAPH: tuple[FeatureNode, ...] = (
+    FeatureNode("cqt", ("audio",), _cqt_magnitude),
+    FeatureNode(
+        "chroma_cqt",
+        ("cqt",),
+        lambda sr, cqt: librosa.feature.chroma_cqt(C=cqt, n_chroma=12, n_octaves=7),
+    ),
+    FeatureNode(
+        "zcr",
+        ("audio",),
+        lambda sr, audio: librosa.feature.zero_crossing_rate(
+            audio, frame_length=2048, hop_length=512
+        ),
+    ),
+    FeatureNode("stft", ("audio",), _stft_magnitude),
+    FeatureNode("rmse", ("stft",), lambda sr, stft: librosa.feature.rms(S=stft)),
+    FeatureNode(
+        "spectral_contrast",
+        ("stft",),
+        lambda sr, stft: librosa.feature.spectral_contrast(S=stft, n_bands=6),
+    ),
+    FeatureNode(
+        "spectral_rolloff",
+        ("stft",),
+        lambda sr, stft: librosa.feature.spectral_rolloff(S=stft),
+    ),
+    FeatureNode("power", ("stft",), lambda sr, stft: np.square(stft)),
+    FeatureNode(
+        "mel",
+        ("power",),
+        lambda sr, power: librosa.feature.melspectrogram(sr=sr, S=power),
+    ),
+    FeatureNode("mel_db", ("mel",), lambda sr, mel: librosa.power_to_db(mel)),
+    FeatureNode(
+        "mfcc", ("mel_db",), lambda sr, mel_db: librosa.feature.mfcc(S=mel_db, n_mfcc=20)
+    ),
+)
+
+DESCRIPTORS = (
+    "chroma_cqt",
+    "zcr",
+    "rmse",
+    "spectral_contrast",
+    "spectral_rolloff",
+    "mfcc",
+)
+
+
+def compute_feature_graph(
+    audio_data: np.ndarray,
+    sample_rate: float,
+    outputs: tuple[str, ...] = DESCRIPTORS,
+    graph: tuple[FeatureNode, ...] = FEATURE_GRAPH,
+) -> tuple[dict[str, np.ndarray], FeatureGraphReport]:
+    """
+    Compute the requested descriptors of a signal, see `compute_feature_graph_from_loader`.
+
+    The caller keeps its reference to the signal, so the signal stays alive during the whole
+    computation, and is not counted in the `live_bytes` of the report.
+
+    Args:
+        audio_data (np.ndarray): The mono signal.
+        sample_rate (float): The sample rate of the signal.
+        outputs (tuple[str, ...]): The names of the nodes to return. Defaults to all the descriptors.
+        graph (tuple[FeatureNode, ...]): The nodes of the graph, in topological order.
+
+    Returns:
+        tuple[dict[str, np.ndarray], FeatureGraphReport]: The requested values by node name,
+            along with the time and memory spent in each stage.
+    """
+    return compute_feature_graph_from_loader(
+        lambda: (audio_data, sample_rate), outputs=outputs, graph=graph
+    )
+
+
+def compute_feature_graph_from_loader(
+    load_audio: Callable[[], tuple[np.ndarray, float]],
+    outputs: tuple[str, ...] = DESCRIPTORS,
+    graph: tuple[FeatureNode, ...] = FEATURE_GRAPH,
+) -> tuple[dict[str, np.ndarray], FeatureGraphReport]:
+    """
+    Compute the requested descriptors of a signal, computing every shared intermediate
+    representation exactly once and releasing it as soon as its last consumer is done.
+
+    The graph loads the signal itself and holds the only reference to it, so the signal is
+    released too once its last consumer is done.
+
+    Args:
+        load_audio (Callable[[], tuple[np.ndarray, float]]): Returns the mono signal and its sample rate.
+        outputs (tuple[str, ...]): The names of the nodes to return. Defaults to all the descriptors.
+        graph (tuple[FeatureNode, ...]): The nodes of the graph, in topological order.
+
+    Returns:
+        tuple[dict[str, np.ndarray], FeatureGraphReport]: The requested values by node name,
+            along with the time and memory spent in each stage.
+    """
+    nodes = {node.name: node for node in graph}
+
+    # Only the nodes the outputs depend on are computed
+    needed: set[str] = set()
+    pending = list(outputs)
+    while pending:
+        name = pending.pop()
+        if name in needed or name not in nodes:
+            continue
+        needed.add(name)
+        pending.extend(nodes[name].inputs)
+
+    remaining_consumers: dict[str, int] = {}
+    for name in needed:
+        for input_name in nodes[name].inputs:
+            remaining_consumers[input_name] = remaining_consumers.get(input_name, 0) + 1
+
+    audio_data, sample_rate = load_audio()
+    values: dict[str, np.ndarray] = {"audio": audio_data.astype(np.float32, copy=False)}
+    del audio_data
+    report = FeatureGraphReport()
+
+    for node in graph:
+        if node.name not in needed:
+            continue
+
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+
+        values[node.name] = node.compute(
+            sample_rate, *(values[input_name] for input_name in node.inputs)
+        )
+
+        for input_name in node.inputs:
+            remaining_consumers[input_name] -= 1
+            if remaining_consumers[input_name] == 0 and input_name not in outputs:
+                del values[input_name]
+
+        report.stages.append(
+            StageReport(
+                name=node.name,
+                seconds=time.perf_counter() - start,
+                output_bytes=values[node.name].nbytes,
+                live_bytes=sum(value.nbytes for value in values.values()),
+                peak_bytes=tracemalloc.get_traced_memory()[1]
+                if tracemalloc.is_tracing()
+                else None,
+            )
+        )
+        logger.debug("Feature graph stage %s", report.stages[-1])
+
+    return {name: values[name] for name in outputs}, report
+
+
+def extract_audio_features_raw(
+    audio_data: np.ndarray, sample_rate: float
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    descriptors, _ = compute_feature_graph(audio_data, sample_rate)
+    return tuple(descriptors[name] for name in DESCRIPTORS)  # type: ignore
+
+
+def extract_chroma_features(audio_data: np.ndarray, sample_rate: float) -> np.ndarray:
+    descriptors, _ = compute_feature_graph(
+        audio_data, sample_rate, outputs=("chroma_cqt",)
+    )
+    return descriptors["chroma_cqt"]
 
 
 def raw_features_to_df(
@@ -90,20 +311,14 @@ def raw_features_to_df(
     spectral_rolloff: np.ndarray,
     mfcc: np.ndarray,
 ) -> pd.DataFrame:
-    features = pd.Series(
-        index=generate_columns(), dtype=np.float32, name=f"track_{track_name}"
+    vector = feature_vector(
+        dict(
+            chroma_cqt=chroma,
+            zcr=zcr,
+            rmse=rmse,
+            spectral_contrast=spectral_contrast,
+            spectral_rolloff=spectral_rolloff,
+            mfcc=mfcc,
+        )
     )
-
-    features = feature_stats(features=features, name="chroma_cqt", values=chroma)
-    features = feature_stats(features=features, name="zcr", values=zcr)
-    features = feature_stats(features=features, name="rmse", values=rmse)
-    features = feature_stats(
-        features=features, name="spectral_contrast", values=spectral_contrast
-    )  # noqa: E501
-    features = feature_stats(
-        features=features, name="spectral_rolloff", values=spectral_rolloff
-    )  # noqa: E501
-    features = feature_stats(features=features, name="mfcc", values=mfcc)
-
-    features_df = features.to_frame().T
-    return features_df
+    return feature_vector_to_df(vector, track_name)[generate_columns()]
@@ -0,0 +1,171 @@
+import asyncio
+import os
+from typing import Any, Callable
+
+import numpy as np
+from dotenv import load_dotenv
+
+from src.utils import constants
+
+load_dotenv()
+MAX_BATCH_SIZE = int(
+    os.getenv("INFERENCE_MAX_BATCH_SIZE", constants.INFERENCE_MAX_BATCH_SIZE)
+)
+MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", constants.INFERENCE_MAX_WAIT_MS))
+
+
+class InferenceEngine:
+    """
+    Holds a loaded classifier in memory and groups concurrent prediction requests
+    into batched `predict` calls.
+
+    Rows submitted with `submit` are queued; a background task takes the first
+    queued row, keeps collecting rows until either `max_batch_size` rows are
+    gathered or `max_wait_ms` have passed, and then runs a single `predict` per
+    model in the batch in a worker thread so the event loop is never blocked.
+    """
+
+    def __init__(
+        self,
+        model_provider: Callable[[], Any],
+        max_batch_size: int = MAX_BATCH_SIZE,
+        max_wait_ms: float = MAX_WAIT_MS,
+    ):
+        """
+        Args:
+            model_provider (Callable[[], Any]): Returns the model to use when a prediction does not
+                specify one. The model must expose `predict(x, verbose=0)`.
+            max_batch_size (int): The maximum number of rows in one `predict` call.
+            max_wait_ms (float): How long to wait for more rows after the first one arrives.
+        """
+        if max_batch_size < 1:
+            raise ValueError("`max_batch_size` has to be a positive integer")
+
+        self._model_provider = model_provider
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+
+    def predict(self, x: np.ndarray, model: Any = None) -> np.ndarray:
+        """
+        Run the model on a batch of rows synchronously.
+
+        Args:
+            x (np.ndarray): A 2D array of shape (n_rows, n_features).
+            model (Any): The model to run. Defaults to the one returned by the model provider.
+
+        Returns:
+            np.ndarray: A 2D array of shape (n_rows, n_classes) with the class probabilities.
+        """
+        model = model if model is not None else self._model_provider()
+        return np.asarray(model.predict(x, verbose=0))
+
+    async def submit(self, row: np.ndarray, model: Any = None) -> np.ndarray:
+        """
+        Queue a single row for prediction and wait for its result.
+
+        Args:
+            row (np.ndarray): A 1D array of features.
+            model (Any): The model to run. Defaults to the one returned by the model provider.
+                Rows are only batched together with rows for the same model.
+
+        Returns:
+            np.ndarray: A 1D array with the class probabilities of the row.
+        """
+        self._ensure_started()
+        assert self._queue is not None
+
+        model = model if model is not None else self._model_provider()
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        await self._queue.put((np.asarray(row, dtype=np.float32), model, future))
+        return await future
+
+    async def start(self) -> None:
+        self._ensure_started()
+
+    async def stop(self) -> None:
+        """Stop the worker, and cancel the predictions it did not deliver, so no caller hangs."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+
+        while self._queue is not None and not self._queue.empty():
+            _, _, future = self._queue.get_nowait()
+            future.cancel()
+        self._worker = None
+        self._queue = None
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        # The worker is bound to the loop it was started on (e.g. the TestClient
+        # runs every request on a fresh loop), so it is restarted when the loop changes.
+        if self._worker is None or self._worker.get_loop() is not loop or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def _collect_batch(
+        self, queue: asyncio.Queue
+    ) -> list[tuple[np.ndarray, Any, asyncio.Future]]:
+        batch = [await queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_wait_ms / 1000
+
+        try:
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout=timeout))
+                except asyncio.TimeoutError:
+                    break
+        except asyncio.CancelledError:
+            # Stopped while collecting: the rows taken off the queue are only held here
+            for _, _, future in batch:
+                future.cancel()
+            raise
+
+        return batch
+
+    async def _run(self) -> None:
+        queue = self._queue
+        assert queue is not None
+
+        while True:
+            batch = await self._collect_batch(queue)
+
+            # During an artifact swap, a batch can hold rows for the old and the new model
+            by_model: dict[int, list[tuple[np.ndarray, Any, asyncio.Future]]] = {}
+            for item in batch:
+                by_model.setdefault(id(item[1]), []).append(item)
+
+            try:
+                for items in by_model.values():
+                    await self._predict_items(items)
+            except asyncio.CancelledError:
+                # Stopped in the middle of the batch
+                for _, _, future in batch:
+                    future.cancel()
+                raise
+
+    async def _predict_items(
+        self, items: list[tuple[np.ndarray, Any, asyncio.Future]]
+    ) -> None:
+        rows = np.stack([row for row, _, _ in items])
+        model = items[0][1]
+
+        try:
+            predictions = await asyncio.to_thread(self.predict, rows, model)
+        except Exception as e:
+            for _, _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, future), prediction in zip(items, predictions):
+            if not future.done():
+                future.set_result(prediction)
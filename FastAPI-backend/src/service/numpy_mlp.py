@@ -0,0 +1,172 @@
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import numpy as np
+
+
+def _relu(x: np.ndarray) -> np.ndarray:
+    return np.maximum(x, 0, out=x)
+
+
+def _softmax(x: np.ndarray) -> np.ndarray:
+    x -= x.max(axis=1, keepdims=True)
+    np.exp(x, out=x)
+    x /= x.sum(axis=1, keepdims=True)
+    return x
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1 / (1 + np.exp(-x))
+
+
+ACTIVATIONS: dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "linear": lambda x: x,
+    "relu": _relu,
+    "softmax": _softmax,
+    "sigmoid": _sigmoid,
+    "tanh": np.tanh,
+}
+
+
+@dataclass(frozen=True)
+class DenseLayer:
+    kernel: np.ndarray
+    bias: np.ndarray
+    activation: str
+
+
+class NumpyMLP:
+    """
+    A forward pass of a dense network in plain NumPy.
+
+    It exposes the subset of the Keras model API the service uses, so it can be served in
+    place of the Keras model without importing TensorFlow.
+    """
+
+    def __init__(self, layers: list[DenseLayer]):
+        unknown = {layer.activation for layer in layers} - ACTIVATIONS.keys()
+        if unknown:
+            raise ValueError(f"Unsupported activations: {', '.join(sorted(unknown))}")
+        self.layers = layers
+
+    @classmethod
+    def load(cls, path: str) -> "NumpyMLP":
+        """
+        Load a network saved with `save`.
+
+        Args:
+            path (str): The path of the .npz file.
+
+        Returns:
+            NumpyMLP: The loaded network.
+        """
+        with np.load(path) as arrays:
+            activations = [str(a) for a in arrays["activations"]]
+            return cls(
+                [
+                    DenseLayer(
+                        kernel=arrays[f"kernel_{i}"],
+                        bias=arrays[f"bias_{i}"],
+                        activation=activation,
+                    )
+                    for i, activation in enumerate(activations)
+                ]
+            )
+
+    def save(self, path: str) -> None:
+        arrays = dict(activations=np.array([layer.activation for layer in self.layers]))
+        for i, layer in enumerate(self.layers):
+            arrays[f"kernel_{i}"] = layer.kernel
+            arrays[f"bias_{i}"] = layer.bias
+        np.savez(path, **arrays)
+
+    def predict(self, x: Any, verbose: int = 0, **kwargs: Any) -> np.ndarray:
+        """
+        Run the forward pass.
+
+        Args:
+            x (Any): The input rows, as an array-like of shape (n_samples, n_features).
+            verbose (int): Ignored, accepted for compatibility with the Keras API.
+
+        Returns:
+            np.ndarray: The outputs of the last layer, of shape (n_samples, n_outputs).
+        """
+        x = np.asarray(x, dtype=np.float32)
+        for layer in self.layers:
+            x = ACTIVATIONS[layer.activation](x @ layer.kernel + layer.bias)
+        return x
+
+
+def from_keras_model(model: Any) -> NumpyMLP:
+    """
+    Convert a sequential Keras model of Dense, Dropout and BatchNormalization layers.
+
+    Dropout is the identity at inference time and is dropped. Every BatchNormalization is an
+    elementwise affine transformation with its moving statistics, so it is folded into the
+    adjacent Dense layer: into the previous one if that layer has no activation, and into
+    the next one otherwise.
+
+    Args:
+        model (Any): The Keras model.
+
+    Returns:
+        NumpyMLP: The equivalent network.
+
+    Raises:
+        ValueError: If the model contains other layers, or ends with a BatchNormalization
+            that cannot be folded.
+    """
+    layers: list[DenseLayer] = []
+    # An affine transformation waiting to be folded into the next Dense layer
+    scale: np.ndarray | None = None
+    shift: np.ndarray | None = None
+
+    for layer in model.layers:
+        kind = type(layer).__name__
+
+        if kind in ("InputLayer", "Dropout"):
+            continue
+
+        if kind == "Dense":
+            kernel, bias = (w.astype(np.float64) for w in layer.get_weights())
+            if scale is not None:
+                bias = shift @ kernel + bias
+                kernel = scale[:, None] * kernel
+                scale, shift = None, None
+            layers.append(DenseLayer(kernel, bias, layer.activation.__name__))
+
+        elif kind == "BatchNormalization":
+            gamma, beta, mean, variance = (
+                w.astype(np.float64) for w in layer.get_weights()
+            )
+            bn_scale = gamma / np.sqrt(variance + layer.epsilon)
+            bn_shift = beta - mean * bn_scale
+
+            if scale is None and layers and layers[-1].activation == "linear":
+                previous = layers[-1]
+                layers[-1] = DenseLayer(
+                    previous.kernel * bn_scale,
+                    previous.bias * bn_scale + bn_shift,
+                    "linear",
+                )
+            elif scale is None:
+                scale, shift = bn_scale, bn_shift
+            else:
+                scale, shift = scale * bn_scale, shift * bn_scale + bn_shift
+
+        else:
+            raise ValueError(f"Unsupported layer {layer.name} of type {kind}")
+
+    if scale is not None:
+        raise ValueError("The model ends with a BatchNormalization layer")
+
+    return NumpyMLP(
+        [
+            DenseLayer(
+                layer.kernel.astype(np.float32),
+                layer.bias.astype(np.float32),
+                layer.activation,
+            )
+            for layer in layers
+        ]
+    )
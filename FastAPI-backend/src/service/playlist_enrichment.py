@@ -1,47 +1,192 @@
+import asyncio
+from typing import cast
+
 from src.models.models import Track
 import numpy as np
-from qdrant_client.http.models.models import ScoredPoint
+from qdrant_client import models
+from qdrant_client.http.models.models import Record, ScoredPoint
 
 from src.repository import tracks_repository
-from src.utils import model_creation
+from src.utils import constants, model_creation
 
 
-def enrich(track_ids: list[int]) -> list[Track]:
+async def enrich(
+    track_ids: list[int],
+    number_of_additions: int | None = None,
+    seed: int | None = None,
+    candidates_per_track: int = constants.ENRICHMENT_CANDIDATES_PER_TRACK,
+    diversity: float = constants.ENRICHMENT_DIVERSITY,
+    randomness: float = constants.ENRICHMENT_RANDOMNESS,
+) -> list[Track]:
     """
-    Enriches a playlist by finding and adding similar tracks for each given track ID.
+    Enriches a playlist by adding tracks that are similar to its tracks, but not to each other.
+
+    The candidates for all the tracks are fetched with one batched query, deduplicated and then
+    selected by maximal marginal relevance, in the metric of the collection. Every added track
+    follows the playlist track it is most similar to.
 
     Args:
         track_ids (list[int]): A list of track IDs for which to enrich the playlist.
+        number_of_additions (int | None): The number of tracks to add.
+            Defaults to `constants.ENRICHMENT_ADDITIONS_PER_TRACK` per track in the playlist.
+        seed (int | None): The seed of the random perturbation of the relevance scores.
+            The same seed and playlist always give the same result.
+        candidates_per_track (int): The number of similar tracks to consider per track in the playlist.
+        diversity (float): The weight, between 0 and 1, of the diversity of the additions against their relevance.
+        randomness (float): The scale of the random perturbation of the relevance scores, relative to
+            their standard deviation, so that it does not depend on the metric. 0 disables it.
 
     Returns:
         list[Track]: A list of Track objects representing the enriched playlist.
 
-    Note:
-        This is a demo function for playlist enrichment and will be modified
-        to include more meaningful playlist enrichment in the future.
+    Raises:
+        DatabaseError: If any of the tracks does not exist.
     """
 
-    enriched_playlist_points: list[ScoredPoint] = []
-    for track_id in track_ids:
-        most_similar_for_track = tracks_repository.get_most_similar_tracks(
-            track_id=track_id,
-            limit=6,
-            exact_search=False,
-            with_payload=True,
-            with_vectors=False,
+    if not track_ids:
+        return []
+
+    if number_of_additions is None:
+        number_of_additions = constants.ENRICHMENT_ADDITIONS_PER_TRACK * len(track_ids)
+
+    # The playlist tracks and the candidates for all of them are fetched concurrently,
+    # in two requests, along with the vectors used for the reranking. The payloads of the
+    # candidates are only fetched for the ones that get selected.
+    seed_tracks, candidates_per_seed, distance = await asyncio.gather(
+        tracks_repository.get_tracks_by_ids(track_ids, with_vectors=True),
+        tracks_repository.get_most_similar_tracks_batch_by_ids(
+            track_ids,
+            limit=candidates_per_track,
+            with_payload=False,
+            with_vectors=True,
+        ),
+        tracks_repository.get_distance(),
+    )
+
+    # The same track can be a candidate for several playlist tracks, or be in the playlist
+    playlist = set(track_ids)
+    candidates: dict[int | str, ScoredPoint] = {}
+    for candidates_for_seed in candidates_per_seed:
+        for candidate in candidates_for_seed:
+            if candidate.id not in playlist:
+                candidates.setdefault(candidate.id, candidate)
+    candidate_points = list(candidates.values())
+
+    if not candidate_points or number_of_additions == 0:
+        return [_to_track(record) for record in seed_tracks]
+
+    seed_vectors = np.array([record.vector for record in seed_tracks])
+    candidate_vectors = np.array([candidate.vector for candidate in candidate_points])
+
+    # A candidate is as relevant as it is similar to its closest playlist track
+    seed_similarity = similarities(candidate_vectors, seed_vectors, distance)
+    relevance = seed_similarity.max(axis=1)
+    if randomness > 0:
+        relevance = relevance + np.random.default_rng(seed).normal(
+            scale=randomness * (relevance.std() or 1), size=len(relevance)
         )
-        # The first result will be the same song as the query
-        query_point = most_similar_for_track.pop(0)
+
+    selected = select_diverse(
+        candidate_vectors, relevance, number_of_additions, diversity, distance
+    )
+
+    selected_tracks = await tracks_repository.get_tracks_by_ids(
+        [candidate_points[i].id for i in selected]  # type: ignore
+    )
+
+    # Every added track goes right after the playlist track it is closest to
+    closest_seed = seed_similarity.argmax(axis=1)
+    additions_per_seed: list[list[Record]] = [[] for _ in seed_tracks]
+    for i, track in zip(selected, selected_tracks):
+        additions_per_seed[closest_seed[i]].append(track)
+
+    enriched_playlist_points: list[Record] = []
+    for query_point, additions in zip(seed_tracks, additions_per_seed):
         # Append the track given in the query
         enriched_playlist_points.append(query_point)
-        # Choose the number of similar tracks to consider
-        num_tracks = np.random.randint(1, 6)
         # Append the new points similar to the one in the query
-        enriched_playlist_points += np.random.choice(
-            most_similar_for_track, num_tracks, replace=False  # type: ignore
-        ).tolist()
-
-    return [
-        Track(**model_creation.record_to_track(scored_point).dict())
-        for scored_point in enriched_playlist_points
-    ]
+        enriched_playlist_points += additions
+
+    return [_to_track(point) for point in enriched_playlist_points]
+
+
+def select_diverse(
+    vectors: np.ndarray,
+    relevance: np.ndarray,
+    k: int,
+    diversity: float,
+    distance: models.Distance = models.Distance.COSINE,
+) -> list[int]:
+    """
+    Greedily select items by maximal marginal relevance: every step picks the item with the
+    best trade-off between its relevance and its similarity to the items already selected.
+
+    Args:
+        vectors (np.ndarray): The vectors of the items, of shape (n_items, n_dimensions).
+        relevance (np.ndarray): The relevance of every item, in the units of `similarities`, of shape (n_items,).
+        k (int): The number of items to select.
+        diversity (float): The weight, between 0 and 1, of the diversity against the relevance.
+        distance (models.Distance): The metric the items are compared with. Default is cosine.
+
+    Returns:
+        list[int]: The indices of the selected items, in the order they were selected.
+    """
+
+    similarity = similarities(vectors, vectors, distance)
+    # The similarity of every item to the closest selected item. Before the first selection,
+    # it is the same for every item, so the most relevant one is selected first.
+    redundancy = np.zeros(len(vectors))
+    available = np.ones(len(vectors), dtype=bool)
+
+    selected: list[int] = []
+    for _ in range(min(k, len(vectors))):
+        scores = (1 - diversity) * relevance - diversity * redundancy
+        scores[~available] = -np.inf
+
+        best = int(np.argmax(scores))
+        if selected:
+            np.maximum(redundancy, similarity[best], out=redundancy)
+        else:
+            redundancy = similarity[best].copy()
+        selected.append(best)
+        available[best] = False
+
+    return selected
+
+
+def similarities(a: np.ndarray, b: np.ndarray, distance: models.Distance) -> np.ndarray:
+    """
+    Compare every vector of `a` with every vector of `b`, like the similarity searches of the collection.
+
+    Args:
+        a (np.ndarray): The vectors of shape (n_a, n_dimensions).
+        b (np.ndarray): The vectors of shape (n_b, n_dimensions).
+        distance (models.Distance): The metric of the collection.
+
+    Returns:
+        np.ndarray: The similarities, of shape (n_a, n_b), where higher is always more similar.
+            The distances of the Euclidean and Manhattan metrics are negated.
+    """
+    if distance == models.Distance.COSINE:
+        return _normalize(a) @ _normalize(b).T
+    if distance == models.Distance.DOT:
+        return a @ b.T
+    if distance == models.Distance.MANHATTAN:
+        return -np.abs(a[:, None, :] - b[None, :, :]).sum(axis=2)
+
+    squared_distances = (
+        np.einsum("ij,ij->i", a, a)[:, None]
+        - 2 * (a @ b.T)
+        + np.einsum("ij,ij->i", b, b)[None, :]
+    )
+    return -np.sqrt(np.maximum(squared_distances, 0))
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def _to_track(record: Record) -> Track:
+    # The points are all Records, which convert to Tracks without a score
+    return cast(Track, model_creation.record_to_response_track(record))
@@ -0,0 +1,222 @@
+import asyncio
+import copy
+import logging
+import os
+import pickle
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Protocol, TypeVar
+
+from dotenv import load_dotenv
+
+from src.utils import constants
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+RESULT_CACHE_MAX_ENTRIES = int(
+    os.getenv("RESULT_CACHE_MAX_ENTRIES", constants.RESULT_CACHE_MAX_ENTRIES)
+)
+RESULT_CACHE_TTL_SECONDS = float(
+    os.getenv("RESULT_CACHE_TTL_SECONDS", constants.RESULT_CACHE_TTL_SECONDS)
+)
+# Empty keeps the cache in process
+RESULT_CACHE_REDIS_URL = os.getenv("RESULT_CACHE_REDIS_URL", "")
+
+T = TypeVar("T")
+
+_MISSING = object()
+
+
+class CacheStore(Protocol):
+    async def get(self, key: str) -> Any:
+        """Return the value of the key, or `_MISSING` if it is not cached."""
+
+    async def set(self, key: str, value: Any) -> None:
+        ...
+
+    async def clear(self) -> None:
+        ...
+
+    def size(self) -> int | None:
+        ...
+
+
+class MemoryStore:
+    """
+    A bounded in-process store, evicting the least recently used entries and expired ones.
+
+    Values are copied in and out, so a caller that modifies a result does not modify the cache.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    async def get(self, key: str) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return _MISSING
+
+        self._entries.move_to_end(key)
+        return copy.deepcopy(value)
+
+    async def set(self, key: str, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, copy.deepcopy(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def clear(self) -> None:
+        self._entries.clear()
+
+    def size(self) -> int | None:
+        return len(self._entries)
+
+
+class RedisStore:
+    """
+    A store shared by all the workers, in Redis. Entries expire after the TTL and Redis evicts
+    the rest according to its `maxmemory-policy`.
+
+    Needs the optional `redis` package, unless a client is given.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        ttl_seconds: float,
+        prefix: str = "result-cache:",
+        client: Any = None,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+        if client is None:
+            # Imported here so that the package is only needed when the backend is configured
+            import redis.asyncio as redis
+
+            client = redis.from_url(url)
+        self._redis = client
+
+    async def get(self, key: str) -> Any:
+        value = await self._redis.get(self.prefix + key)
+        return _MISSING if value is None else pickle.loads(value)
+
+    async def set(self, key: str, value: Any) -> None:
+        await self._redis.set(
+            self.prefix + key, pickle.dumps(value), px=int(self.ttl_seconds * 1000)
+        )
+
+    async def clear(self) -> None:
+        async for key in self._redis.scan_iter(match=f"{self.prefix}*", count=1000):
+            await self._redis.unlink(key)
+
+    def size(self) -> int | None:
+        return None
+
+
+class ResultCache:
+    """
+    A read-through cache of query results.
+
+    Concurrent misses on the same key are coalesced: the first one runs the query, and the
+    others wait for its result. Failed queries are not cached. Every caller gets its own copy
+    of the value.
+
+    The in-process store is invalidated per worker: `invalidate` only reaches the other workers,
+    and other processes such as the ingestion, through the Redis store.
+    """
+
+    def __init__(self, store: CacheStore):
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        # Bumped on invalidation, so that queries started before are not cached
+        self._generation = 0
+        self._in_flight: dict[str, asyncio.Future] = {}
+
+    async def get_or_load(
+        self, key: tuple[Hashable, ...], loader: Callable[[], Awaitable[T]]
+    ) -> T:
+        """
+        Get the cached value of a key, or load and cache it.
+
+        Args:
+            key (tuple[Hashable, ...]): The key. Its `repr` has to identify it.
+            loader (Callable[[], Awaitable[T]]): Loads the value on a miss.
+
+        Returns:
+            T: The value.
+        """
+        cache_key = repr(key)
+
+        value = await self.store.get(cache_key)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+
+        in_flight = self._in_flight.get(cache_key)
+        if in_flight is not None:
+            self.coalesced += 1
+            # Shielded, so that a cancelled waiter does not cancel the query of the others
+            return copy.deepcopy(await asyncio.shield(in_flight))
+
+        self.misses += 1
+        task = asyncio.ensure_future(self._load(cache_key, loader, self._generation))
+        self._in_flight[cache_key] = task
+        task.add_done_callback(lambda _: self._forget(cache_key, task))
+        return await asyncio.shield(task)
+
+    async def invalidate(self) -> None:
+        """Drop every entry, e.g. after the catalog or the artifacts were updated."""
+        self._generation += 1
+        self._in_flight.clear()
+        await self.store.clear()
+        logger.info("Result cache invalidated")
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            coalesced=self.coalesced,
+            hit_rate=self.hits / lookups if lookups else 0.0,
+            size=self.store.size(),
+            evictions=getattr(self.store, "evictions", None),
+            generation=self._generation,
+        )
+
+    async def _load(
+        self, cache_key: str, loader: Callable[[], Awaitable[T]], generation: int
+    ) -> T:
+        value = await loader()
+        # Not stored if the cache was invalidated while loading
+        if generation == self._generation:
+            await self.store.set(cache_key, value)
+        return value
+
+    def _forget(self, cache_key: str, task: asyncio.Future) -> None:
+        if self._in_flight.get(cache_key) is task:
+            del self._in_flight[cache_key]
+
+
+def create_result_cache(
+    redis_url: str = RESULT_CACHE_REDIS_URL,
+    max_entries: int = RESULT_CACHE_MAX_ENTRIES,
+    ttl_seconds: float = RESULT_CACHE_TTL_SECONDS,
+) -> ResultCache:
+    if redis_url:
+        return ResultCache(RedisStore(redis_url, ttl_seconds))
+    return ResultCache(MemoryStore(max_entries, ttl_seconds))
+
+
+result_cache = create_result_cache()
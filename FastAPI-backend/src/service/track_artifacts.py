@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+import struct
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import soundfile as sf
+from dotenv import load_dotenv
+
+from src.service.audio_decoding import analysis_window, decode_audio
+from src.utils import constants
+
+load_dotenv()
+PREVIEW_SECONDS = float(os.getenv("PREVIEW_SECONDS", constants.PREVIEW_SECONDS))
+PREVIEW_SAMPLE_RATE = int(
+    os.getenv("PREVIEW_SAMPLE_RATE", constants.PREVIEW_SAMPLE_RATE)
+)
+# The compression of the MP3 encoder, from 0 (320 kbps) to just under 1 (8 kbps)
+PREVIEW_COMPRESSION_LEVEL = float(
+    os.getenv("PREVIEW_COMPRESSION_LEVEL", constants.PREVIEW_COMPRESSION_LEVEL)
+)
+WAVEFORM_SAMPLES_PER_PEAK = int(
+    os.getenv("WAVEFORM_SAMPLES_PER_PEAK", constants.WAVEFORM_SAMPLES_PER_PEAK)
+)
+# 8 or 16
+WAVEFORM_BITS = int(os.getenv("WAVEFORM_BITS", constants.WAVEFORM_BITS))
+
+PREVIEW_FADE_SECONDS = 0.5
+HASH_CHUNK_BYTES = 1024 * 1024
+# The header of the binary format (version 1) of audiowaveform, which peaks.js reads as is
+WAVEFORM_HEADER = struct.Struct("<iIiiI")
+
+ARTIFACT_KINDS = ("preview", "waveform")
+
+
+@dataclass(frozen=True)
+class TrackArtifacts:
+    """The preview and the waveform of a track, written next to its audio file."""
+
+    # Hex SHA-256 digest of the audio file the artifacts were made from
+    content_hash: str
+    # Size and modification time of the audio file, to skip hashing unchanged files
+    source_size: int
+    source_mtime_ns: int
+    # File names, in the directory of the audio file
+    preview: str
+    waveform: str
+
+    def path(self, audio_path: str, kind: str) -> str:
+        return os.path.join(os.path.dirname(audio_path), getattr(self, kind))
+
+
+def manifest_path(audio_path: str) -> str:
+    return os.path.splitext(audio_path)[0] + ".artifacts.json"
+
+
+def read_artifacts(audio_path: str) -> TrackArtifacts | None:
+    """
+    Read the manifest of the artifacts of a track.
+
+    Args:
+        audio_path (str): The path of the audio file of the track.
+
+    Returns:
+        TrackArtifacts | None: The artifacts, or None if they were not built.
+    """
+    try:
+        with open(manifest_path(audio_path), encoding="utf-8") as f:
+            return TrackArtifacts(**json.load(f))
+    except FileNotFoundError:
+        return None
+
+
+def build_track_artifacts(audio_path: str) -> TrackArtifacts:
+    """
+    Build the preview clip and the waveform peaks of a track, next to its audio file.
+
+    Artifacts built from the same contents are kept as they are. The file names carry the hash
+    of the contents, so a changed track gets new files, and the old ones are deleted.
+
+    Meant to run in a worker of the `ExtractionPool`.
+
+    Args:
+        audio_path (str): The path of the audio file.
+
+    Returns:
+        TrackArtifacts: The artifacts of the track.
+    """
+    stat_result = os.stat(audio_path)
+    current = read_artifacts(audio_path)
+    if (
+        current is not None
+        and current.source_size == stat_result.st_size
+        and current.source_mtime_ns == stat_result.st_mtime_ns
+        and all(os.path.exists(current.path(audio_path, k)) for k in ARTIFACT_KINDS)
+    ):
+        return current
+
+    content_hash = _hash_file(audio_path)
+    stem = os.path.splitext(os.path.basename(audio_path))[0]
+    artifacts = TrackArtifacts(
+        content_hash=content_hash,
+        source_size=stat_result.st_size,
+        source_mtime_ns=stat_result.st_mtime_ns,
+        preview=f"{stem}.{content_hash[:16]}.preview.mp3",
+        waveform=f"{stem}.{content_hash[:16]}.peaks.dat",
+    )
+
+    if not (
+        current is not None
+        and current.content_hash == content_hash
+        and all(os.path.exists(current.path(audio_path, k)) for k in ARTIFACT_KINDS)
+    ):
+        # The duration was checked when the track was ingested
+        signal, sample_rate = decode_audio(
+            audio_path,
+            target_sample_rate=PREVIEW_SAMPLE_RATE,
+            window_seconds=0,
+            max_duration_seconds=0,
+        )
+        _write_atomically(
+            artifacts.path(audio_path, "waveform"),
+            encode_waveform(
+                signal, sample_rate, WAVEFORM_SAMPLES_PER_PEAK, WAVEFORM_BITS
+            ),
+        )
+        _write_preview(artifacts.path(audio_path, "preview"), signal, sample_rate)
+
+    _write_atomically(
+        manifest_path(audio_path), json.dumps(asdict(artifacts)).encode("utf-8")
+    )
+    if current is not None and current.content_hash != content_hash:
+        for kind in ARTIFACT_KINDS:
+            try:
+                os.remove(current.path(audio_path, kind))
+            except FileNotFoundError:
+                pass
+    return artifacts
+
+
+def encode_waveform(
+    signal: np.ndarray, sample_rate: int, samples_per_peak: int, bits: int = 8
+) -> bytes:
+    """
+    Encode the minimum and maximum of every `samples_per_peak` samples of a signal, in the
+    binary format of audiowaveform.
+
+    Args:
+        signal (np.ndarray): The mono signal, in [-1, 1].
+        sample_rate (int): The sample rate of the signal.
+        samples_per_peak (int): The number of samples summarized by each pair of peaks.
+        bits (int): 8 or 16, the resolution of the peaks. Default is 8.
+
+    Returns:
+        bytes: The header, followed by the interleaved minimum and maximum of every block.
+
+    Raises:
+        ValueError: If `bits` is neither 8 nor 16.
+    """
+    if bits not in (8, 16):
+        raise ValueError(f"The peaks are 8 or 16 bits, not {bits}")
+
+    blocks = -(-len(signal) // samples_per_peak)
+    padded = np.zeros(blocks * samples_per_peak, dtype=np.float32)
+    padded[: len(signal)] = signal
+    padded = padded.reshape(blocks, samples_per_peak)
+
+    scale = 127 if bits == 8 else 32767
+    peaks = np.empty((blocks, 2), dtype=np.int8 if bits == 8 else np.int16)
+    peaks[:, 0] = np.round(np.clip(padded.min(axis=1), -1, 1) * scale)
+    peaks[:, 1] = np.round(np.clip(padded.max(axis=1), -1, 1) * scale)
+
+    header = WAVEFORM_HEADER.pack(
+        1, 1 if bits == 8 else 0, sample_rate, samples_per_peak, blocks
+    )
+    return header + peaks.astype(peaks.dtype.newbyteorder("<")).tobytes()
+
+
+def _write_preview(path: str, signal: np.ndarray, sample_rate: int) -> None:
+    # The middle of the track, faded in and out
+    start, frames = analysis_window(len(signal), sample_rate, PREVIEW_SECONDS)
+    clip = signal[start : start + frames].copy()
+    fade = min(int(PREVIEW_FADE_SECONDS * sample_rate), len(clip) // 2)
+    if fade:
+        ramp = np.linspace(0, 1, fade, dtype=np.float32)
+        clip[:fade] *= ramp
+        clip[-fade:] *= ramp[::-1]
+
+    temporary = path + ".tmp"
+    # A constant bitrate keeps the byte offsets of the clip proportional to time, for seeking
+    sf.write(
+        temporary,
+        clip,
+        sample_rate,
+        format="MP3",
+        subtype="MPEG_LAYER_III",
+        compression_level=PREVIEW_COMPRESSION_LEVEL,
+        bitrate_mode="CONSTANT",
+    )
+    os.replace(temporary, path)
+
+
+def _write_atomically(path: str, content: bytes) -> None:
+    # Readers see the old file or the new one, never a partial one
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(content)
+    os.replace(temporary, path)
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_BYTES):
+            digest.update(chunk)
+    return digest.hexdigest()
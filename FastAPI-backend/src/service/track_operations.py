@@ -1,15 +1,25 @@
-from typing import Any, cast
+import asyncio
+import os
+from typing import Any, AsyncIterator, cast
 
+import pandas as pd
 from fastapi import UploadFile
+from qdrant_client import models
 from src.models.enumerations import TrackFields
 
 from src.repository import tracks_repository
-from src.models.models import ScoredTrack, Track, UploadedTrack
+from src.models.exceptions.exceptions import AudioFileTooLarge
+from src.models.models import ScoredTrack, Track, UploadedTrack, UploadedTrackResult
 from src.service import classification_model, feature_extraction
-from src.utils import model_creation
+from src.service.artifact_registry import ArtifactBundle, artifact_registry
+from src.service.audio_decoding import StagedUpload, stage_upload
+from src.service.feature_cache import CachedFeatures, feature_cache
+from src.service.result_cache import result_cache
+from src.utils import constants, model_creation
+from src.utils.feature_extraction import feature_vector_to_df
 
 
-def get_tracks(
+async def get_tracks(
     offset: int,
     limit: int,
     track_listens_lower_bound: int | None,
@@ -31,7 +41,7 @@ def get_tracks(
 
     """
 
-    tracks, next_page_track_id = tracks_repository.get_tracks(
+    tracks, next_page_track_id = await tracks_repository.get_tracks(
         offset=offset,
         limit=limit,
         track_listens_lower=track_listens_lower_bound,
@@ -39,67 +49,127 @@ def get_tracks(
         exact_match_filter=exact_match_filter,
     )
     return (
-        [model_creation.record_to_track(record) for record in tracks],
+        [model_creation.record_to_response_track(record) for record in tracks],
         next_page_track_id,
     )
 
 
-def get_tracks_by_full_text_match(
-    match_string: str, offset: int, limit: int | None, enum_field: TrackFields
-) -> list[Track]:
+async def get_tracks_by_full_text_match(
+    match_string: str, offset: int | str, limit: int, enum_field: TrackFields
+) -> tuple[list[Track], int | str | None]:
     """
-    Retrieve tracks that have a full-text match with a given string in a specified field.
+    Retrieve a page of tracks that have a full-text match with a given string in a specified field.
 
     Args:
         match_string (str): The string to match against in the specified field.
-        offset (int): The offset for paginating results.
-        limit (int | None): The maximum number of tracks to retrieve. Set to None to retrieve all matching tracks.
+        offset (int | str): The ID of the first track of the page.
+        limit (int): The maximum number of tracks to retrieve.
         enum_field (TrackFields): The field in which to search for a full-text match.
 
     Returns:
-        list[Track]: A list of Track objects that match the search criteria.
+        tuple[list[Track], int | str | None]: A list of Track objects that match the search criteria,
+            and the ID of the first track of the next page, or None if this is the last page.
     """
 
-    tracks, _ = tracks_repository.get_tracks_full_text_match(
+    tracks, next_page_offset = await tracks_repository.get_tracks_full_text_match(
         match_string=match_string,
         offset=offset,
-        limit=tracks_repository.get_number_of_datapoints() if not limit else limit,
+        limit=limit,
         enum_field=enum_field,
     )
-    return [model_creation.record_to_track(record) for record in tracks]
+    return (
+        [
+            cast(Track, model_creation.record_to_response_track(record))
+            for record in tracks
+        ],
+        next_page_offset,
+    )
+
+
+async def stream_tracks_by_full_text_match(
+    match_string: str,
+    offset: int | str,
+    enum_field: TrackFields,
+    page_size: int = constants.FULL_TEXT_SEARCH_PAGE_SIZE,
+) -> AsyncIterator[list[Track]]:
+    """
+    Retrieve all the tracks that have a full-text match with a given string in a specified field,
+    one page at a time. A page is only fetched once the previous one was consumed.
+
+    Args:
+        match_string (str): The string to match against in the specified field.
+        offset (int | str): The ID of the first track to retrieve.
+        enum_field (TrackFields): The field in which to search for a full-text match.
+        page_size (int): The number of tracks fetched per request.
+
+    Yields:
+        list[Track]: The next page of matching tracks.
+    """
 
+    next_page_offset: int | str | None = offset
+    while next_page_offset is not None:
+        tracks, next_page_offset = await get_tracks_by_full_text_match(
+            match_string, next_page_offset, page_size, enum_field
+        )
+        if tracks:
+            yield tracks
 
-def find_n_most_similar_tracks_by_id(
-    track_id: int, n: int, exact_match_filter: dict[str, Any] | None = None
+
+async def find_n_most_similar_tracks_by_id(
+    track_id: int,
+    n: int,
+    exact_match_filter: dict[str, Any] | None = None,
+    hnsw_ef: int | None = None,
+    oversampling: float | None = None,
 ) -> list[ScoredTrack]:
     """
     Find the top N most similar tracks to a track by its ID.
 
+    Results are cached, see `result_cache`.
+
     Args:
         track_id (int): The ID of the track to find similar tracks for.
         n (int): The number of similar tracks to retrieve.
         exact_match_filter (dict[str, Any] | None): A dictionary specifying exact match filters for query clauses.
             Set to None if no exact match filters are needed.
+        hnsw_ef (int | None): The size of the candidate list of the search. None uses the configured default.
+        oversampling (float | None): The oversampling of the quantized search. None uses the configured default.
 
     Returns:
         list[ScoredTrack]: A list of ScoredTrack objects representing the most similar tracks found.
     """
+    search_budget = dict(
+        hnsw_ef=hnsw_ef or tracks_repository.SEARCH_HNSW_EF,
+        oversampling=oversampling or tracks_repository.SEARCH_OVERSAMPLING,
+    )
 
-    return cast(
-        list[ScoredTrack],
-        [
-            model_creation.record_to_track(scored_point)
-            for scored_point in tracks_repository.get_most_similar_tracks(
-                track_id=track_id,
-                limit=n,
-                with_payload=True,
-                exact_match_filter=exact_match_filter,
-            )
-        ],
+    async def load() -> list[ScoredTrack]:
+        return cast(
+            list[ScoredTrack],
+            [
+                model_creation.record_to_response_track(scored_point)
+                for scored_point in await tracks_repository.get_most_similar_tracks(
+                    track_id=track_id,
+                    limit=n,
+                    exact_match_filter=exact_match_filter,
+                    **search_budget,
+                )
+            ],
+        )
+
+    return await result_cache.get_or_load(
+        (
+            "similar",
+            track_id,
+            n,
+            tuple(sorted((exact_match_filter or {}).items())),
+            tuple(search_budget.values()),
+        ),
+        load,
     )
 
 
-def find_n_most_similar_tracks_by_embedding(
+async def find_n_most_similar_tracks_by_embedding(
     track_embedding: list[float], n: int
 ) -> list[ScoredTrack]:
     """
@@ -117,19 +187,46 @@ def find_n_most_similar_tracks_by_embedding(
         list[ScoredTrack],
         [
             model_creation.record_to_track(scored_point)
-            for scored_point in tracks_repository.get_most_similar_tracks(
+            for scored_point in await tracks_repository.get_most_similar_tracks(
                 track_embedding=track_embedding,
                 limit=n,
-                with_payload=True,
             )
         ],
     )
 
 
-def get_track_by_id(track_id: int) -> Track:
+async def find_n_most_similar_tracks_by_embeddings(
+    track_embeddings: list[list[float]], n: int
+) -> list[list[ScoredTrack]]:
+    """
+    Find the top N most similar tracks for each of the given track embeddings, with a single query.
+
+    Args:
+        track_embeddings (list[list[float]]): The embedding vectors of the tracks to find similar tracks for.
+        n (int): The number of similar tracks to retrieve per embedding.
+
+    Returns:
+        list[list[ScoredTrack]]: For each embedding, in the same order, the most similar tracks found.
+    """
+
+    return [
+        cast(
+            list[ScoredTrack],
+            [model_creation.record_to_track(scored_point) for scored_point in result],
+        )
+        for result in await tracks_repository.get_most_similar_tracks_batch(
+            track_embeddings=track_embeddings,
+            limit=n,
+        )
+    ]
+
+
+async def get_track_by_id(track_id: int) -> Track:
     """
     Retrieve a track by its ID.
 
+    Results are cached, see `result_cache`.
+
     Args:
         track_id (int): The unique identifier of the track.
 
@@ -138,12 +235,62 @@ def get_track_by_id(track_id: int) -> Track:
 
     """
 
-    return cast(
-        Track,
-        model_creation.record_to_track(
-            tracks_repository.get_track_by_id(track_id=track_id)
-        ),
-    )
+    async def load() -> Track:
+        return cast(
+            Track,
+            model_creation.record_to_track(
+                await tracks_repository.get_track_by_id(track_id=track_id)
+            ),
+        )
+
+    return await result_cache.get_or_load(("track", track_id), load)
+
+
+async def get_track_path(track_id: int) -> str:
+    """
+    Retrieve the path of the audio file of a track, the one its artifacts are built from.
+
+    Results are cached, see `result_cache`: every seek of a player is a new request.
+
+    Args:
+        track_id (int): The unique identifier of the track.
+
+    Returns:
+        str: The path in the payload of the track, or the demo audio file if it has none.
+
+    Raises:
+        DatabaseError: If the track does not exist.
+    """
+
+    async def load() -> str:
+        record = await tracks_repository.get_track_by_id(
+            track_id=track_id, with_payload=[TrackFields.TRACK_PATH.value]
+        )
+        return (record.payload or {}).get(
+            TrackFields.TRACK_PATH.value
+        ) or model_creation.DEMO_TRACK_PATH
+
+    return await result_cache.get_or_load(("track_path", track_id), load)
+
+
+async def upsert_tracks(
+    points: list[models.PointStruct],
+    collection_name: str = tracks_repository.COLLECTION_NAME,
+) -> None:
+    """
+    Insert or update tracks, and drop the cached results that may have changed.
+
+    Every write to the collection goes through here. The cache of the process is always dropped,
+    the ones of the API workers only if they share it through Redis (`RESULT_CACHE_REDIS_URL`).
+    Otherwise, call `POST /tracks-library/cache/invalidate` on every worker, or wait for the TTL.
+
+    Args:
+        points (list[models.PointStruct]): The tracks, with their embeddings and payloads.
+        collection_name (str): The name of the Qdrant collection. Default is the global collection name.
+    """
+
+    await tracks_repository.upsert_tracks(points, collection_name=collection_name)
+    await result_cache.invalidate()
 
 
 async def clf_and_most_similar_tracks(
@@ -161,19 +308,255 @@ async def clf_and_most_similar_tracks(
         UploadedTrack: An UploadedTrack object containing the most similar tracks and genre predictions.
     """
 
-    track_x = await feature_extraction.extract_features(file)
+    return await clf_and_most_similar_tracks_staged(
+        await stage_upload(file),
+        file.filename or "Unknown",
+        top_n_genres,
+        top_n_similar,
+    )
+
+
+async def clf_and_most_similar_tracks_staged(
+    staged: StagedUpload, track_name: str, top_n_genres: int, top_n_similar: int
+) -> UploadedTrack:
+    """
+    Perform genre prediction and find the most similar tracks for a staged upload, then delete it.
+
+    Args:
+        staged (StagedUpload): The staged audio file.
+        track_name (str): The name of the track.
+        top_n_genres (int): The number of top genres to predict.
+        top_n_similar (int): The number of most similar tracks to retrieve.
+
+    Returns:
+        UploadedTrack: An UploadedTrack object containing the most similar tracks and genre predictions.
+    """
+
+    # The scaler and the model have to come from the same version of the artifacts
+    bundle = artifact_registry.current
+
+    try:
+        track_x, track_genre_distribution = await analyse_track(
+            staged, track_name, bundle
+        )
+    finally:
+        os.remove(staged.path)
 
     # Genre Prediction
-    track_genre_distribution = classification_model.classify_track(track_x)
     top_n_genres_present = classification_model.get_top_n_genres_present(
         track_y=track_genre_distribution, top_n=top_n_genres
     )
 
     # Similarity Search
-    most_similar_tracks = find_n_most_similar_tracks_by_embedding(
+    most_similar_tracks = await find_n_most_similar_tracks_by_embedding(
         track_x.values[0], top_n_similar
     )
 
     return UploadedTrack(
         most_similar_tracks=most_similar_tracks, genre_prediction=top_n_genres_present
     )
+
+
+async def analyse_track(
+    staged: StagedUpload, track_name: str, bundle: ArtifactBundle
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Compute the scaled features and the genre distribution of a staged upload, reusing
+    the results of a previous upload of the same file when they are cached.
+
+    Args:
+        staged (StagedUpload): The staged audio file.
+        track_name (str): The name of the track, used for the index of the DataFrames.
+        bundle (ArtifactBundle): The scaler and the model to use.
+
+    Returns:
+        tuple[pd.DataFrame, pd.DataFrame]: The scaled features and the genre probabilities.
+    """
+    key = feature_cache.key(staged.content_hash, bundle.version)
+    cached = await asyncio.to_thread(feature_cache.get, key)
+
+    if cached is not None:
+        track_x = feature_vector_to_df(cached.vector, track_name)
+    else:
+        track_x = await feature_extraction.extract_staged_features(
+            staged, track_name, bundle=bundle
+        )
+
+    if cached is not None and cached.genre_distribution is not None:
+        track_genre_distribution = pd.DataFrame(
+            [cached.genre_distribution],
+            columns=constants.CLASS_NAMES_MODEL_ORDER,
+            index=track_x.index,
+        )
+    else:
+        track_genre_distribution = await classification_model.classify_track_async(
+            track_x, bundle=bundle
+        )
+        await asyncio.to_thread(
+            feature_cache.put,
+            key,
+            CachedFeatures(
+                vector=track_x.values[0],
+                genre_distribution=track_genre_distribution.values[0],
+            ),
+        )
+
+    return track_x, track_genre_distribution
+
+
+async def clf_and_most_similar_tracks_batch(
+    files: list[UploadFile], top_n_genres: int, top_n_similar: int
+) -> list[UploadedTrackResult]:
+    """
+    Perform genre prediction and find the most similar tracks for several uploaded track files.
+
+    The features of all the files are extracted in parallel, the genres of all the tracks are
+    predicted with one call to the model and the similar tracks are fetched with one query.
+    A file that cannot be processed gets an error, without failing the other files.
+
+    Args:
+        files (list[UploadFile]): The uploaded track files for analysis.
+        top_n_genres (int): The number of top genres to predict per track.
+        top_n_similar (int): The number of most similar tracks to retrieve per track.
+
+    Returns:
+        list[UploadedTrackResult]: For each file, in the same order, its result or the reason it failed.
+    """
+
+    bundle = artifact_registry.current
+    results = [UploadedTrackResult(file_name=file.filename) for file in files]
+
+    staged_uploads: list[StagedUpload | None] = []
+    for file, result in zip(files, results):
+        try:
+            staged_uploads.append(await stage_upload(file))
+        except AudioFileTooLarge as e:
+            result.error = e.message
+            staged_uploads.append(None)
+
+    try:
+        analysed = await analyse_tracks(
+            staged_uploads,
+            [file.filename or "Unknown" for file in files],
+            bundle,
+        )
+    finally:
+        for staged in staged_uploads:
+            if staged is not None:
+                os.remove(staged.path)
+
+    succeeded = []
+    for result, analysis in zip(results, analysed):
+        if isinstance(analysis, Exception):
+            result.error = (
+                getattr(analysis, "message", None) or "The file could not be analysed."
+            )
+        elif analysis is not None:
+            succeeded.append((result, analysis))
+
+    # Similarity Search
+    most_similar_tracks = await find_n_most_similar_tracks_by_embeddings(
+        [track_x.values[0].tolist() for _, (track_x, _) in succeeded], top_n_similar
+    )
+
+    for (result, (_, track_genre_distribution)), similar_tracks in zip(
+        succeeded, most_similar_tracks
+    ):
+        result.result = UploadedTrack(
+            most_similar_tracks=similar_tracks,
+            genre_prediction=classification_model.get_top_n_genres_present(
+                track_y=track_genre_distribution, top_n=top_n_genres
+            ),
+        )
+
+    return results
+
+
+async def analyse_tracks(
+    staged_uploads: list[StagedUpload | None],
+    track_names: list[str],
+    bundle: ArtifactBundle,
+) -> list[tuple[pd.DataFrame, pd.DataFrame] | Exception | None]:
+    """
+    Compute the scaled features and the genre distributions of several staged uploads.
+
+    Features missing from the cache are extracted in parallel in the extraction pool, and all
+    the tracks without a cached genre distribution are classified with a single prediction.
+
+    Args:
+        staged_uploads (list[StagedUpload | None]): The staged audio files. None entries are skipped.
+        track_names (list[str]): The names of the tracks, used for the index of the DataFrames.
+        bundle (ArtifactBundle): The scaler and the model to use.
+
+    Returns:
+        list[tuple[pd.DataFrame, pd.DataFrame] | Exception | None]: For each upload, its scaled
+            features and genre probabilities, the exception raised while analysing it, or None if it was skipped.
+    """
+    keys = [
+        feature_cache.key(staged.content_hash, bundle.version) if staged else None
+        for staged in staged_uploads
+    ]
+    cached = await asyncio.gather(
+        *(asyncio.to_thread(feature_cache.get, key) if key else _none() for key in keys)
+    )
+
+    async def features(i: int) -> pd.DataFrame | None:
+        staged = staged_uploads[i]
+        if staged is None:
+            return None
+        if cached[i] is not None:
+            return feature_vector_to_df(cached[i].vector, track_names[i])
+        return await feature_extraction.extract_staged_features(
+            staged, track_names[i], bundle=bundle
+        )
+
+    tracks_x = await asyncio.gather(
+        *(features(i) for i in range(len(staged_uploads))), return_exceptions=True
+    )
+
+    analysed: list[tuple[pd.DataFrame, pd.DataFrame] | Exception | None] = []
+    to_classify = []
+    for i, track_x in enumerate(tracks_x):
+        if not isinstance(track_x, pd.DataFrame):
+            analysed.append(track_x)
+        elif cached[i] is not None and cached[i].genre_distribution is not None:
+            analysed.append(
+                (
+                    track_x,
+                    pd.DataFrame(
+                        [cached[i].genre_distribution],
+                        columns=constants.CLASS_NAMES_MODEL_ORDER,
+                        index=track_x.index,
+                    ),
+                )
+            )
+        else:
+            analysed.append(None)
+            to_classify.append(i)
+
+    if to_classify:
+        # Genre Prediction, a single call to the model for the whole batch
+        track_genre_distributions = await asyncio.to_thread(
+            classification_model.classify_track,
+            pd.concat([tracks_x[i] for i in to_classify]),
+            bundle,
+        )
+
+        for row, i in enumerate(to_classify):
+            track_x = tracks_x[i]
+            track_genre_distribution = track_genre_distributions.iloc[[row]]
+            analysed[i] = (track_x, track_genre_distribution)
+            await asyncio.to_thread(
+                feature_cache.put,
+                keys[i],
+                CachedFeatures(
+                    vector=track_x.values[0],
+                    genre_distribution=track_genre_distribution.values[0],
+                ),
+            )
+
+    return analysed
+
+
+async def _none() -> None:
+    return None
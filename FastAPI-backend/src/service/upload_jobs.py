@@ -0,0 +1,238 @@
+import asyncio
+import itertools
+import logging
+import os
+import time
+import uuid
+from typing import Awaitable, Callable
+
+from dotenv import load_dotenv
+
+from src.models.enumerations import JobStatus
+from src.models.exceptions.exceptions import JobQueueFull
+from src.models.models import UploadedTrack, UploadJob
+from src.utils import constants
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+# The number of uploads analysed at a time. Their feature extraction runs in the extraction pool.
+UPLOAD_JOB_WORKERS = int(os.getenv("UPLOAD_JOB_WORKERS", constants.UPLOAD_JOB_WORKERS))
+UPLOAD_JOB_MAX_QUEUED = int(
+    os.getenv("UPLOAD_JOB_MAX_QUEUED", constants.UPLOAD_JOB_MAX_QUEUED)
+)
+# How long the status and result of a finished job are kept
+UPLOAD_JOB_RESULT_TTL_SECONDS = float(
+    os.getenv("UPLOAD_JOB_RESULT_TTL_SECONDS", constants.UPLOAD_JOB_RESULT_TTL_SECONDS)
+)
+
+JobRunner = Callable[[], Awaitable[UploadedTrack]]
+
+
+class UploadJobQueue:
+    """
+    Analyses uploads in the background, so that the upload requests return right away.
+
+    Jobs wait in a priority queue, and `workers` background tasks run them, the highest priority
+    first, then the oldest first. Finished jobs are kept for `result_ttl_seconds`, for their
+    clients to poll them.
+
+    The jobs only live in the memory of the process. Serve the job endpoints with a single worker
+    process (`uvicorn --workers 1`), or route the polls of a job to the worker that queued it:
+    another worker answers 404.
+    """
+
+    def __init__(
+        self,
+        workers: int = UPLOAD_JOB_WORKERS,
+        max_queued: int = UPLOAD_JOB_MAX_QUEUED,
+        result_ttl_seconds: float = UPLOAD_JOB_RESULT_TTL_SECONDS,
+    ):
+        if workers < 1:
+            raise ValueError("`workers` has to be a positive integer")
+
+        self.workers = workers
+        self.max_queued = max_queued
+        self.result_ttl_seconds = result_ttl_seconds
+
+        self._jobs: dict[str, UploadJob] = {}
+        self._done: dict[str, asyncio.Event] = {}
+        self._cleanups: dict[str, Callable[[], None]] = {}
+        # Breaks the ties between jobs of the same priority, in the order of submission
+        self._sequence = itertools.count()
+        self._queue: asyncio.PriorityQueue | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    def submit(
+        self,
+        run: JobRunner,
+        priority: int = 0,
+        file_name: str | None = None,
+        cleanup: Callable[[], None] | None = None,
+    ) -> UploadJob:
+        """
+        Queue a job.
+
+        Args:
+            run (JobRunner): Runs the analysis, and returns its result.
+            priority (int): Jobs with a higher priority run first. Default is 0.
+            file_name (str | None): The name of the uploaded file.
+            cleanup (Callable[[], None] | None): Called instead of `run` if the job never runs,
+                e.g. to delete the staged upload.
+
+        Returns:
+            UploadJob: The queued job.
+
+        Raises:
+            JobQueueFull: If `max_queued` jobs are already waiting.
+        """
+        self._ensure_started()
+        assert self._queue is not None
+
+        self._purge_expired()
+        if self._queue.qsize() >= self.max_queued:
+            raise JobQueueFull()
+
+        job = UploadJob(
+            job_id=uuid.uuid4().hex,
+            status=JobStatus.QUEUED,
+            priority=priority,
+            file_name=file_name,
+            submitted_at=time.time(),
+        )
+        self._jobs[job.job_id] = job
+        self._done[job.job_id] = asyncio.Event()
+        if cleanup is not None:
+            self._cleanups[job.job_id] = cleanup
+        self._queue.put_nowait((-priority, next(self._sequence), job.job_id, run))
+        return job
+
+    def get(self, job_id: str) -> UploadJob | None:
+        """
+        Get a job.
+
+        Args:
+            job_id (str): The ID of the job.
+
+        Returns:
+            UploadJob | None: The job, or None if it does not exist or its result expired.
+        """
+        self._purge_expired()
+        return self._jobs.get(job_id)
+
+    async def wait(self, job_id: str, timeout: float) -> UploadJob | None:
+        """
+        Wait for a job to finish, for at most `timeout` seconds.
+
+        Args:
+            job_id (str): The ID of the job.
+            timeout (float): The maximum time to wait, in seconds.
+
+        Returns:
+            UploadJob | None: The job, finished or not, or None if it does not exist or its result expired.
+        """
+        done = self._done.get(job_id)
+        if done is not None and timeout > 0:
+            try:
+                await asyncio.wait_for(done.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.get(job_id)
+
+    def stats(self) -> dict[str, int]:
+        self._purge_expired()
+        counts = {status.value: 0 for status in JobStatus}
+        for job in self._jobs.values():
+            counts[job.status.value] += 1
+        return counts
+
+    async def start(self) -> None:
+        self._ensure_started()
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        self._drain("The server stopped before running the job.")
+        self._queue = None
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        # The workers are bound to the loop they were started on, like the inference engine's
+        if not self._tasks or self._tasks[0].get_loop() is not loop:
+            # The workers of the previous loop will never run the jobs left in its queue
+            self._drain("The server restarted before running the job.")
+            self._queue = asyncio.PriorityQueue()
+            self._tasks = [loop.create_task(self._work()) for _ in range(self.workers)]
+
+    async def _work(self) -> None:
+        queue = self._queue
+        assert queue is not None
+
+        while True:
+            _, _, job_id, run = await queue.get()
+            job = self._jobs.get(job_id)
+            if job is None:
+                continue
+
+            job.status = JobStatus.RUNNING
+            job.started_at = time.time()
+            self._cleanups.pop(job_id, None)
+            try:
+                result = await run()
+            except asyncio.CancelledError:
+                self._finish(job_id, error="The server stopped while running the job.")
+                raise
+            except Exception as e:
+                logger.warning("Upload job %s failed: %s", job_id, e)
+                self._finish(
+                    job_id,
+                    error=getattr(e, "message", None)
+                    or "The file could not be analysed.",
+                )
+            else:
+                self._finish(job_id, result=result)
+
+    def _finish(
+        self,
+        job_id: str,
+        result: UploadedTrack | None = None,
+        error: str | None = None,
+    ) -> None:
+        cleanup = self._cleanups.pop(job_id, None)
+        if cleanup is not None:
+            # A failed cleanup must not keep the job, or the other jobs when stopping, unfinished
+            try:
+                cleanup()
+            except Exception as e:
+                logger.warning("Cleanup of upload job %s failed: %s", job_id, e)
+
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        job.status = JobStatus.SUCCEEDED if error is None else JobStatus.FAILED
+        job.finished_at = time.time()
+        job.result = result
+        job.error = error
+        self._done[job_id].set()
+
+    def _drain(self, error: str) -> None:
+        # The jobs that never ran fail, and release their resources
+        while self._queue is not None and not self._queue.empty():
+            _, _, job_id, _ = self._queue.get_nowait()
+            self._finish(job_id, error=error)
+
+    def _purge_expired(self) -> None:
+        expired_before = time.time() - self.result_ttl_seconds
+        for job_id in [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < expired_before
+        ]:
+            del self._jobs[job_id]
+            del self._done[job_id]
+
+
+upload_jobs = UploadJobQueue()
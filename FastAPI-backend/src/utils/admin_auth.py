@@ -0,0 +1,32 @@
+import os
+import secrets
+from typing import Annotated
+
+from dotenv import load_dotenv
+from fastapi import Header, HTTPException
+
+load_dotenv()
+# The shared secret of the operational endpoints. They are disabled while it is empty.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+def require_admin_token(x_admin_token: Annotated[str | None, Header()] = None) -> None:
+    """
+    Dependency of the operational endpoints, such as artifact reloads and cache invalidation.
+    Also checks the token of the upload jobs submitted with a priority.
+
+    Args:
+        x_admin_token (str | None): The `X-Admin-Token` header of the request.
+
+    Raises:
+        HTTPException: 403 if no admin token is configured, or if the header does not match it.
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(
+            status_code=403,
+            detail="The endpoint is disabled, set ADMIN_TOKEN to enable it.",
+        )
+    if x_admin_token is None or not secrets.compare_digest(
+        x_admin_token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8")
+    ):
+        raise HTTPException(status_code=403, detail="A valid admin token is required.")
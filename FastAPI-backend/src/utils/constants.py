@@ -7,10 +7,21 @@ SCALER_FEATURES_ORDER = [
     "rmse",
 ]
 
+FEATURE_SIZES = dict(
+    chroma_cqt=12, mfcc=20, rmse=1, zcr=1, spectral_contrast=7, spectral_rolloff=1
+)
+
+FEATURE_STATISTICS = ("mean", "std", "skew", "kurtosis", "median", "min", "max")
+
 SCALER_SERAZLIZATION_PATH = "./src/dumps/standard_scaler.save"
 
 MODEL_SERIAZLIATION_PATH = "./src/dumps/mlp_model.keras"
 
+NUMPY_MODEL_SERIALIZATION_PATH = "./src/dumps/mlp_model.npz"
+
+# "keras" or "numpy"
+CLASSIFIER_RUNTIME = "keras"
+
 CLASS_NAMES_MODEL_ORDER = [
     "Blues",
     "Classical",
@@ -33,3 +44,110 @@ CLASS_NAMES_MODEL_ORDER = [
 NUMBER_OF_GENRES = 16
 
 EMBEDDINGS_DIMENSIONALITY = 294
+
+INFERENCE_MAX_BATCH_SIZE = 32
+
+INFERENCE_MAX_WAIT_MS = 5
+
+# 50 MB
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+
+MAX_AUDIO_DURATION_SECONDS = 20 * 60
+
+# 0 analyses the whole track
+ANALYSIS_WINDOW_SECONDS = 0
+
+# 0 keeps the sample rate of the file
+ANALYSIS_SAMPLE_RATE = 0
+
+# Bump whenever a change to the extraction changes the values of the features
+FEATURE_EXTRACTION_VERSION = 1
+
+FEATURE_CACHE_DIR = "./cache/features"
+
+# 256 MB
+FEATURE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+MAX_UPLOAD_BATCH_FILES = 100
+
+ENRICHMENT_CANDIDATES_PER_TRACK = 10
+
+ENRICHMENT_ADDITIONS_PER_TRACK = 3
+
+# The weight of the diversity of the added tracks against their relevance
+ENRICHMENT_DIVERSITY = 0.3
+
+ENRICHMENT_RANDOMNESS = 0.05
+
+# The number of tracks fetched per request when streaming search results
+FULL_TEXT_SEARCH_PAGE_SIZE = 256
+
+# What to do with the payload indexes when the application starts: "create", "validate" or "off"
+PAYLOAD_INDEX_PROVISIONING = "validate"
+
+RESULT_CACHE_MAX_ENTRIES = 10_000
+
+RESULT_CACHE_TTL_SECONDS = 5 * 60
+
+# Builds the response rows without validation and encodes them with orjson
+FAST_SERIALIZATION = True
+
+# The size of the candidate list of the HNSW search, 0 uses the ef of the collection
+SEARCH_HNSW_EF = 0
+
+# The oversampling of the searches in quantized collections, 0 uses the one of Qdrant
+SEARCH_OVERSAMPLING = 0.0
+
+QDRANT_TIMEOUT_SECONDS = 10
+
+QDRANT_POOL_SIZE = 32
+
+QDRANT_KEEPALIVE_SECONDS = 30
+
+# The time Qdrant may spend on a search, 0 leaves it to the request timeout
+SEARCH_TIMEOUT_SECONDS = 0
+
+# "qdrant", or "numpy" to run the similarity searches in process on an exported index
+SIMILARITY_BACKEND = "qdrant"
+
+VECTOR_INDEX_PATH = "./src/dumps/vector_index"
+
+# The name of the embeddings in the collection, "" for a collection with a single unnamed vector
+VECTOR_NAME = ""
+
+# The name of the projected embeddings to retrieve the candidates of a search on, "" to search
+# on the embeddings only
+COMPACT_VECTOR_NAME = ""
+
+PROJECTION_PATH = "./src/dumps/projection.npz"
+
+# How many candidates are retrieved on the projected embeddings per result to rerank
+RERANK_FACTOR = 4
+
+# The Cache-Control of the audio files, which are revalidated with their ETag once expired
+AUDIO_CACHE_CONTROL = "public, max-age=86400"
+
+PREVIEW_SECONDS = 30
+
+PREVIEW_SAMPLE_RATE = 22050
+
+# From 0 (320 kbps) to just under 1 (8 kbps), 0.8 is about 40 kbps
+PREVIEW_COMPRESSION_LEVEL = 0.8
+
+# About 11 pairs of peaks per second at the preview sample rate
+WAVEFORM_SAMPLES_PER_PEAK = 2048
+
+WAVEFORM_BITS = 8
+
+# The previews and waveforms are revalidated with their ETag, the hash of the track, once expired
+ARTIFACT_CACHE_CONTROL = "public, max-age=2592000"
+
+# The number of uploads analysed at a time in the job mode
+UPLOAD_JOB_WORKERS = 4
+
+UPLOAD_JOB_MAX_QUEUED = 100
+
+UPLOAD_JOB_RESULT_TTL_SECONDS = 10 * 60
+
+# The longest a job status request waits for the job to finish
+UPLOAD_JOB_MAX_WAIT_SECONDS = 30
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 import numpy as np
 import pandas as pd
 from scipy import stats
@@ -5,6 +7,7 @@ from scipy import stats
 from src.utils import constants
 
 
+@lru_cache(maxsize=None)
 def generate_columns() -> pd.MultiIndex:
     """
     Generate a MultiIndex for feature columns.
@@ -12,14 +15,9 @@ def generate_columns() -> pd.MultiIndex:
     Returns:
         pd.MultiIndex: A MultiIndex containing column names for different audio features.
     """
-    feature_sizes = dict(
-        chroma_cqt=12, mfcc=20, rmse=1, zcr=1, spectral_contrast=7, spectral_rolloff=1
-    )
-    moments = ("mean", "std", "skew", "kurtosis", "median", "min", "max")
-
     columns: list = []
-    for name, size in feature_sizes.items():
-        for moment in moments:
+    for name, size in constants.FEATURE_SIZES.items():
+        for moment in constants.FEATURE_STATISTICS:
             it = ((name, moment, "{:02d}".format(i + 1)) for i in range(size))
             columns.extend(it)
 
@@ -52,12 +50,133 @@ def feature_stats(features: pd.Series, name: str, values: np.ndarray) -> pd.Seri
     return features
 
 
-def check_feature_ordering(x: pd.DataFrame):
+@lru_cache(maxsize=None)
+def generate_model_ordered_columns() -> pd.MultiIndex:
+    """
+    Generate the feature columns in the order on which the scaler and the model were fit.
+
+    Returns:
+        pd.MultiIndex: The columns of `generate_columns`, grouped by feature in the order of
+            `constants.SCALER_FEATURES_ORDER`.
+    """
 
     def ordering_key(item):
         return constants.SCALER_FEATURES_ORDER.index(item[0])
 
-    columns = generate_columns().values
-    columns_ordered = sorted(columns, key=ordering_key)
+    columns = sorted(generate_columns().values, key=ordering_key)
+    return pd.MultiIndex.from_tuples(columns, names=generate_columns().names)
+
+
+def check_feature_ordering(x: pd.DataFrame):
+    return x.columns.equals(generate_model_ordered_columns())
+
+
+@lru_cache(maxsize=None)
+def feature_layout() -> dict[str, np.ndarray]:
+    """
+    Map every statistic of every feature to its position in the model ordered feature vector.
 
-    return x.columns.values.tolist() == columns_ordered
+    Returns:
+        dict[str, np.ndarray]: For each feature, an integer array of shape (number of statistics,
+            size of the feature) whose row `i` holds the positions of `constants.FEATURE_STATISTICS[i]`.
+    """
+    position = {
+        column: i for i, column in enumerate(generate_model_ordered_columns())
+    }
+
+    return {
+        name: np.array(
+            [
+                [position[(name, statistic, "{:02d}".format(i + 1))] for i in range(size)]
+                for statistic in constants.FEATURE_STATISTICS
+            ]
+        )
+        for name, size in constants.FEATURE_SIZES.items()
+    }
+
+
+def descriptor_statistics(values: np.ndarray) -> np.ndarray:
+    """
+    Compute all the statistics of every row of a matrix in a single pass over the data.
+
+    The results match `feature_stats`, which uses the biased estimators of scipy.stats.
+
+    Args:
+        values (np.ndarray): A 2D array of shape (rows, frames).
+
+    Returns:
+        np.ndarray: An array of shape (number of statistics, rows), ordered like `constants.FEATURE_STATISTICS`.
+    """
+    values = np.asarray(values)
+    # scipy tells constant rows apart at the precision of the input, e.g. float32 descriptors
+    resolution = np.finfo(
+        values.dtype if np.issubdtype(values.dtype, np.floating) else np.float64
+    ).resolution
+    values = values.astype(np.float64, copy=False)
+
+    mean = values.mean(axis=1)
+    deviations = values - mean[:, None]
+    squared = deviations * deviations
+    m2 = squared.mean(axis=1)
+    m3 = (squared * deviations).mean(axis=1)
+    m4 = (squared * squared).mean(axis=1)
+
+    with np.errstate(all="ignore"):
+        # scipy returns NaN for the higher moments of (numerically) constant rows
+        constant = m2 <= (resolution * mean) ** 2
+        skew = np.where(constant, np.nan, m3 / m2**1.5)
+        kurtosis = np.where(constant, np.nan, m4 / m2**2 - 3.0)
+
+    computed = dict(
+        mean=mean,
+        std=np.sqrt(m2),
+        skew=skew,
+        kurtosis=kurtosis,
+        median=np.median(values, axis=1),
+        min=values.min(axis=1),
+        max=values.max(axis=1),
+    )
+    return np.stack([computed[statistic] for statistic in constants.FEATURE_STATISTICS])
+
+
+def feature_vector(descriptors: dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Compute the statistics of the descriptors of a track, directly in the model ordered layout.
+
+    Args:
+        descriptors (dict[str, np.ndarray]): The frame-wise values of each feature in
+            `constants.FEATURE_SIZES`, each one of shape (size of the feature, frames).
+
+    Returns:
+        np.ndarray: A float32 vector of the unscaled features, in the order on which the scaler was fit.
+    """
+    layout = feature_layout()
+    names = list(constants.FEATURE_SIZES)
+    vector = np.empty(constants.EMBEDDINGS_DIMENSIONALITY, dtype=np.float32)
+
+    if len({descriptors[name].shape[1] for name in names}) == 1:
+        # All the descriptors share the frame grid, so they are processed as one matrix
+        stacked = np.concatenate([descriptors[name] for name in names], axis=0)
+        positions = np.concatenate([layout[name] for name in names], axis=1)
+        vector[positions] = descriptor_statistics(stacked)
+    else:
+        for name in names:
+            vector[layout[name]] = descriptor_statistics(descriptors[name])
+
+    return vector
+
+
+def feature_vector_to_df(vector: np.ndarray, track_name: str) -> pd.DataFrame:
+    """
+    Wrap a model ordered feature vector in a single-row DataFrame.
+
+    Args:
+        vector (np.ndarray): A vector produced by `feature_vector`.
+        track_name (str): The name of the track, used for the index.
+
+    Returns:
+        pd.DataFrame: A DataFrame with the columns of `generate_model_ordered_columns`.
+    """
+    return pd.DataFrame(
+        [vector], index=[f"track_{track_name}"], columns=generate_model_ordered_columns()
+    )
@@ -0,0 +1,146 @@
+import os
+import re
+from datetime import timezone
+from email.utils import formatdate, parsedate_to_datetime
+from typing import AsyncIterator, Mapping
+
+import anyio
+from dotenv import load_dotenv
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+from src.utils import constants
+
+load_dotenv()
+# Lets browsers and CDNs keep the audio files, and revalidate them with their ETag once expired
+AUDIO_CACHE_CONTROL = os.getenv("AUDIO_CACHE_CONTROL", constants.AUDIO_CACHE_CONTROL)
+ARTIFACT_CACHE_CONTROL = os.getenv(
+    "ARTIFACT_CACHE_CONTROL", constants.ARTIFACT_CACHE_CONTROL
+)
+
+# The bytes read from the file at a time when sending a range
+RANGE_CHUNK_SIZE = 64 * 1024
+
+_BYTE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+async def file_response(
+    path: str,
+    headers: Mapping[str, str],
+    media_type: str,
+    cache_control: str = AUDIO_CACHE_CONTROL,
+    etag: str | None = None,
+) -> Response:
+    """
+    Serve a file with the validators and the byte ranges players and CDNs rely on.
+
+    The response carries a strong ETag and the Last-Modified date of the file. A request whose
+    `If-None-Match` (or `If-Modified-Since`) matches gets a 304 without a body. A request for a single
+    byte range gets a 206 with that range only, unless its `If-Range` no longer matches the file.
+    Requests for several ranges get the whole file.
+
+    Args:
+        path (str): The path of the file.
+        headers (Mapping[str, str]): The headers of the request.
+        media_type (str): The media type of the file.
+        cache_control (str): The Cache-Control header of the response. Default is `AUDIO_CACHE_CONTROL`.
+        etag (str | None): The ETag of the file, without quotes. Default is derived from its
+            modification time and size.
+
+    Returns:
+        Response: A 200, 206, 304 or 416 response.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+    """
+
+    stat_result = await anyio.to_thread.run_sync(os.stat, path)
+    size = stat_result.st_size
+    etag = f'"{etag or f"{stat_result.st_mtime_ns:x}-{size:x}"}"'
+    last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+    validators = {
+        "etag": etag,
+        "last-modified": last_modified,
+        "cache-control": cache_control,
+        "accept-ranges": "bytes",
+    }
+
+    if _not_modified(headers, etag, stat_result.st_mtime):
+        return Response(status_code=304, headers=validators)
+
+    byte_range = headers.get("range")
+    if_range = headers.get("if-range")
+    if byte_range and (if_range is None or if_range in (etag, last_modified)):
+        match = _BYTE_RANGE.match(byte_range.strip())
+        # An invalid range is ignored, only a valid one that is out of the file gets a 416
+        if match and _is_valid_range(match.group(1), match.group(2)):
+            bounds = _range_bounds(match.group(1), match.group(2), size)
+            if bounds is None:
+                return Response(
+                    status_code=416,
+                    headers={**validators, "content-range": f"bytes */{size}"},
+                )
+            start, end = bounds
+            return StreamingResponse(
+                _read_range(path, start, end),
+                status_code=206,
+                media_type=media_type,
+                headers={
+                    **validators,
+                    "content-range": f"bytes {start}-{end}/{size}",
+                    "content-length": str(end - start + 1),
+                },
+            )
+
+    return FileResponse(
+        path, media_type=media_type, headers=validators, stat_result=stat_result
+    )
+
+
+def _not_modified(headers: Mapping[str, str], etag: str, mtime: float) -> bool:
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        # The weak comparison of RFC 9110, as GET requests allow
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag in tags
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since is None:
+        return False
+    try:
+        modified_since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if modified_since.tzinfo is None:
+        # Dates with a "-0000" zone are in UTC too, not in the local time
+        modified_since = modified_since.replace(tzinfo=timezone.utc)
+    return int(mtime) <= modified_since.timestamp()
+
+
+def _is_valid_range(start: str, end: str) -> bool:
+    # RFC 9110 14.1.1: a range needs a bound, and cannot end before it starts
+    if not start:
+        return bool(end)
+    return not end or int(end) >= int(start)
+
+
+def _range_bounds(start: str, end: str, size: int) -> tuple[int, int] | None:
+    # "bytes=500-" is from the byte 500 on, "bytes=-500" is the last 500 bytes
+    if not start:
+        if int(end) == 0 or size == 0:
+            return None
+        return max(size - int(end), 0), size - 1
+    if int(start) >= size:
+        return None
+    return int(start), (min(int(end), size - 1) if end else size - 1)
+
+
+async def _read_range(path: str, start: int, end: int) -> AsyncIterator[bytes]:
+    async with await anyio.open_file(path, "rb") as file:
+        await file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await file.read(min(RANGE_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
@@ -2,14 +2,31 @@ from qdrant_client.http.models.models import Record, ScoredPoint
 
 from src.models.models import Track, ScoredTrack
 from src.models.enumerations import TrackFields
+from src.utils.serialization import FAST_SERIALIZATION
 
+# The audio file of the tracks without one, e.g. the ones of the demo dataset
+DEMO_TRACK_PATH = "./src/audio/Kid Bloom Cowboy Official Visualizer.mp3"
 
-def record_to_track(record: Record | ScoredPoint | None) -> Track | ScoredTrack:
+# The payload fields `record_to_track` reads, the only ones worth fetching for a Track
+TRACK_PAYLOAD_FIELDS = [
+    TrackFields.TRACK_ID.value,
+    TrackFields.TRACK_TITLE.value,
+    TrackFields.ARTIST_NAME.value,
+    TrackFields.TRACK_DURATION.value,
+    TrackFields.GENRE.value,
+    TrackFields.TRACK_LISTENS.value,
+]
+
+
+def record_to_track(
+    record: Record | ScoredPoint | None, validate: bool = True
+) -> Track | ScoredTrack:
     """
     Convert a Qdrant Record or ScoredPoint to a Track or ScoredTrack object.
 
     Args:
         record (Record | ScoredPoint | None): The Qdrant Record or ScoredPoint to be converted.
+        validate (bool): Whether to validate the payload against the model. Default is True.
 
     Returns:
         Track | ScoredTrack: A Track or ScoredTrack object created from the provided record.
@@ -23,7 +40,7 @@ def record_to_track(record: Record | ScoredPoint | None) -> Track | ScoredTrack:
         raise ValueError("The provided record is None")
     elif record.payload is None:
         raise ValueError(
-            'The record does not have payload. Make sure the fetching from the DB is done with "with_payload=True"'
+            "The record does not have payload. Make sure the fetching from the DB includes the `TRACK_PAYLOAD_FIELDS`"
         )
 
     # TODO: Use the enum for attribute names
@@ -31,7 +48,7 @@ def record_to_track(record: Record | ScoredPoint | None) -> Track | ScoredTrack:
     track_data = {
         "db_id": record.id,
         "track_id": record.payload[TrackFields.TRACK_ID.value],
-        "track_path": "./src/audio/Kid Bloom Cowboy Official Visualizer.mp3",
+        "track_path": DEMO_TRACK_PATH,
         "track_title": record.payload[TrackFields.TRACK_TITLE.value],
         "artist_name": record.payload[TrackFields.ARTIST_NAME.value],
         "track_duration": record.payload[TrackFields.TRACK_DURATION.value],
@@ -40,11 +57,32 @@ def record_to_track(record: Record | ScoredPoint | None) -> Track | ScoredTrack:
     }
 
     if isinstance(record, Record):
-        return Track(**track_data)
+        model = Track
     elif isinstance(record, ScoredPoint):
+        model = ScoredTrack
         track_data["similarity_score"] = record.score
-        return ScoredTrack(**track_data)
     else:
         raise ValueError(
             "Passed object should be one of: qdrant_client.http.models.models.Record, qdrant_client.http.models.models.ScoredPoint"
         )
+
+    return model(**track_data) if validate else model.construct(**track_data)
+
+
+def record_to_response_track(
+    record: Record | ScoredPoint | None,
+) -> Track | ScoredTrack:
+    """
+    Convert a Qdrant Record or ScoredPoint to a Track or ScoredTrack that is only serialized in a response.
+
+    In the fast serialization mode, the payload is not validated: the routes that return lists of
+    tracks trust the payloads written by the ingestion. Everywhere else, use `record_to_track`.
+
+    Args:
+        record (Record | ScoredPoint | None): The Qdrant Record or ScoredPoint to be converted.
+
+    Returns:
+        Track | ScoredTrack: A Track or ScoredTrack object created from the provided record.
+    """
+
+    return record_to_track(record, validate=not FAST_SERIALIZATION)
@@ -0,0 +1,44 @@
+import base64
+import json
+
+from src.models.exceptions.exceptions import InvalidCursor
+
+
+def encode_cursor(offset: int | str | None) -> str | None:
+    """
+    Encode the offset of the next page of a scroll as an opaque cursor.
+
+    Args:
+        offset (int | str | None): The ID of the first track of the next page, as returned by Qdrant.
+
+    Returns:
+        str | None: The cursor, or None if there is no next page.
+    """
+
+    if offset is None:
+        return None
+    return base64.urlsafe_b64encode(json.dumps({"o": offset}).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> int | str:
+    """
+    Decode a cursor created by `encode_cursor`.
+
+    Args:
+        cursor (str): The cursor.
+
+    Returns:
+        int | str: The ID of the first track of the page.
+
+    Raises:
+        InvalidCursor: If the cursor was not created by `encode_cursor`.
+    """
+
+    try:
+        offset = json.loads(base64.urlsafe_b64decode(cursor.encode()))["o"]
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursor()
+
+    if not isinstance(offset, (int, str)) or isinstance(offset, bool):
+        raise InvalidCursor()
+    return offset
@@ -0,0 +1,135 @@
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class Projection:
+    """
+    A linear projection of the embeddings onto their first principal components.
+
+    The statistics of the same band (mean, median, min, max...) are strongly correlated, so a few
+    dozen components keep most of the variance of the 294 features. Euclidean distances between
+    projected embeddings approximate the ones between the embeddings; with `normalize`, the
+    embeddings are scaled to a unit norm first, so that they approximate cosine similarities.
+    """
+
+    mean: np.ndarray
+    # One component per row, by decreasing variance
+    components: np.ndarray
+    # The variance of the sample along each component
+    explained_variance: np.ndarray
+    # The variance of the sample along all the original dimensions
+    total_variance: float
+    # Whether to scale each component to a unit variance
+    whiten: bool = False
+    # Whether to scale the embeddings to a unit norm before projecting them
+    normalize: bool = False
+
+    @property
+    def dimensions(self) -> int:
+        return len(self.components)
+
+    @property
+    def explained_variance_ratio(self) -> float:
+        """The share of the variance of the sample kept by the projection."""
+        return float(self.explained_variance.sum() / self.total_variance)
+
+    @classmethod
+    def fit(
+        cls,
+        vectors: np.ndarray,
+        dimensions: int,
+        whiten: bool = False,
+        normalize: bool = False,
+    ) -> "Projection":
+        """
+        Learn the projection from a sample of embeddings, by principal component analysis.
+
+        Args:
+            vectors (np.ndarray): The sample of embeddings, of shape (n_tracks, n_features).
+            dimensions (int): The number of dimensions of the projected embeddings.
+            whiten (bool): Whether to scale each component to a unit variance. Default is False.
+            normalize (bool): Whether to scale the embeddings to a unit norm first,
+                for collections with the cosine distance. Default is False.
+
+        Returns:
+            Projection: The fitted projection.
+
+        Raises:
+            ValueError: If there are more dimensions than features.
+        """
+        vectors = np.asarray(vectors, dtype=np.float64)
+        if not 0 < dimensions <= vectors.shape[1]:
+            raise ValueError(
+                f"Can not project {vectors.shape[1]} features to {dimensions} dimensions"
+            )
+        if normalize:
+            vectors = _normalize(vectors)
+
+        mean = vectors.mean(axis=0)
+        centered = vectors - mean
+        # The eigenvectors of the covariance matrix, which is only n_features x n_features
+        variance, components = np.linalg.eigh(
+            centered.T @ centered / max(len(vectors) - 1, 1)
+        )
+        order = np.argsort(variance)[::-1]
+        variance, components = np.maximum(variance[order], 0), components[:, order].T
+
+        return cls(
+            mean=mean.astype(np.float32),
+            components=components[:dimensions].astype(np.float32),
+            explained_variance=variance[:dimensions].astype(np.float32),
+            total_variance=float(variance.sum()),
+            whiten=whiten,
+            normalize=normalize,
+        )
+
+    @classmethod
+    def load(cls, path: str | os.PathLike) -> "Projection":
+        with np.load(path) as arrays:
+            return cls(
+                mean=arrays["mean"],
+                components=arrays["components"],
+                explained_variance=arrays["explained_variance"],
+                total_variance=float(arrays["total_variance"]),
+                whiten=bool(arrays["whiten"]),
+                normalize=bool(arrays["normalize"]),
+            )
+
+    def save(self, path: str | os.PathLike) -> None:
+        with open(path, "wb") as file:
+            np.savez(
+                file,
+                mean=self.mean,
+                components=self.components,
+                explained_variance=self.explained_variance,
+                total_variance=self.total_variance,
+                whiten=self.whiten,
+                normalize=self.normalize,
+            )
+
+    def transform(self, vectors: np.ndarray | list) -> np.ndarray:
+        """
+        Project embeddings.
+
+        Args:
+            vectors (np.ndarray | list): The embeddings, of shape (n_tracks, n_features) or (n_features,).
+
+        Returns:
+            np.ndarray: The projected embeddings, of shape (n_tracks, dimensions) or (dimensions,).
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.normalize:
+            vectors = _normalize(vectors)
+
+        projected = (vectors - self.mean) @ self.components.T
+        if self.whiten:
+            projected /= np.sqrt(np.maximum(self.explained_variance, 1e-12))
+        return projected
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
@@ -1,6 +1,6 @@
 from typing import Any
 
-from qdrant_client import QdrantClient, models
+from qdrant_client import AsyncQdrantClient, models
 
 
 def generate_must_clauses(
@@ -30,8 +30,8 @@ def generate_must_clauses(
     return []
 
 
-def populate_db_test(
-    qdrant_client: QdrantClient,
+async def populate_db_test(
+    qdrant_client: AsyncQdrantClient,
     collection_name: str,
     vectors: list[list[int]],
     payloads: list[dict[str, Any] | None] | None = None,
@@ -44,4 +44,4 @@ def populate_db_test(
             point.payload = p
         points.append(point)
         point_id += 1
-    qdrant_client.upsert(collection_name=collection_name, points=points)
+    await qdrant_client.upsert(collection_name=collection_name, points=points)
@@ -0,0 +1,64 @@
+import os
+from typing import Any
+
+import orjson
+from dotenv import load_dotenv
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+from src.utils import constants
+
+load_dotenv()
+# "false" validates the responses against the response models, and encodes them with the standard encoder
+FAST_SERIALIZATION = (
+    os.getenv("FAST_SERIALIZATION", str(constants.FAST_SERIALIZATION)).lower() == "true"
+)
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode the content as JSON with orjson, pydantic models included.
+
+    Args:
+        content (Any): The content, made of JSON types, tuples, NumPy arrays and pydantic models.
+
+    Returns:
+        bytes: The JSON document.
+    """
+
+    return orjson.dumps(
+        content,
+        default=_encode_model,
+        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+    )
+
+
+class FastJSONResponse(ORJSONResponse):
+    """A JSON response encoded by `dumps`. FastAPI returns it as is, without validating it."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def fast_response(content: Any) -> Any:
+    """
+    Return the content of a route as a `FastJSONResponse` in the fast serialization mode, which
+    skips the validation against the response model of the route and the standard encoder.
+
+    Args:
+        content (Any): The content returned by the route.
+
+    Returns:
+        Any: The response, or the content as is if the fast serialization mode is off.
+    """
+
+    if FAST_SERIALIZATION:
+        return FastJSONResponse(content)
+    return content
+
+
+def _encode_model(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        # The values of the fields, nested models are encoded by the next calls
+        return obj.__dict__
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -0,0 +1,182 @@
+import os
+
+import pytest
+from dotenv import load_dotenv
+from qdrant_client import AsyncQdrantClient, models
+
+from src.models.enumerations import TrackFields
+from src.repository import collection_schema
+
+load_dotenv()
+TEST_COLLECTION_NAME = "test-collection-schema"
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="function")
+async def qdrant_client():
+    client = AsyncQdrantClient(url=os.getenv("QDRANT_URL"))
+    await client.recreate_collection(
+        collection_name=TEST_COLLECTION_NAME,
+        vectors_config=models.VectorParams(size=3, distance=models.Distance.EUCLID),
+    )
+    yield client
+    await client.close()
+
+
+def test_compare_payload_schema__given_no_indexes__reports_missing():
+    # when
+    report = collection_schema.compare_payload_schema({})
+
+    # then
+    assert set(report.missing) == {
+        track_field.value
+        for track_field, schema in collection_schema.PAYLOAD_INDEXES.items()
+        if schema is not None
+    }, """Not all the expected indexes are reported as missing"""
+    assert not report.ok, """Collection without indexes reported as ok"""
+
+
+def test_compare_payload_schema__given_wrong_index_type__reports_mismatch():
+    # given
+    payload_schema = {
+        track_field.value: models.PayloadIndexInfo(
+            data_type=models.PayloadSchemaType.KEYWORD, points=0
+        )
+        for track_field in collection_schema.PAYLOAD_INDEXES
+    }
+
+    # when
+    report = collection_schema.compare_payload_schema(payload_schema)
+
+    # then
+    assert report.mismatched == [
+        TrackFields.TRACK_TITLE.value,
+        TrackFields.ARTIST_NAME.value,
+        TrackFields.TRACK_LISTENS.value,
+    ], """Indexes of the wrong type not reported"""
+    assert not report.missing, """Existing indexes reported as missing"""
+
+
+@pytest.mark.anyio
+async def test_ensure_payload_indexes__given_empty_collection__creates_indexes(
+    qdrant_client,
+):
+    # when
+    created = await collection_schema.ensure_payload_indexes(
+        client=qdrant_client, collection_name=TEST_COLLECTION_NAME
+    )
+    report = await collection_schema.check_payload_indexes(
+        client=qdrant_client, collection_name=TEST_COLLECTION_NAME
+    )
+
+    # then
+    assert created.created, """No index was created"""
+    assert report.ok, """Indexes still missing or different after provisioning"""
+
+
+def test_collection_spec__given_quantized_on_disk_vectors__needs_less_memory():
+    # given
+    in_ram = collection_schema.CollectionSpec()
+    quantized = collection_schema.CollectionSpec(quantization="scalar", on_disk=True)
+
+    # when
+    in_ram_memory = in_ram.estimate_memory(1_000_000)
+    quantized_memory = quantized.estimate_memory(1_000_000)
+
+    # then
+    assert isinstance(
+        quantized.quantization_config(), models.ScalarQuantization
+    ), """The scalar quantization is not configured"""
+    assert (
+        quantized_memory < in_ram_memory / 2
+    ), """Quantized vectors on disk do not save memory"""
+
+
+def test_collection_spec__given_unknown_quantization__raises_exception():
+    with pytest.raises(ValueError):
+        collection_schema.CollectionSpec(quantization="binary")
+
+
+@pytest.mark.anyio
+async def test_provision_collection__given_spec__creates_matching_collection(
+    qdrant_client,
+):
+    # given
+    spec = collection_schema.CollectionSpec(
+        vector_size=3, hnsw_m=32, quantization="scalar"
+    )
+
+    # when
+    differences = await collection_schema.provision_collection(
+        spec,
+        recreate=True,
+        client=qdrant_client,
+        collection_name=TEST_COLLECTION_NAME,
+    )
+    collection = await qdrant_client.get_collection(TEST_COLLECTION_NAME)
+
+    # then
+    assert not differences, """Settings of the spec reported as missing"""
+    assert not collection_schema.compare_collection_config(
+        collection.config, spec
+    ), """The created collection differs from the spec"""
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("recreate", [False, True])
+async def test_provision_collection__given_no_distance__keeps_distance_of_collection(
+    qdrant_client, recreate
+):
+    # given
+    spec = collection_schema.CollectionSpec(vector_size=3)
+
+    # when
+    differences = await collection_schema.provision_collection(
+        spec,
+        recreate=recreate,
+        client=qdrant_client,
+        collection_name=TEST_COLLECTION_NAME,
+    )
+    collection = await qdrant_client.get_collection(TEST_COLLECTION_NAME)
+
+    # then
+    assert not differences, """The distance was reported as different"""
+    assert (
+        collection.config.params.vectors.distance == models.Distance.EUCLID
+    ), """Provisioning changed the metric of the collection"""
+
+
+@pytest.mark.anyio
+async def test_provision_collection__given_other_distance__reports_it_without_recreate(
+    qdrant_client,
+):
+    # given
+    spec = collection_schema.CollectionSpec(
+        vector_size=3, distance=models.Distance.COSINE.value
+    )
+
+    # when
+    differences = await collection_schema.provision_collection(
+        spec, client=qdrant_client, collection_name=TEST_COLLECTION_NAME
+    )
+    collection = await qdrant_client.get_collection(TEST_COLLECTION_NAME)
+
+    # then
+    assert differences == ["distance"], """The other distance was not reported"""
+    assert (
+        collection.config.params.vectors.distance == models.Distance.EUCLID
+    ), """The metric was changed without recreating the collection"""
+
+
+def test_collection_spec__given_no_distance__creates_euclidean_collection():
+    # when
+    vectors_config = collection_schema.CollectionSpec().vectors_config()
+
+    # then
+    assert (
+        vectors_config.distance == models.Distance.EUCLID
+    ), """New collections do not use the metric of the embeddings"""
@@ -0,0 +1,107 @@
+import httpx
+import pytest
+
+from src.repository import connection
+from src.repository.connection import ClientSettings, create_client
+
+
+@pytest.fixture
+def client_arguments(monkeypatch):
+    arguments: dict = {}
+
+    def fake_client(**kwargs):
+        arguments.update(kwargs)
+        return object()
+
+    monkeypatch.setattr(connection, "AsyncQdrantClient", fake_client)
+    return arguments
+
+
+def test_client_settings__given_environment__reads_it(monkeypatch):
+    # given
+    monkeypatch.setenv("QDRANT_URL", "http://qdrant:6333")
+    monkeypatch.setenv("QDRANT_PREFER_GRPC", "True")
+    monkeypatch.setenv("QDRANT_GRPC_PORT", "7334")
+    monkeypatch.setenv("QDRANT_TIMEOUT_SECONDS", "3")
+    monkeypatch.setenv("QDRANT_POOL_SIZE", "8")
+    monkeypatch.setenv("QDRANT_KEEPALIVE_SECONDS", "2.5")
+
+    # when
+    settings = ClientSettings.from_env()
+
+    # then
+    assert settings == ClientSettings(
+        url="http://qdrant:6333",
+        prefer_grpc=True,
+        grpc_port=7334,
+        timeout_seconds=3,
+        pool_size=8,
+        keepalive_seconds=2.5,
+    ), """The settings do not match the environment"""
+
+
+def test_client_settings__given_empty_environment__uses_defaults(monkeypatch):
+    # given
+    for name in [
+        "QDRANT_URL",
+        "QDRANT_PREFER_GRPC",
+        "QDRANT_GRPC_PORT",
+        "QDRANT_TIMEOUT_SECONDS",
+        "QDRANT_POOL_SIZE",
+        "QDRANT_KEEPALIVE_SECONDS",
+    ]:
+        monkeypatch.delenv(name, raising=False)
+
+    # when
+    settings = ClientSettings.from_env()
+
+    # then
+    assert settings == ClientSettings(), """The defaults differ from the dataclass"""
+
+
+def test_create_client__given_settings__configures_pool_grpc_and_timeout(
+    client_arguments,
+):
+    # given
+    settings = ClientSettings(
+        url="http://qdrant:6333",
+        prefer_grpc=True,
+        grpc_port=7334,
+        timeout_seconds=3,
+        pool_size=8,
+        keepalive_seconds=2.5,
+    )
+
+    # when
+    create_client(settings)
+
+    # then
+    assert client_arguments["url"] == "http://qdrant:6333"
+    assert (
+        client_arguments["prefer_grpc"] and client_arguments["grpc_port"] == 7334
+    ), """The transport is not the configured one"""
+    assert client_arguments["timeout"] == 3, """The request timeout was not set"""
+    assert client_arguments["limits"] == httpx.Limits(
+        max_connections=8, max_keepalive_connections=8, keepalive_expiry=2.5
+    ), """The REST pool was not sized by the settings"""
+    assert client_arguments["grpc_options"] == {
+        "grpc.keepalive_time_ms": 2500,
+        "grpc.keepalive_permit_without_calls": 1,
+    }, """The gRPC keep-alive was not set by the settings"""
+
+
+def test_create_client__given_no_settings__reads_environment(
+    client_arguments, monkeypatch
+):
+    # given
+    monkeypatch.setenv("QDRANT_URL", "http://qdrant:6333")
+    monkeypatch.setenv("QDRANT_POOL_SIZE", "2")
+
+    # when
+    create_client()
+
+    # then
+    assert client_arguments["url"] == "http://qdrant:6333"
+    assert (
+        client_arguments["limits"].max_connections == 2
+    ), """The settings of the environment were not used"""
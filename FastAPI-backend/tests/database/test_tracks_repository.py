@@ -1,7 +1,9 @@
 import os
 import pytest
 from dotenv import load_dotenv
-from qdrant_client import QdrantClient, models
+from httpx import Headers
+from qdrant_client import AsyncQdrantClient, models
+from qdrant_client.http.exceptions import UnexpectedResponse
 
 from src.repository import tracks_repository
 from src.models.enumerations import TrackFields
@@ -12,21 +14,29 @@ from src.models.exceptions.exceptions import DatabaseError
 load_dotenv()
 TEST_COLLECTION_NAME = "test-collection"
 
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
 
 @pytest.fixture(scope="function")
-def qdrant_client():
-    client = QdrantClient(url=os.getenv("QDRANT_URL"))
-    client.recreate_collection(
+async def qdrant_client():
+    client = AsyncQdrantClient(url=os.getenv("QDRANT_URL"))
+    await client.recreate_collection(
         collection_name=TEST_COLLECTION_NAME,
         vectors_config=models.VectorParams(size=3, distance=models.Distance.EUCLID),
     )
-    return client
+    yield client
+    await client.close()
 
 
-def test_tracks_retrieval__given_limit__returns_tracks(qdrant_client):
+async def test_tracks_retrieval__given_limit__returns_tracks(qdrant_client):
     # given
     vectors = [[0, 0, 0], [1, 1, 1], [3, 3, 3]]
-    populate_db_test(
+    await populate_db_test(
         qdrant_client=qdrant_client,
         collection_name=TEST_COLLECTION_NAME,
         vectors=vectors,
@@ -34,7 +44,7 @@ def test_tracks_retrieval__given_limit__returns_tracks(qdrant_client):
 
     # when
     limit = 1
-    tracks, _ = tracks_repository.get_tracks(
+    tracks, _ = await tracks_repository.get_tracks(
         client=qdrant_client, collection_name=TEST_COLLECTION_NAME, limit=limit
     )
 
@@ -45,11 +55,11 @@ def test_tracks_retrieval__given_limit__returns_tracks(qdrant_client):
     The number of tracks retrieved should be 2"""
 
 
-def test_search_tracks__given_exact_match__returns_filtered_tracks(qdrant_client):
+async def test_search_tracks__given_exact_match__returns_filtered_tracks(qdrant_client):
     # given
     vectors = [[0, 0, 0], [1, 1, 1], [3, 3, 3]]
     payloads = [{"atr": 1}, {"atr": 2}, {"atr": 1}]
-    populate_db_test(
+    await populate_db_test(
         qdrant_client=qdrant_client,
         collection_name=TEST_COLLECTION_NAME,
         vectors=vectors,
@@ -57,10 +67,11 @@ def test_search_tracks__given_exact_match__returns_filtered_tracks(qdrant_client
     )
 
     # when
-    tracks, _ = tracks_repository.get_tracks(
+    tracks, _ = await tracks_repository.get_tracks(
         client=qdrant_client,
         collection_name=TEST_COLLECTION_NAME,
         exact_match_filter={"atr": 1},
+        with_payload=True,
     )
 
     # then
@@ -70,11 +81,13 @@ def test_search_tracks__given_exact_match__returns_filtered_tracks(qdrant_client
     Fetched tracks include attribute values that are not supposed to be present."""
 
 
-def test_search_track__given_listens_thresholds__returns_filtered_tracks(qdrant_client):
+async def test_search_track__given_listens_thresholds__returns_filtered_tracks(
+    qdrant_client,
+):
     # given
     vectors = [[0, 0, 0], [1, 1, 1], [3, 3, 3]]
     payloads = [{"track_listens": 1}, {"track_listens": 2}, {"track_listens": 3}]
-    populate_db_test(
+    await populate_db_test(
         qdrant_client=qdrant_client,
         collection_name=TEST_COLLECTION_NAME,
         vectors=vectors,
@@ -83,7 +96,7 @@ def test_search_track__given_listens_thresholds__returns_filtered_tracks(qdrant_
 
     # when
     LOWER_BOUND, UPPER_BOUND = 1, 5
-    tracks, _ = tracks_repository.get_tracks(
+    tracks, _ = await tracks_repository.get_tracks(
         client=qdrant_client,
         collection_name=TEST_COLLECTION_NAME,
         track_listens_lower=LOWER_BOUND,
@@ -96,7 +109,7 @@ def test_search_track__given_listens_thresholds__returns_filtered_tracks(qdrant_
     ), "Tracks are not within the range for the track_listens attribute"
 
 
-def test_search_track__given_listsns_and_exact_matches__returns_filtered_tracks(
+async def test_search_track__given_listsns_and_exact_matches__returns_filtered_tracks(
     qdrant_client,
 ):
     # given
@@ -106,7 +119,7 @@ def test_search_track__given_listsns_and_exact_matches__returns_filtered_tracks(
         {"track_listens": 2, "atr": 2},
         {"track_listens": 3, "atr": 1},
     ]
-    populate_db_test(
+    await populate_db_test(
         qdrant_client=qdrant_client,
         collection_name=TEST_COLLECTION_NAME,
         vectors=vectors,
@@ -115,12 +128,13 @@ def test_search_track__given_listsns_and_exact_matches__returns_filtered_tracks(
 
     # when
     LOWER_BOUND, UPPER_BOUND = 1, 5
-    tracks, _ = tracks_repository.get_tracks(
+    tracks, _ = await tracks_repository.get_tracks(
         client=qdrant_client,
         collection_name=TEST_COLLECTION_NAME,
         track_listens_lower=LOWER_BOUND,
         track_listens_upper=UPPER_BOUND,
         exact_match_filter={"atr": 1},
+        with_payload=True,
     )
 
     # then
@@ -133,10 +147,10 @@ def test_search_track__given_listsns_and_exact_matches__returns_filtered_tracks(
     condition or fall outside the range for the specified track listens range (or both)"""
 
 
-def test_get_track__given_id__returns_appropriate_track(qdrant_client):
+async def test_get_track__given_id__returns_appropriate_track(qdrant_client):
     # given
     vectors = [[0, 0, 0], [1, 1, 1]]
-    populate_db_test(
+    await populate_db_test(
         qdrant_client=qdrant_client,
         collection_name=TEST_COLLECTION_NAME,
         vectors=vectors,
@@ -144,7 +158,7 @@ def test_get_track__given_id__returns_appropriate_track(qdrant_client):
 
     # when
     t_id = 0
-    track = tracks_repository.get_track_by_id(
+    track = await tracks_repository.get_track_by_id(
         client=qdrant_client,
         collection_name=TEST_COLLECTION_NAME,
         track_id=t_id,
@@ -156,10 +170,35 @@ def test_get_track__given_id__returns_appropriate_track(qdrant_client):
     assert track.id == t_id, """Fetched track has different id from the query"""
 
 
-def test_get_track__given_invalid_id__raises_exception(qdrant_client):
+async def test_get_track__given_default_projection__returns_only_track_fields(
+    qdrant_client,
+):
+    # given
+    vectors = [[0, 0, 0]]
+    payloads = [{TrackFields.TRACK_TITLE.value: "title", "lyrics": "la la la"}]
+    await populate_db_test(
+        qdrant_client=qdrant_client,
+        collection_name=TEST_COLLECTION_NAME,
+        vectors=vectors,
+        payloads=payloads,
+    )
+
+    # when
+    track = await tracks_repository.get_track_by_id(
+        0, client=qdrant_client, collection_name=TEST_COLLECTION_NAME
+    )
+
+    # then
+    assert track.payload == {
+        TrackFields.TRACK_TITLE.value: "title"
+    }, """
+    Payload fields that a Track is not built from were fetched"""
+
+
+async def test_get_track__given_invalid_id__raises_exception(qdrant_client):
     # given
     vectors = [[0, 0, 0], [1, 1, 1]]
-    populate_db_test(
+    await populate_db_test(
         qdrant_client=qdrant_client,
         collection_name=TEST_COLLECTION_NAME,
         vectors=vectors,
@@ -168,7 +207,7 @@ def test_get_track__given_invalid_id__raises_exception(qdrant_client):
     # when/then
     with pytest.raises(DatabaseError):
         t_id = 10
-        _ = tracks_repository.get_track_by_id(
+        _ = await tracks_repository.get_track_by_id(
             client=qdrant_client,
             collection_name=TEST_COLLECTION_NAME,
             track_id=t_id,
@@ -177,10 +216,12 @@ def test_get_track__given_invalid_id__raises_exception(qdrant_client):
         )
 
 
-def test_get_similar_tracks__given_id_and_embedding__raises_exception(qdrant_client):
+async def test_get_similar_tracks__given_id_and_embedding__raises_exception(
+    qdrant_client,
+):
     # given
     vectors = [[0, 0, 0], [1, 1, 1]]
-    populate_db_test(
+    await populate_db_test(
         qdrant_client=qdrant_client,
         collection_name=TEST_COLLECTION_NAME,
         vectors=vectors,
@@ -190,7 +231,7 @@ def test_get_similar_tracks__given_id_and_embedding__raises_exception(qdrant_cli
     with pytest.raises(InvalidAttributeCombination):
         track_id = 0
         track_embedding = [3.0, 3.0, 3.0]
-        tracks_repository.get_most_similar_tracks(
+        await tracks_repository.get_most_similar_tracks(
             client=qdrant_client,
             collection_name=TEST_COLLECTION_NAME,
             track_id=track_id,
@@ -198,10 +239,12 @@ def test_get_similar_tracks__given_id_and_embedding__raises_exception(qdrant_cli
         )
 
 
-def test_get_similar_tracks__not_given_id_nor_embedding__raises_exception(qdrant_client):
+async def test_get_similar_tracks__not_given_id_nor_embedding__raises_exception(
+    qdrant_client,
+):
     # given
     vectors = [[0, 0, 0], [1, 1, 1]]
-    populate_db_test(
+    await populate_db_test(
         qdrant_client=qdrant_client,
         collection_name=TEST_COLLECTION_NAME,
         vectors=vectors,
@@ -211,7 +254,7 @@ def test_get_similar_tracks__not_given_id_nor_embedding__raises_exception(qdrant
     with pytest.raises(InvalidAttributeCombination):
         track_id = None
         track_embedding = None
-        tracks_repository.get_most_similar_tracks(
+        await tracks_repository.get_most_similar_tracks(
             client=qdrant_client,
             collection_name=TEST_COLLECTION_NAME,
             track_id=track_id,
@@ -219,10 +262,12 @@ def test_get_similar_tracks__not_given_id_nor_embedding__raises_exception(qdrant
         )
 
 
-def test_get_exact_track_by_similarity__given_id__returns_same_track(qdrant_client):
+async def test_get_similar_tracks__given_id__returns_nearest_other_tracks(
+    qdrant_client,
+):
     # given
-    vectors = [[0, 0, 0], [1, 1, 1]]
-    populate_db_test(
+    vectors = [[0, 0, 0], [1, 1, 1], [3, 3, 3]]
+    await populate_db_test(
         qdrant_client=qdrant_client,
         collection_name=TEST_COLLECTION_NAME,
         vectors=vectors,
@@ -230,7 +275,7 @@ def test_get_exact_track_by_similarity__given_id__returns_same_track(qdrant_clie
 
     # when
     t_id = 0
-    tracks = tracks_repository.get_most_similar_tracks(
+    tracks = await tracks_repository.get_most_similar_tracks(
         client=qdrant_client,
         collection_name=TEST_COLLECTION_NAME,
         track_id=t_id,
@@ -238,19 +283,99 @@ def test_get_exact_track_by_similarity__given_id__returns_same_track(qdrant_clie
         limit=1,
     )
 
+    # then
+    assert all(
+        track.id != t_id for track in tracks
+    ), """The query track is part of its own similar tracks"""
+    assert (
+        tracks[0].id == 1
+    ), """There exists a track that is more similar to the original track, than the returned one"""
+
+
+async def test_get_similar_tracks__given_invalid_id__raises_exception(qdrant_client):
+    # given
+    vectors = [[0, 0, 0], [1, 1, 1]]
+    await populate_db_test(
+        qdrant_client=qdrant_client,
+        collection_name=TEST_COLLECTION_NAME,
+        vectors=vectors,
+    )
+
+    # when/then
+    with pytest.raises(DatabaseError):
+        await tracks_repository.get_most_similar_tracks(
+            client=qdrant_client,
+            collection_name=TEST_COLLECTION_NAME,
+            track_id=10,
+        )
+
+
+async def test_get_similar_tracks__given_missing_collection__propagates_error(
+    qdrant_client,
+):
+    # when / then
+    with pytest.raises(Exception) as error:
+        await tracks_repository.get_most_similar_tracks(
+            track_id=0,
+            client=qdrant_client,
+            collection_name="missing-collection",
+        )
+    assert not isinstance(
+        error.value, DatabaseError
+    ), """A missing collection was reported as a missing track"""
+
+
+@pytest.mark.parametrize(
+    "content, is_missing_point",
+    [
+        (b'{"status":{"error":"Not found: No point with id 7 found"}}', True),
+        (b'{"status":{"error":"Not found: Collection `x` doesn\'t exist!"}}', False),
+    ],
+)
+async def test_is_missing_point__given_not_found_response__checks_the_reason(
+    content, is_missing_point
+):
+    # given
+    error = UnexpectedResponse(
+        status_code=404, reason_phrase="Not Found", content=content, headers=Headers()
+    )
+
     # then
     assert (
-        tracks[0].id == t_id
-    ), """There exists a track that is more similar to the original track, than the original track itself"""
+        tracks_repository._is_missing_point(error) == is_missing_point
+    ), """The reason of the 404 was not told apart"""
 
 
-def test_get_similar_tracks__given_embedding_and_exact_matches__returns_appropriate_similar_tracks(
+async def test_get_tracks__given_ids__returns_tracks_in_order(qdrant_client):
+    # given
+    vectors = [[0, 0, 0], [1, 1, 1], [3, 3, 3]]
+    await populate_db_test(
+        qdrant_client=qdrant_client,
+        collection_name=TEST_COLLECTION_NAME,
+        vectors=vectors,
+    )
+
+    # when
+    tracks = await tracks_repository.get_tracks_by_ids(
+        client=qdrant_client,
+        collection_name=TEST_COLLECTION_NAME,
+        track_ids=[2, 0],
+    )
+
+    # then
+    assert [track.id for track in tracks] == [
+        2,
+        0,
+    ], """Tracks are not returned in the order of the IDs"""
+
+
+async def test_get_similar_tracks__given_embedding_and_exact_matches__returns_appropriate_similar_tracks(
     qdrant_client,
 ):
     # given
     vectors = [[0, 0, 0], [1, 1, 1], [2, 2, 2]]
     payloads = [{"atr": 1}, {"atr": 2}, {"atr": 1}]
-    populate_db_test(
+    await populate_db_test(
         qdrant_client=qdrant_client,
         collection_name=TEST_COLLECTION_NAME,
         vectors=vectors,
@@ -259,7 +384,7 @@ def test_get_similar_tracks__given_embedding_and_exact_matches__returns_appropri
 
     # when
     track_embedding = [3.0, 3.0, 3.0]
-    tracks = tracks_repository.get_most_similar_tracks(
+    tracks = await tracks_repository.get_most_similar_tracks(
         client=qdrant_client,
         collection_name=TEST_COLLECTION_NAME,
         track_embedding=track_embedding,
@@ -281,7 +406,7 @@ def test_get_similar_tracks__given_embedding_and_exact_matches__returns_appropri
     Returned tracks are not within the subsets specified by the exact match filters"""
 
 
-def test_get_tracks__given_substring__returns_filtered_tracks(qdrant_client):
+async def test_get_tracks__given_substring__returns_filtered_tracks(qdrant_client):
     # given
     vectors = [[0, 0, 0], [1, 1, 1]]
     payloads = [
@@ -289,7 +414,7 @@ def test_get_tracks__given_substring__returns_filtered_tracks(qdrant_client):
         {TrackFields.ARTIST_NAME.value: "lana"},
         {TrackFields.ARTIST_NAME.value: "frank ocean"},
     ]
-    populate_db_test(
+    await populate_db_test(
         qdrant_client=qdrant_client,
         collection_name=TEST_COLLECTION_NAME,
         vectors=vectors,
@@ -297,7 +422,7 @@ def test_get_tracks__given_substring__returns_filtered_tracks(qdrant_client):
     )
 
     # when
-    tracks, _ = tracks_repository.get_tracks_full_text_match(
+    tracks, _ = await tracks_repository.get_tracks_full_text_match(
         match_string="lana",
         offset=0,
         limit=10,
@@ -312,20 +437,57 @@ def test_get_tracks__given_substring__returns_filtered_tracks(qdrant_client):
     )
 
 
-def test_get_number_of_tracks__given_collection__returns_number_of_tracks(
+async def test_get_number_of_tracks__given_collection__returns_number_of_tracks(
     qdrant_client,
 ):
     # given
     vectors = [[0, 0, 0], [1, 1, 1]]
-    populate_db_test(
+    await populate_db_test(
         qdrant_client=qdrant_client,
         collection_name=TEST_COLLECTION_NAME,
         vectors=vectors,
     )
 
     # when
-    num_tracks = tracks_repository.get_number_of_datapoints(
+    num_tracks = await tracks_repository.get_number_of_datapoints(
         client=qdrant_client, collection_name=TEST_COLLECTION_NAME
     )
 
     assert num_tracks == 2
+
+
+async def test_get_similar_tracks_batch__given_ids__returns_results_per_track(
+    qdrant_client,
+):
+    # given
+    vectors = [[0, 0, 0], [1, 1, 1], [3, 3, 3]]
+    await populate_db_test(
+        qdrant_client=qdrant_client,
+        collection_name=TEST_COLLECTION_NAME,
+        vectors=vectors,
+    )
+
+    # when
+    results = await tracks_repository.get_most_similar_tracks_batch_by_ids(
+        client=qdrant_client,
+        collection_name=TEST_COLLECTION_NAME,
+        track_ids=[0, 2],
+        exact_search=True,
+        limit=1,
+    )
+
+    # then
+    assert [[track.id for track in tracks] for tracks in results] == [
+        [1],
+        [1],
+    ], """Wrong most similar tracks, or not in the order of the IDs"""
+
+
+async def test_get_distance__given_collection__returns_its_metric(qdrant_client):
+    # when
+    distance = await tracks_repository.get_distance(
+        client=qdrant_client, collection_name=TEST_COLLECTION_NAME
+    )
+
+    # then
+    assert distance == models.Distance.EUCLID, """Wrong metric of the collection"""
@@ -0,0 +1,143 @@
+import numpy as np
+import pytest
+from qdrant_client import AsyncQdrantClient, models
+
+from src.models.exceptions.exceptions import DatabaseError
+from src.repository import collection_schema, tracks_repository
+from src.utils.projection import Projection
+from src.utils.repo_utils import populate_db_test
+
+SOURCE_COLLECTION_NAME = "test-collection-unnamed"
+TEST_COLLECTION_NAME = "test-collection-two-stage"
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def vectors():
+    # 4 latent factors spread over 32 correlated features
+    rng = np.random.default_rng(0)
+    return (rng.normal(size=(300, 4)) @ rng.normal(size=(4, 32))).astype(np.float32)
+
+
+@pytest.fixture
+def projection(vectors):
+    return Projection.fit(vectors, dimensions=4, normalize=True)
+
+
+@pytest.fixture
+async def qdrant_client(vectors, projection, monkeypatch):
+    # Qdrant's local mode runs offline, and its search is exact
+    client = AsyncQdrantClient(":memory:")
+    await client.create_collection(
+        collection_name=SOURCE_COLLECTION_NAME,
+        vectors_config=models.VectorParams(size=32, distance=models.Distance.COSINE),
+    )
+    await populate_db_test(
+        qdrant_client=client,
+        collection_name=SOURCE_COLLECTION_NAME,
+        vectors=vectors.tolist(),
+        payloads=[{"atr": i % 3} for i in range(len(vectors))],
+    )
+    await collection_schema.migrate_to_named_vectors(
+        projection,
+        TEST_COLLECTION_NAME,
+        vector_name="embedding",
+        compact_vector_name="compact",
+        client=client,
+        collection_name=SOURCE_COLLECTION_NAME,
+    )
+    monkeypatch.setattr(tracks_repository, "VECTOR_NAME", "embedding")
+    monkeypatch.setattr(tracks_repository, "COMPACT_VECTOR_NAME", "compact")
+    monkeypatch.setattr(tracks_repository, "_projection", projection)
+    yield client
+    await client.close()
+
+
+async def test_get_similar_tracks__given_compact_vector__finds_the_exact_neighbours(
+    qdrant_client, vectors
+):
+    # given
+    query = (vectors[0] + 0.1).tolist()
+
+    # when
+    two_stage = await tracks_repository.get_most_similar_tracks(
+        track_embedding=query,
+        limit=10,
+        exact_match_filter={"atr": 1},
+        with_vectors=True,
+        client=qdrant_client,
+        collection_name=TEST_COLLECTION_NAME,
+    )
+    exact = await tracks_repository.get_most_similar_tracks(
+        track_embedding=query,
+        limit=10,
+        exact_search=True,
+        exact_match_filter={"atr": 1},
+        client=qdrant_client,
+        collection_name=TEST_COLLECTION_NAME,
+    )
+
+    # then
+    assert [point.id for point in two_stage] == [
+        point.id for point in exact
+    ], """The reranked candidates are not the nearest tracks"""
+    assert np.allclose(
+        [point.score for point in two_stage], [point.score for point in exact]
+    ), """The candidates were not scored on the embeddings"""
+    assert (
+        len(two_stage[0].vector) == 32
+    ), """The results do not have their embeddings"""
+
+
+async def test_get_similar_tracks_by_id__given_compact_vector__excludes_the_track(
+    qdrant_client,
+):
+    # when
+    single = await tracks_repository.get_most_similar_tracks(
+        track_id=5, limit=5, client=qdrant_client, collection_name=TEST_COLLECTION_NAME
+    )
+    batch = await tracks_repository.get_most_similar_tracks_batch_by_ids(
+        [5], limit=5, client=qdrant_client, collection_name=TEST_COLLECTION_NAME
+    )
+
+    # then
+    assert len(single) == 5 and 5 not in {
+        point.id for point in single
+    }, """The track is part of its own results"""
+    assert [point.id for point in single] == [
+        point.id for point in batch[0]
+    ], """The single and batch searches found different tracks"""
+    with pytest.raises(DatabaseError):
+        await tracks_repository.get_most_similar_tracks(
+            track_id=1000, client=qdrant_client, collection_name=TEST_COLLECTION_NAME
+        )
+
+
+async def test_upsert_tracks__given_named_vectors__stores_the_projection(
+    qdrant_client, vectors, projection
+):
+    # given
+    vector = (vectors[1] * 2).tolist()
+
+    # when
+    await tracks_repository.upsert_tracks(
+        [models.PointStruct(id=1000, vector=vector, payload={"atr": 0})],
+        client=qdrant_client,
+        collection_name=TEST_COLLECTION_NAME,
+    )
+    record = (
+        await qdrant_client.retrieve(
+            collection_name=TEST_COLLECTION_NAME, ids=[1000], with_vectors=True
+        )
+    )[0]
+
+    # then
+    assert np.allclose(
+        record.vector["compact"], projection.transform(vector), atol=1e-4
+    ), """The projection of the track was not stored"""
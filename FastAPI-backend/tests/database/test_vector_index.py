@@ -0,0 +1,166 @@
+import numpy as np
+import pytest
+from qdrant_client import AsyncQdrantClient, models
+
+from src.models.exceptions.exceptions import DatabaseError
+from src.repository import tracks_repository, vector_index
+from src.repository.vector_index import VectorIndex, export_from_qdrant
+from src.utils.repo_utils import populate_db_test
+
+TEST_COLLECTION_NAME = "test-collection-index"
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def vectors():
+    return np.random.default_rng(0).normal(size=(200, 8)).astype(np.float32)
+
+
+@pytest.fixture
+def payloads():
+    return [{"atr": i % 3, "name": f"track {i}"} for i in range(200)]
+
+
+@pytest.fixture(params=vector_index.SUPPORTED_DISTANCES)
+async def qdrant_client(request, vectors, payloads):
+    # Qdrant's local mode runs offline, and its search is exact
+    client = AsyncQdrantClient(":memory:")
+    await client.create_collection(
+        collection_name=TEST_COLLECTION_NAME,
+        vectors_config=models.VectorParams(size=8, distance=request.param),
+    )
+    await populate_db_test(
+        qdrant_client=client,
+        collection_name=TEST_COLLECTION_NAME,
+        vectors=vectors.tolist(),
+        payloads=payloads,
+    )
+    yield client
+    await client.close()
+
+
+async def test_export__given_collection__searches_like_qdrant(
+    qdrant_client, vectors, tmp_path
+):
+    # given
+    index = await export_from_qdrant(qdrant_client, TEST_COLLECTION_NAME, tmp_path)
+    query = vectors[0] + 0.1
+
+    # when
+    found = index.search([query], limit=10, exact_match_filter={"atr": 1})[0]
+    expected = await qdrant_client.search(
+        collection_name=TEST_COLLECTION_NAME,
+        query_vector=query.tolist(),
+        query_filter=models.Filter(
+            must=[models.FieldCondition(key="atr", match=models.MatchValue(value=1))]
+        ),
+        limit=10,
+    )
+
+    # then
+    assert [point.id for point in found] == [
+        point.id for point in expected
+    ], """The index and Qdrant found different tracks"""
+    assert np.allclose(
+        [point.score for point in found],
+        [point.score for point in expected],
+        atol=1e-4,
+    ), """The index and Qdrant scored the tracks differently"""
+    assert found[0].payload == {
+        "atr": 1,
+        "name": f"track {found[0].id}",
+    }, """The payload of the track was not exported"""
+
+
+@pytest.mark.parametrize("distance", vector_index.SUPPORTED_DISTANCES)
+async def test_search__given_blocks_smaller_than_index__finds_same_tracks(
+    vectors, monkeypatch, distance
+):
+    # given
+    index = VectorIndex(
+        ids=np.arange(len(vectors)), vectors=vectors, payloads={}, distance=distance
+    )
+    expected = index.search(vectors[:3], limit=5)
+
+    # when
+    monkeypatch.setattr(vector_index, "SEARCH_BLOCK_SIZE", 16)
+    monkeypatch.setattr(vector_index, "MANHATTAN_BLOCK_SIZE", 5)
+    found = index.search(vectors[:3], limit=5)
+
+    # then
+    assert [[p.id for p in points] for points in found] == [
+        [p.id for p in points] for points in expected
+    ], """The blocked search found different tracks"""
+
+
+@pytest.mark.parametrize("limit, expected_length", [(0, 0), (-1, 0), (500, 200)])
+async def test_search__given_limit_out_of_range__returns_what_exists(
+    vectors, monkeypatch, limit, expected_length
+):
+    # given
+    index = VectorIndex(ids=np.arange(len(vectors)), vectors=vectors, payloads={})
+    monkeypatch.setattr(vector_index, "SEARCH_BLOCK_SIZE", 16)
+
+    # when
+    found = index.search(vectors[:2], limit=limit)
+
+    # then
+    assert [len(points) for points in found] == [
+        expected_length
+    ] * 2, """The search did not return every track up to the limit"""
+    assert all(
+        [p.score for p in points] == sorted((p.score for p in points), reverse=True)
+        for points in found
+    ), """The tracks were not sorted by similarity"""
+
+
+async def test_vector_index__given_unknown_distance__raises_exception(vectors):
+    with pytest.raises(ValueError):
+        VectorIndex(
+            ids=np.arange(len(vectors)), vectors=vectors, payloads={}, distance="L3"
+        )
+
+
+async def test_recommend__given_ids__excludes_the_tracks_themselves(vectors):
+    # given
+    index = VectorIndex(ids=np.arange(len(vectors)), vectors=vectors, payloads={})
+
+    # when
+    results = index.recommend([3, 7], limit=5)
+
+    # then
+    assert all(
+        track_id not in {point.id for point in points}
+        for track_id, points in zip([3, 7], results)
+    ), """A track is part of its own recommendations"""
+    with pytest.raises(DatabaseError):
+        index.recommend([1000], limit=5)
+
+
+async def test_get_similar_tracks__given_numpy_backend__searches_offline(
+    vectors, payloads, monkeypatch
+):
+    # given
+    index = VectorIndex(
+        ids=np.arange(len(vectors)),
+        vectors=vectors,
+        payloads={"atr": np.array([payload["atr"] for payload in payloads])},
+    )
+    monkeypatch.setattr(tracks_repository, "SIMILARITY_BACKEND", "numpy")
+    monkeypatch.setattr(tracks_repository, "_vector_index", index)
+
+    # when
+    tracks = await tracks_repository.get_most_similar_tracks(
+        track_id=0, limit=5, exact_match_filter={"atr": 2}, with_payload=True
+    )
+
+    # then
+    assert len(tracks) == 5 and all(
+        track.payload["atr"] == 2 for track in tracks
+    ), """The filtered search of the index returned other tracks"""
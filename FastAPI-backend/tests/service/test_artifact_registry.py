@@ -0,0 +1,56 @@
+from dataclasses import replace
+
+import numpy as np
+
+from src.service.artifact_registry import ArtifactRegistry
+from src.service.inference_engine import InferenceEngine
+from src.utils import constants
+
+
+def test_registry__before_first_use__is_not_ready():
+    # given
+    registry = ArtifactRegistry()
+
+    # then
+    assert not registry.ready, """Registry reported readiness before loading"""
+
+
+def test_registry__given_current__loads_matching_artifacts():
+    # given
+    registry = ArtifactRegistry()
+
+    # when
+    bundle = registry.current
+
+    # then
+    assert registry.ready, """Registry not ready after loading"""
+    assert (
+        len(bundle.columns) == constants.EMBEDDINGS_DIMENSIONALITY
+    ), """Wrong feature layout"""
+    assert registry.current is bundle, """Artifacts were loaded more than once"""
+
+
+class ConstantModel:
+    def predict(self, x, verbose=0):
+        return np.ones((len(x), constants.NUMBER_OF_GENRES))
+
+
+def test_registry__given_swap__serves_new_bundle():
+    # given
+    registry = ArtifactRegistry()
+    old_bundle = registry.current
+    new_bundle = replace(old_bundle, version="new", model=ConstantModel())
+    engine = InferenceEngine(lambda: registry.current.model)
+    x = np.zeros((2, constants.EMBEDDINGS_DIMENSIONALITY), dtype=np.float32)
+
+    # when
+    before = engine.predict(x)
+    registry.swap(new_bundle)
+    after = engine.predict(x)
+
+    # then
+    assert registry.current is new_bundle, """The new bundle is not in use"""
+    assert not np.array_equal(before, after) and np.all(
+        after == 1
+    ), """Predictions after the swap were not served by the new model"""
+    assert old_bundle.version != new_bundle.version, """The old bundle was modified"""
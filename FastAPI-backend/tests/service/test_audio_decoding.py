@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+import soundfile as sf
+
+from src.models.exceptions.exceptions import AudioFileTooLarge
+from src.service.audio_decoding import analysis_window, decode_audio
+
+SAMPLE_RATE = 8000
+
+
+@pytest.fixture
+def stereo_track(tmp_path):
+    # 10 seconds, the left channel is 0.5s and the right one is 0s
+    path = tmp_path / "track.wav"
+    signal = np.zeros((10 * SAMPLE_RATE, 2), dtype=np.float32)
+    signal[:, 0] = 0.5
+    sf.write(path, signal, SAMPLE_RATE)
+    return str(path)
+
+
+def test_analysis_window__given_window__returns_middle_frames():
+    assert analysis_window(100, 10, 4) == (30, 40)
+    assert analysis_window(100, 10, 20) == (0, 100), """Window longer than the track"""
+    assert analysis_window(100, 10, 0) == (0, 100), """Disabled window"""
+
+
+def test_decode_audio__given_stereo_track__returns_mono_signal(stereo_track):
+    # when
+    signal, sample_rate = decode_audio(stereo_track, 0, 0, 0)
+
+    # then
+    assert sample_rate == SAMPLE_RATE, """The sample rate of the file was changed"""
+    assert signal.shape == (10 * SAMPLE_RATE,), """The signal was not downmixed"""
+    assert np.allclose(signal, 0.25), """Channels were not averaged"""
+
+
+def test_decode_audio__given_window_and_sample_rate__returns_resampled_window(
+    stereo_track,
+):
+    # when
+    signal, sample_rate = decode_audio(stereo_track, 4000, 2, 0)
+
+    # then
+    assert sample_rate == 4000, """The signal was not resampled"""
+    assert signal.shape == (2 * 4000,), """Wrong length of the analysed window"""
+
+
+def test_decode_audio__given_too_long_track__raises_exception(stereo_track):
+    with pytest.raises(AudioFileTooLarge):
+        decode_audio(stereo_track, 0, 0, max_duration_seconds=5)
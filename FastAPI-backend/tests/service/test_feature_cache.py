@@ -0,0 +1,66 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.service.feature_cache import CachedFeatures, FeatureCache
+
+
+@pytest.fixture
+def features():
+    return CachedFeatures(
+        vector=np.arange(294, dtype=np.float32),
+        genre_distribution=np.full(16, 1 / 16, dtype=np.float32),
+    )
+
+
+def test_feature_cache__given_stored_entry__returns_it(tmp_path, features):
+    # given
+    cache = FeatureCache(str(tmp_path), max_bytes=1024 * 1024)
+    key = FeatureCache.key("content-hash", "v1")
+    cache.put(key, features)
+
+    # when
+    cached = cache.get(key)
+
+    # then
+    assert cached is not None, """Stored entry not found"""
+    assert np.array_equal(cached.vector, features.vector), """Wrong vector returned"""
+    assert cache.stats()["hit_rate"] == 1.0, """Hit not counted"""
+
+
+def test_feature_cache__given_other_artifacts_version__misses(tmp_path, features):
+    # given
+    cache = FeatureCache(str(tmp_path), max_bytes=1024 * 1024)
+    cache.put(FeatureCache.key("content-hash", "v1"), features)
+
+    # when
+    cached = cache.get(FeatureCache.key("content-hash", "v2"))
+
+    # then
+    assert cached is None, """Features of other artifacts returned"""
+    assert cache.stats()["misses"] == 1, """Miss not counted"""
+
+
+def test_feature_cache__given_full_cache__evicts_least_recently_used(
+    tmp_path, features
+):
+    # given
+    probe = FeatureCache(str(tmp_path / "probe"), max_bytes=1024 * 1024)
+    probe.put("probe", features)
+    entry_size = probe.stats()["size_bytes"]
+
+    cache = FeatureCache(str(tmp_path / "cache"), max_bytes=int(entry_size * 2.5))
+    keys = [FeatureCache.key(str(i), "v1") for i in range(3)]
+    cache.put(keys[0], features)
+    cache.put(keys[1], features)
+    # The second entry has not been used for a long time
+    os.utime(cache._path(keys[1]), (0, 0))
+
+    # when
+    cache.put(keys[2], features)
+
+    # then
+    assert cache.get(keys[1]) is None, """The least recently used entry was kept"""
+    assert cache.get(keys[0]) is not None, """A recently used entry was evicted"""
+    assert cache.get(keys[2]) is not None, """The new entry was evicted"""
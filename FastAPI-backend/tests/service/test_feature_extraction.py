@@ -0,0 +1,149 @@
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from src.service.feature_extraction import (
+    FeatureNode,
+    compute_feature_graph,
+    compute_feature_graph_from_loader,
+)
+from src.utils import constants
+from src.utils.feature_extraction import (
+    descriptor_statistics,
+    feature_stats,
+    feature_vector,
+    generate_columns,
+    generate_model_ordered_columns,
+)
+
+
+def counting_graph(calls: list[str]) -> tuple[FeatureNode, ...]:
+    def node(name, inputs, scale):
+        def compute(sr, *values):
+            calls.append(name)
+            return sum(values) * scale
+
+        return FeatureNode(name, inputs, compute)
+
+    return (
+        node("shared", ("audio",), 2),
+        node("first", ("shared",), 1),
+        node("second", ("shared",), 3),
+        node("unused", ("audio",), 1),
+    )
+
+
+def test_feature_graph__given_shared_intermediate__computes_it_once():
+    # given
+    calls: list[str] = []
+    audio = np.ones(1000, dtype=np.float32)
+
+    # when
+    values, report = compute_feature_graph(
+        audio, 22050, outputs=("first", "second"), graph=counting_graph(calls)
+    )
+
+    # then
+    assert calls == ["shared", "first", "second"], """Nodes computed more than once"""
+    assert values["first"][0] == 2 and values["second"][0] == 6, """Wrong values"""
+    assert set(values.keys()) == {"first", "second"}, """Intermediates returned"""
+
+
+def test_feature_graph__given_last_consumer_done__frees_intermediate():
+    # given
+    calls: list[str] = []
+    audio = np.ones(1000, dtype=np.float32)
+
+    # when
+    _, report = compute_feature_graph(
+        audio, 22050, outputs=("first", "second"), graph=counting_graph(calls)
+    )
+
+    # then
+    live_bytes = {stage.name: stage.live_bytes for stage in report.stages}
+    assert live_bytes["shared"] == audio.nbytes, """The signal was kept"""
+    # After "second" only the two outputs are alive
+    assert live_bytes["second"] == 2 * audio.nbytes, """Intermediates were kept"""
+    assert report.peak_live_bytes == 2 * audio.nbytes, """Wrong peak memory"""
+
+
+def test_feature_graph__given_loader__frees_signal_after_last_consumer():
+    # given
+    signal_refs: list[weakref.ref] = []
+    alive_during: dict[str, bool] = {}
+
+    def load_audio():
+        audio = np.ones(1000, dtype=np.float32)
+        signal_refs.append(weakref.ref(audio))
+        return audio, 22050
+
+    def node(name, inputs):
+        def compute(sr, *values):
+            alive_during[name] = signal_refs[0]() is not None
+            return sum(values)
+
+        return FeatureNode(name, inputs, compute)
+
+    graph = (node("shared", ("audio",)), node("first", ("shared",)))
+
+    # when
+    _, report = compute_feature_graph_from_loader(
+        load_audio, outputs=("first",), graph=graph
+    )
+
+    # then
+    assert alive_during == {
+        "shared": True,
+        "first": False,
+    }, """The signal was kept after its last consumer"""
+    assert report.stages[0].live_bytes == 1000 * 4, """The signal was not counted"""
+
+
+def test_feature_vector__given_descriptors__matches_pandas_statistics():
+    # given
+    rng = np.random.default_rng(0)
+    descriptors = {
+        name: rng.gamma(2.0, size=(size, 500)).astype(np.float32)
+        for name, size in constants.FEATURE_SIZES.items()
+    }
+    expected = pd.Series(index=generate_columns(), dtype=np.float32)
+    for name, values in descriptors.items():
+        expected = feature_stats(features=expected, name=name, values=values)
+
+    # when
+    vector = feature_vector(descriptors)
+
+    # then
+    assert vector.dtype == np.float32, """The vector should be float32"""
+    np.testing.assert_allclose(
+        vector,
+        expected[generate_model_ordered_columns()].values,
+        rtol=1e-4,
+        err_msg="""Statistics differ from the pandas implementation""",
+    )
+
+
+def test_descriptor_statistics__given_float32_near_constant_row__matches_scipy():
+    # given
+    # Differs from a constant row by one float32 step, e.g. the zero crossing rate of silence
+    row = np.full(500, 0.1, dtype=np.float32)
+    row[::2] = np.nextafter(row[0], np.float32(1))
+    values = row[None, :]
+    expected = feature_stats(
+        features=pd.Series(index=generate_columns(), dtype=np.float64),
+        name="zcr",
+        values=values,
+    )
+
+    # when
+    statistics = dict(zip(constants.FEATURE_STATISTICS, descriptor_statistics(values)))
+
+    # then
+    for statistic in ["skew", "kurtosis"]:
+        np.testing.assert_allclose(
+            statistics[statistic],
+            expected["zcr", statistic],
+            rtol=1e-4,
+            err_msg=f"""The {statistic} differs from scipy on a near-constant row""",
+        )
@@ -0,0 +1,148 @@
+import os
+import time
+from email.utils import formatdate
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from src.utils.file_responses import file_response
+
+CONTENT = bytes(range(256)) * 400
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / "track.mp3"
+    path.write_bytes(CONTENT)
+    return path
+
+
+@pytest.fixture
+def local_time_ahead_of_utc():
+    previous = os.environ.get("TZ")
+    os.environ["TZ"] = "Asia/Tokyo"
+    time.tzset()
+    yield
+    if previous is None:
+        del os.environ["TZ"]
+    else:
+        os.environ["TZ"] = previous
+    time.tzset()
+
+
+@pytest.fixture
+def client(path):
+    app = FastAPI()
+
+    @app.get("/audio")
+    async def audio(request: Request):
+        return await file_response(str(path), request.headers, media_type="audio/mpeg")
+
+    return TestClient(app)
+
+
+def test_file_response__given_no_range__sends_the_file_with_validators(client):
+    # when
+    response = client.get("/audio")
+
+    # then
+    assert response.status_code == 200, """Status code should be 200"""
+    assert response.content == CONTENT, """The file was not sent whole"""
+    assert response.headers["etag"].startswith('"'), """The ETag is not strong"""
+    assert "last-modified" in response.headers, """Last-Modified is missing"""
+    assert response.headers["accept-ranges"] == "bytes", """Ranges are not advertised"""
+    assert (
+        "max-age" in response.headers["cache-control"]
+    ), """Cache-Control is missing"""
+
+
+@pytest.mark.parametrize(
+    "byte_range, start, end",
+    [
+        ("bytes=100-199", 100, 199),
+        ("bytes=102000-", 102000, len(CONTENT) - 1),
+        ("bytes=-500", len(CONTENT) - 500, len(CONTENT) - 1),
+        ("bytes=0-999999", 0, len(CONTENT) - 1),
+    ],
+)
+def test_file_response__given_range__sends_partial_content(
+    client, byte_range, start, end
+):
+    # when
+    response = client.get("/audio", headers={"Range": byte_range})
+
+    # then
+    assert response.status_code == 206, """Status code should be 206"""
+    assert response.content == CONTENT[start : end + 1], """Wrong bytes were sent"""
+    assert (
+        response.headers["content-range"] == f"bytes {start}-{end}/{len(CONTENT)}"
+    ), """Wrong Content-Range"""
+    assert response.headers["content-length"] == str(
+        end - start + 1
+    ), """Wrong Content-Length"""
+
+
+def test_file_response__given_unsatisfiable_range__answers_416(client):
+    # when
+    response = client.get("/audio", headers={"Range": f"bytes={len(CONTENT)}-"})
+
+    # then
+    assert response.status_code == 416, """Status code should be 416"""
+    assert (
+        response.headers["content-range"] == f"bytes */{len(CONTENT)}"
+    ), """The size of the file was not sent"""
+
+
+@pytest.mark.parametrize("byte_range", ["bytes=500-100", "bytes=-", "items=0-9"])
+def test_file_response__given_invalid_range__sends_the_whole_file(client, byte_range):
+    # when
+    response = client.get("/audio", headers={"Range": byte_range})
+
+    # then
+    assert response.status_code == 200, """An invalid range was not ignored"""
+    assert response.content == CONTENT, """The file was not sent whole"""
+
+
+def test_file_response__given_matching_validators__answers_304(client):
+    # given
+    first = client.get("/audio")
+
+    # when
+    by_etag = client.get("/audio", headers={"If-None-Match": first.headers["etag"]})
+    by_date = client.get(
+        "/audio", headers={"If-Modified-Since": first.headers["last-modified"]}
+    )
+    stale = client.get("/audio", headers={"If-None-Match": '"other"'})
+
+    # then
+    assert by_etag.status_code == 304 and not by_etag.content, """ETag not honoured"""
+    assert by_date.status_code == 304, """Last-Modified not honoured"""
+    assert stale.status_code == 200, """A stale copy was not replaced"""
+
+
+def test_file_response__given_outdated_if_range__sends_the_whole_file(client):
+    # when
+    response = client.get(
+        "/audio", headers={"Range": "bytes=0-9", "If-Range": '"other"'}
+    )
+
+    # then
+    assert response.status_code == 200, """The range of another version was sent"""
+    assert response.content == CONTENT, """The file was not sent whole"""
+
+
+def test_file_response__given_if_modified_since_in_unknown_zone__reads_it_as_utc(
+    client, path, local_time_ahead_of_utc
+):
+    # given
+    # One hour after the modification, in the "-0000" zone
+    if_modified_since = formatdate(os.stat(path).st_mtime + 3600)
+
+    # when
+    response = client.get("/audio", headers={"If-Modified-Since": if_modified_since})
+
+    # then
+    assert (
+        response.status_code == 304
+    ), """A date in the "-0000" zone was read in the local time"""
@@ -0,0 +1,108 @@
+import asyncio
+import time
+
+import numpy as np
+
+from src.service.inference_engine import InferenceEngine
+
+
+class CountingModel:
+    def __init__(self):
+        self.batch_sizes: list[int] = []
+
+    def predict(self, x, verbose=0):
+        self.batch_sizes.append(len(x))
+        return np.repeat(x.sum(axis=1, keepdims=True), 2, axis=1)
+
+
+def test_inference_engine__given_concurrent_rows__batches_predictions():
+    # given
+    model = CountingModel()
+    engine = InferenceEngine(lambda: model, max_batch_size=4, max_wait_ms=50)
+    rows = [np.full(3, i, dtype=np.float32) for i in range(6)]
+
+    # when
+    async def run():
+        results = await asyncio.gather(*(engine.submit(row) for row in rows))
+        await engine.stop()
+        return results
+
+    results = asyncio.run(run())
+
+    # then
+    assert model.batch_sizes == [4, 2], """Rows were not grouped into batches"""
+    assert all(
+        result.tolist() == [3 * i, 3 * i] for i, result in enumerate(results)
+    ), """Predictions were not routed back to the rows they belong to"""
+
+
+def test_inference_engine__given_rows_for_different_models__predicts_separately():
+    # given
+    old_model, new_model = CountingModel(), CountingModel()
+    engine = InferenceEngine(lambda: new_model, max_batch_size=4, max_wait_ms=50)
+    row = np.ones(3, dtype=np.float32)
+
+    # when
+    async def run():
+        await asyncio.gather(
+            engine.submit(row, model=old_model),
+            engine.submit(row),
+            engine.submit(row),
+        )
+        await engine.stop()
+
+    asyncio.run(run())
+
+    # then
+    assert old_model.batch_sizes == [1], """Rows for the old model were mixed"""
+    assert new_model.batch_sizes == [2], """Rows for the new model were not batched"""
+
+
+def test_inference_engine__given_pending_rows__stop_cancels_them():
+    # given
+    class SlowModel(CountingModel):
+        def predict(self, x, verbose=0):
+            time.sleep(0.2)
+            return super().predict(x, verbose)
+
+    engine = InferenceEngine(SlowModel, max_batch_size=2, max_wait_ms=0)
+    rows = [np.ones(3, dtype=np.float32) for _ in range(6)]
+
+    # when
+    async def run():
+        submissions = [asyncio.create_task(engine.submit(row)) for row in rows]
+        await asyncio.sleep(0.05)
+        await engine.stop()
+        return await asyncio.wait_for(
+            asyncio.gather(*submissions, return_exceptions=True), timeout=1
+        )
+
+    results = asyncio.run(run())
+
+    # then
+    assert all(
+        isinstance(result, asyncio.CancelledError) for result in results
+    ), """Predictions pending at shutdown were left unresolved"""
+
+
+def test_inference_engine__given_stop_while_collecting__cancels_collected_rows():
+    # given
+    engine = InferenceEngine(CountingModel, max_batch_size=10, max_wait_ms=10_000)
+    rows = [np.ones(3, dtype=np.float32) for _ in range(3)]
+
+    # when
+    async def run():
+        submissions = [asyncio.create_task(engine.submit(row)) for row in rows]
+        # The worker took the rows off the queue, and waits for more
+        await asyncio.sleep(0.05)
+        await engine.stop()
+        return await asyncio.wait_for(
+            asyncio.gather(*submissions, return_exceptions=True), timeout=1
+        )
+
+    results = asyncio.run(run())
+
+    # then
+    assert all(
+        isinstance(result, asyncio.CancelledError) for result in results
+    ), """Rows collected in the unfinished batch were left unresolved"""
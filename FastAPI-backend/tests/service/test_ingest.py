@@ -0,0 +1,145 @@
+import asyncio
+import os
+
+import numpy as np
+import pytest
+
+from src.cli import ingest
+from src.models.enumerations import TrackFields
+from src.utils import constants
+
+
+class IdentityScaler:
+    def transform(self, x):
+        return x
+
+
+class FirstGenreModel:
+    def predict(self, x, verbose=0):
+        predictions = np.zeros((len(x), constants.NUMBER_OF_GENRES))
+        predictions[:, 0] = 1
+        return predictions
+
+
+class FakeBundle:
+    scaler = IdentityScaler()
+    model = FirstGenreModel()
+
+
+class FakePool:
+    """Runs the analysis in process, and fails on the files named `broken`."""
+
+    max_workers = 2
+
+    def __init__(self, *args):
+        self.shut_down = False
+
+    async def run(self, fn, path):
+        if "broken" in path:
+            raise ValueError("Corrupted file")
+        return np.full(3, len(path), dtype=np.float32), 60
+
+    def shutdown(self):
+        self.shut_down = True
+
+
+@pytest.fixture
+def audio_dir(tmp_path):
+    directory = tmp_path / "audio"
+    (directory / "album").mkdir(parents=True)
+    for name in ["1.mp3", "2.mp3", "album/3.flac", "album/4.wav", "5.ogg", "cover.jpg"]:
+        (directory / name).touch()
+    return str(directory)
+
+
+@pytest.fixture
+def upserted(monkeypatch):
+    batches: list[list] = []
+
+    async def upsert_tracks(points, collection_name):
+        batches.append(points)
+
+    async def close():
+        pass
+
+    monkeypatch.setattr(ingest.tracks_repository, "upsert_tracks", upsert_tracks)
+    monkeypatch.setattr(ingest.tracks_repository, "close", close)
+    monkeypatch.setattr(ingest.artifact_registry, "_bundle", FakeBundle())
+    monkeypatch.setattr(ingest, "ExtractionPool", FakePool)
+    return batches
+
+
+def test_ingest__given_checkpoint__upserts_remaining_files_in_batches(
+    audio_dir, upserted, tmp_path
+):
+    # given
+    checkpoint = str(tmp_path / "ingest.checkpoint")
+    ingest.append_checkpoint(checkpoint, ["1.mp3"])
+
+    # when
+    asyncio.run(ingest.ingest(audio_dir, checkpoint, batch_size=2))
+
+    # then
+    assert [len(batch) for batch in upserted] == [
+        2,
+        2,
+    ], """Files were not upserted in batches of `batch_size`"""
+    points = [point for batch in upserted for point in batch]
+    assert sorted(point.id for point in points) == [
+        2,
+        3,
+        4,
+        5,
+    ], """Checkpointed or non audio files were ingested"""
+    assert all(
+        point.payload[TrackFields.GENRE.value] == constants.CLASS_NAMES_MODEL_ORDER[0]
+        and point.payload[TrackFields.TRACK_PATH.value].startswith(audio_dir)
+        for point in points
+    ), """Payloads were not built from the predictions and the paths"""
+    assert ingest.read_checkpoint(checkpoint) == {
+        "1.mp3",
+        "2.mp3",
+        os.path.join("album", "3.flac"),
+        os.path.join("album", "4.wav"),
+        "5.ogg",
+    }, """Ingested files were not checkpointed"""
+
+
+def test_ingest__given_failing_file__skips_it_and_does_not_checkpoint_it(
+    audio_dir, upserted, tmp_path
+):
+    # given
+    checkpoint = str(tmp_path / "ingest.checkpoint")
+    open(os.path.join(audio_dir, "broken.mp3"), "wb").close()
+
+    # when
+    asyncio.run(ingest.ingest(audio_dir, checkpoint, batch_size=10))
+
+    # then
+    assert (
+        len(upserted) == 1 and len(upserted[0]) == 5
+    ), """The failure stopped the run"""
+    assert "broken.mp3" not in ingest.read_checkpoint(
+        checkpoint
+    ), """A file that failed was checkpointed, it would never be retried"""
+
+
+def test_ingest__given_failing_upsert__keeps_batch_out_of_checkpoint(
+    audio_dir, upserted, tmp_path, monkeypatch
+):
+    # given
+    checkpoint = str(tmp_path / "ingest.checkpoint")
+
+    async def failing_upsert(points, collection_name):
+        raise ConnectionError("Qdrant is down")
+
+    monkeypatch.setattr(ingest.tracks_repository, "upsert_tracks", failing_upsert)
+
+    # when
+    with pytest.raises(ConnectionError):
+        asyncio.run(ingest.ingest(audio_dir, checkpoint, batch_size=2))
+
+    # then
+    assert (
+        ingest.read_checkpoint(checkpoint) == set()
+    ), """Files that were not upserted were checkpointed"""
@@ -0,0 +1,47 @@
+import numpy as np
+
+from src.cli.export_model import export_model
+from src.service.artifact_registry import load_keras_model
+from src.service.numpy_mlp import NumpyMLP, from_keras_model
+from src.utils import constants
+
+
+def test_numpy_mlp__given_exported_model__matches_keras_output(tmp_path):
+    # given
+    path = str(tmp_path / "model.npz")
+    export_model(constants.MODEL_SERIAZLIATION_PATH, path)
+    keras_model = load_keras_model(constants.MODEL_SERIAZLIATION_PATH)
+    numpy_model = NumpyMLP.load(path)
+    x = np.random.default_rng(42).standard_normal(
+        (64, constants.EMBEDDINGS_DIMENSIONALITY), dtype=np.float32
+    )
+
+    # when
+    expected = keras_model.predict(x, verbose=0)
+    actual = numpy_model.predict(x)
+
+    # then
+    assert actual.shape == (64, constants.NUMBER_OF_GENRES), """Wrong output shape"""
+    assert np.allclose(actual, expected, atol=1e-5), """Outputs differ from Keras"""
+    assert np.array_equal(
+        actual.argmax(axis=1), expected.argmax(axis=1)
+    ), """Predicted genres differ from Keras"""
+
+
+def test_numpy_mlp__given_save_and_load__keeps_layers(tmp_path):
+    # given
+    numpy_model = from_keras_model(load_keras_model(constants.MODEL_SERIAZLIATION_PATH))
+    path = str(tmp_path / "model.npz")
+
+    # when
+    numpy_model.save(path)
+    loaded = NumpyMLP.load(path)
+
+    # then
+    assert [layer.activation for layer in loaded.layers] == [
+        layer.activation for layer in numpy_model.layers
+    ], """Activations were not kept"""
+    assert all(
+        np.array_equal(a.kernel, b.kernel)
+        for a, b in zip(loaded.layers, numpy_model.layers)
+    ), """Weights were not kept"""
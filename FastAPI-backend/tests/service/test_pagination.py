@@ -0,0 +1,19 @@
+import pytest
+
+from src.models.exceptions.exceptions import InvalidCursor
+from src.utils.pagination import decode_cursor, encode_cursor
+
+
+@pytest.mark.parametrize("offset", [0, 451, "6f1c0a5e-8b0a-4c3e-9d6b-2a1f4e3b7c90"])
+def test_cursor__given_offset__round_trips(offset):
+    assert decode_cursor(encode_cursor(offset)) == offset, """Offset changed"""
+
+
+def test_cursor__given_last_page__is_none():
+    assert encode_cursor(None) is None, """Cursor issued after the last page"""
+
+
+@pytest.mark.parametrize("cursor", ["garbage", "W10=", "eyJvIjogdHJ1ZX0="])
+def test_decode_cursor__given_foreign_cursor__raises_exception(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
@@ -0,0 +1,142 @@
+import asyncio
+
+import numpy as np
+import pytest
+from qdrant_client import models
+from qdrant_client.http.models.models import Record, ScoredPoint
+
+from src.models.enumerations import TrackFields
+from src.service import playlist_enrichment
+from src.service.playlist_enrichment import select_diverse
+
+VECTORS = {
+    1: [0.0, 0.0],
+    2: [10.0, 0.0],
+    11: [1.0, 0.0],
+    12: [1.01, 0.0],
+    13: [0.0, 1.5],
+    21: [11.0, 0.0],
+}
+
+
+def payload(track_id: int) -> dict:
+    return {
+        TrackFields.TRACK_ID.value: track_id,
+        TrackFields.TRACK_TITLE.value: f"Track {track_id}",
+        TrackFields.ARTIST_NAME.value: "Artist",
+        TrackFields.TRACK_DURATION.value: 60,
+        TrackFields.GENRE.value: "Rock",
+        TrackFields.TRACK_LISTENS.value: 0,
+    }
+
+
+@pytest.fixture
+def euclidean_collection(monkeypatch):
+    """Tracks compared by Euclidean distance, where 12 is a near duplicate of 11."""
+
+    candidates = {1: [11, 12, 13, 2], 2: [21, 1]}
+
+    async def get_tracks_by_ids(track_ids, with_vectors=False):
+        return [
+            Record(
+                id=i,
+                payload=payload(i),
+                vector=VECTORS[i] if with_vectors else None,
+            )
+            for i in track_ids
+        ]
+
+    async def get_most_similar_tracks_batch_by_ids(track_ids, limit, **kwargs):
+        return [
+            [
+                ScoredPoint(
+                    id=i,
+                    version=0,
+                    score=float(np.linalg.norm(np.subtract(VECTORS[i], VECTORS[t]))),
+                    vector=VECTORS[i],
+                )
+                for i in candidates[t][:limit]
+            ]
+            for t in track_ids
+        ]
+
+    async def get_distance():
+        return models.Distance.EUCLID
+
+    repository = playlist_enrichment.tracks_repository
+    monkeypatch.setattr(repository, "get_tracks_by_ids", get_tracks_by_ids)
+    monkeypatch.setattr(
+        repository,
+        "get_most_similar_tracks_batch_by_ids",
+        get_most_similar_tracks_batch_by_ids,
+    )
+    monkeypatch.setattr(repository, "get_distance", get_distance)
+
+
+def test_select_diverse__given_no_diversity__selects_by_relevance():
+    # given
+    vectors = np.eye(3)
+    relevance = np.array([0.2, 0.9, 0.5])
+
+    # when
+    selected = select_diverse(vectors, relevance, k=2, diversity=0.0)
+
+    # then
+    assert selected == [1, 2], """Items not selected by decreasing relevance"""
+
+
+def test_select_diverse__given_near_duplicates__skips_them():
+    # given
+    vectors = np.array([[1.0, 0.0], [0.999, 0.0447], [0.0, 1.0]])
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    relevance = np.array([1.0, 0.99, 0.8])
+
+    # when
+    selected = select_diverse(vectors, relevance, k=2, diversity=0.5)
+
+    # then
+    assert selected == [0, 2], """A near duplicate of a selected item was selected"""
+
+
+def test_select_diverse__given_k_larger_than_items__selects_all_once():
+    # given
+    vectors = np.eye(2)
+
+    # when
+    selected = select_diverse(vectors, np.ones(2), k=5, diversity=0.3)
+
+    # then
+    assert sorted(selected) == [0, 1], """Items were selected more than once"""
+
+
+def test_enrich__given_euclidean_collection__adds_diverse_tracks_after_closest_seed(
+    euclidean_collection,
+):
+    # when
+    playlist = asyncio.run(
+        playlist_enrichment.enrich(
+            [1, 2], number_of_additions=3, diversity=0.5, randomness=0
+        )
+    )
+
+    # then
+    assert [track.track_id for track in playlist] == [
+        1,
+        11,
+        13,
+        2,
+        21,
+    ], """Additions were not diverse, or not placed after their closest playlist track"""
+
+
+def test_similarities__given_euclidean_metric__negates_distances():
+    # given
+    a = np.array([[0.0, 0.0], [3.0, 4.0]])
+
+    # when
+    similarity = playlist_enrichment.similarities(a, a, models.Distance.EUCLID)
+
+    # then
+    assert np.allclose(
+        similarity, [[0, -5], [-5, 0]]
+    ), """Euclidean similarities are not the negated distances"""
@@ -0,0 +1,62 @@
+import numpy as np
+
+from src.utils.projection import Projection
+
+
+def correlated_vectors(n: int = 500) -> np.ndarray:
+    # 8 latent factors spread over 64 correlated features, like the statistics of a band
+    rng = np.random.default_rng(0)
+    mixing = rng.normal(size=(8, 64))
+    return (
+        rng.normal(size=(n, 8)) @ mixing + rng.normal(scale=0.01, size=(n, 64))
+    ).astype(np.float32)
+
+
+def test_fit__given_correlated_features__keeps_the_variance_in_few_dimensions():
+    # given
+    vectors = correlated_vectors()
+
+    # when
+    projection = Projection.fit(vectors, dimensions=8)
+    projected = projection.transform(vectors)
+
+    # then
+    assert projected.shape == (500, 8), """Wrong shape of the projected vectors"""
+    assert (
+        projection.explained_variance_ratio > 0.99
+    ), """The projection lost the variance of the latent factors"""
+    distances = np.linalg.norm(vectors[1:] - vectors[0], axis=1)
+    projected_distances = np.linalg.norm(projected[1:] - projected[0], axis=1)
+    assert np.allclose(
+        distances, projected_distances, rtol=1e-2, atol=1e-2
+    ), """The projection does not keep the distances"""
+
+
+def test_fit__given_whiten__scales_the_components_to_unit_variance():
+    # given
+    vectors = correlated_vectors()
+
+    # when
+    projected = Projection.fit(vectors, dimensions=4, whiten=True).transform(vectors)
+
+    # then
+    assert np.allclose(
+        projected.var(axis=0, ddof=1), 1, atol=1e-3
+    ), """The whitened components do not have a unit variance"""
+
+
+def test_projection__given_save_and_load__projects_the_same(tmp_path):
+    # given
+    vectors = correlated_vectors()
+    projection = Projection.fit(vectors, dimensions=4, normalize=True)
+    path = tmp_path / "projection.npz"
+
+    # when
+    projection.save(path)
+    loaded = Projection.load(path)
+
+    # then
+    assert loaded.normalize and not loaded.whiten, """The options were not kept"""
+    assert np.allclose(
+        loaded.transform(vectors[0]), projection.transform(vectors[0])
+    ), """The loaded projection projects differently"""
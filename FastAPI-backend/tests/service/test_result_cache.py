@@ -0,0 +1,203 @@
+import asyncio
+
+import pytest
+
+from src.service.result_cache import _MISSING, MemoryStore, RedisStore, ResultCache
+
+
+class FakeRedis:
+    """The subset of the `redis.asyncio` client used by the Redis store, in memory."""
+
+    def __init__(self):
+        self.values: dict[str, bytes] = {}
+        self.expirations: dict[str, int] = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, px=None):
+        self.values[key] = value
+        self.expirations[key] = px
+
+    async def scan_iter(self, match, count=None):
+        prefix = match.rstrip("*")
+        for key in list(self.values):
+            if key.startswith(prefix):
+                yield key
+
+    async def unlink(self, key):
+        self.values.pop(key, None)
+        self.expirations.pop(key, None)
+
+
+class CountingLoader:
+    def __init__(self, value="value", delay=0.0, error=None):
+        self.calls = 0
+        self.value = value
+        self.delay = delay
+        self.error = error
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.value
+
+
+def test_result_cache__given_concurrent_misses__loads_once():
+    # given
+    cache = ResultCache(MemoryStore(max_entries=10, ttl_seconds=60))
+    loader = CountingLoader(delay=0.05)
+
+    # when
+    async def run():
+        return await asyncio.gather(
+            *(cache.get_or_load(("track", 1), loader) for _ in range(5))
+        )
+
+    results = asyncio.run(run())
+
+    # then
+    assert results == ["value"] * 5, """Waiters got a different value"""
+    assert loader.calls == 1, """Concurrent misses were not coalesced"""
+    assert cache.stats()["coalesced"] == 4, """Coalesced lookups not counted"""
+
+
+def test_result_cache__given_full_store__evicts_least_recently_used():
+    # given
+    cache = ResultCache(MemoryStore(max_entries=2, ttl_seconds=60))
+    loaders = {i: CountingLoader(value=i) for i in range(3)}
+
+    # when
+    async def run():
+        await cache.get_or_load(("track", 0), loaders[0])
+        await cache.get_or_load(("track", 1), loaders[1])
+        await cache.get_or_load(("track", 0), loaders[0])
+        await cache.get_or_load(("track", 2), loaders[2])
+        await cache.get_or_load(("track", 0), loaders[0])
+        await cache.get_or_load(("track", 1), loaders[1])
+
+    asyncio.run(run())
+
+    # then
+    assert loaders[0].calls == 1, """A recently used entry was evicted"""
+    assert loaders[1].calls == 2, """The least recently used entry was kept"""
+
+
+def test_result_cache__given_expired_entry__reloads_it():
+    # given
+    cache = ResultCache(MemoryStore(max_entries=10, ttl_seconds=0))
+    loader = CountingLoader()
+
+    # when
+    async def run():
+        await cache.get_or_load(("track", 1), loader)
+        await cache.get_or_load(("track", 1), loader)
+
+    asyncio.run(run())
+
+    # then
+    assert loader.calls == 2, """An expired entry was returned"""
+
+
+def test_result_cache__given_failed_load__does_not_cache_it():
+    # given
+    cache = ResultCache(MemoryStore(max_entries=10, ttl_seconds=60))
+    failing = CountingLoader(error=KeyError("missing"))
+    loader = CountingLoader()
+
+    # when
+    async def run():
+        with pytest.raises(KeyError):
+            await cache.get_or_load(("track", 1), failing)
+        return await cache.get_or_load(("track", 1), loader)
+
+    result = asyncio.run(run())
+
+    # then
+    assert result == "value" and loader.calls == 1, """The failure was cached"""
+
+
+def test_result_cache__given_invalidation_while_loading__does_not_cache_stale_value():
+    # given
+    cache = ResultCache(MemoryStore(max_entries=10, ttl_seconds=60))
+    stale = CountingLoader(value="stale", delay=0.05)
+    fresh = CountingLoader(value="fresh")
+
+    # when
+    async def run():
+        loading = asyncio.ensure_future(cache.get_or_load(("track", 1), stale))
+        await asyncio.sleep(0.01)
+        await cache.invalidate()
+        await loading
+        return await cache.get_or_load(("track", 1), fresh)
+
+    result = asyncio.run(run())
+
+    # then
+    assert result == "fresh", """A value loaded before the invalidation was cached"""
+
+
+def test_result_cache__given_modified_result__does_not_modify_cache():
+    # given
+    cache = ResultCache(MemoryStore(max_entries=10, ttl_seconds=60))
+    loader = CountingLoader(value=[1, 2], delay=0.05)
+
+    # when
+    async def run():
+        first, second = await asyncio.gather(
+            cache.get_or_load(("track", 1), loader),
+            cache.get_or_load(("track", 1), loader),
+        )
+        first.append(3)
+        second.append(4)
+        return await cache.get_or_load(("track", 1), loader)
+
+    cached = asyncio.run(run())
+
+    # then
+    assert cached == [1, 2], """Callers got a reference to the cached value"""
+
+
+def test_redis_store__given_value__round_trips_with_ttl():
+    # given
+    client = FakeRedis()
+    store = RedisStore("redis://unused", ttl_seconds=1.5, client=client)
+
+    # when
+    async def run():
+        missing = await store.get("key")
+        await store.set("key", {"tracks": [1, 2]})
+        return missing, await store.get("key")
+
+    missing, value = asyncio.run(run())
+
+    # then
+    assert missing is _MISSING, """A missing key was not reported as a miss"""
+    assert value == {"tracks": [1, 2]}, """The value did not round trip"""
+    assert client.expirations == {
+        "result-cache:key": 1500
+    }, """The key was not prefixed, or not stored with the TTL in milliseconds"""
+
+
+def test_redis_store__given_other_keys__clears_only_its_prefix():
+    # given
+    client = FakeRedis()
+    client.values["other:key"] = b"kept"
+    store = RedisStore("redis://unused", ttl_seconds=60, client=client)
+
+    # when
+    async def run():
+        await store.set("first", 1)
+        await store.set("second", 2)
+        await store.clear()
+        return await store.get("first")
+
+    value = asyncio.run(run())
+
+    # then
+    assert value is _MISSING, """The cached values were not cleared"""
+    assert client.values == {
+        "other:key": b"kept"
+    }, """Keys outside of the prefix of the store were deleted"""
@@ -0,0 +1,61 @@
+import json
+
+import pytest
+from pydantic import ValidationError
+from qdrant_client.http.models.models import Record, ScoredPoint
+
+from src.utils import model_creation
+from src.utils.model_creation import record_to_response_track, record_to_track
+from src.utils.serialization import dumps
+
+PAYLOAD = {
+    "track_id": 7,
+    "meta_track_title": "title",
+    "meta_artist_name": "artist",
+    "meta_track_duration": 180,
+    "meta_genre_top": "Rock",
+    "meta_track_listens": 1000,
+}
+
+
+def test_dumps__given_unvalidated_tracks__matches_validated_json():
+    # given
+    record = Record(id=7, payload=PAYLOAD)
+    scored_point = ScoredPoint(id=7, version=0, score=0.5, payload=PAYLOAD)
+
+    # when
+    fast = dumps(
+        (
+            [record_to_track(record, validate=False)],
+            [record_to_track(scored_point, validate=False)],
+            None,
+        )
+    )
+
+    # then
+    expected = [
+        [json.loads(record_to_track(record, validate=True).json())],
+        [json.loads(record_to_track(scored_point, validate=True).json())],
+        None,
+    ]
+    assert (
+        json.loads(fast) == expected
+    ), """The fast serialization differs from the serialization of the validated models"""
+
+
+def test_record_to_track__given_fast_serialization__only_skips_validation_of_responses(
+    monkeypatch,
+):
+    # given
+    monkeypatch.setattr(model_creation, "FAST_SERIALIZATION", True)
+    record = Record(id=7, payload={**PAYLOAD, "meta_track_listens": "many"})
+
+    # when
+    track = record_to_response_track(record)
+
+    # then
+    assert (
+        track.track_listens == "many"
+    ), """The payload of a response track was validated in the fast serialization mode"""
+    with pytest.raises(ValidationError):
+        record_to_track(record)
@@ -0,0 +1,98 @@
+import os
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from src.service import track_artifacts
+from src.service.track_artifacts import (
+    WAVEFORM_HEADER,
+    build_track_artifacts,
+    encode_waveform,
+    read_artifacts,
+)
+
+
+@pytest.fixture
+def audio_path(tmp_path):
+    sample_rate = 44100
+    t = np.arange(sample_rate * 40) / sample_rate
+    signal = 0.5 * np.sin(2 * np.pi * 440 * t) * (t < 20)
+    path = tmp_path / "track.wav"
+    sf.write(path, signal.astype(np.float32), sample_rate)
+    return str(path)
+
+
+def test_encode_waveform__given_signal__encodes_min_and_max_per_block():
+    # given
+    signal = np.array([0.0, 0.5, -1.0, 0.25, 1.0], dtype=np.float32)
+
+    # when
+    encoded = encode_waveform(signal, sample_rate=8000, samples_per_peak=2, bits=8)
+
+    # then
+    version, flags, sample_rate, samples_per_peak, length = WAVEFORM_HEADER.unpack(
+        encoded[: WAVEFORM_HEADER.size]
+    )
+    peaks = np.frombuffer(encoded[WAVEFORM_HEADER.size :], dtype=np.int8)
+    assert (version, flags, sample_rate, samples_per_peak, length) == (
+        1,
+        1,
+        8000,
+        2,
+        3,
+    ), """Wrong header"""
+    assert peaks.tolist() == [0, 64, -127, 32, 0, 127], """Wrong peaks"""
+
+
+def test_build_track_artifacts__given_track__writes_preview_and_waveform(audio_path):
+    # when
+    artifacts = build_track_artifacts(audio_path)
+
+    # then
+    assert read_artifacts(audio_path) == artifacts, """The manifest was not written"""
+    assert (
+        artifacts.content_hash[:16] in artifacts.preview
+    ), """The preview is not named after the contents of the track"""
+    preview = sf.info(artifacts.path(audio_path, "preview"))
+    assert (
+        preview.samplerate == track_artifacts.PREVIEW_SAMPLE_RATE
+        and preview.channels == 1
+        and preview.duration <= track_artifacts.PREVIEW_SECONDS + 0.5
+    ), """The preview is not a short mono clip"""
+    assert (
+        os.path.getsize(artifacts.path(audio_path, "preview"))
+        < os.path.getsize(audio_path) / 10
+    ), """The preview is not compressed"""
+
+    waveform = open(artifacts.path(audio_path, "waveform"), "rb").read()
+    peaks = np.frombuffer(waveform[WAVEFORM_HEADER.size :], dtype=np.int8)
+    half = len(peaks) // 2
+    assert 60 <= peaks[:half].max() <= 64, """The peaks of the tone are wrong"""
+    assert peaks[-10:].tolist() == [0] * 10, """The peaks of the silence are wrong"""
+
+
+def test_build_track_artifacts__given_changed_track__replaces_the_artifacts(
+    audio_path,
+):
+    # given
+    first = build_track_artifacts(audio_path)
+    preview_mtime = os.stat(first.path(audio_path, "preview")).st_mtime_ns
+
+    # when
+    unchanged = build_track_artifacts(audio_path)
+    unchanged_mtime = os.stat(unchanged.path(audio_path, "preview")).st_mtime_ns
+    sf.write(audio_path, np.zeros(44100, dtype=np.float32), 44100)
+    changed = build_track_artifacts(audio_path)
+
+    # then
+    assert (
+        unchanged == first and unchanged_mtime == preview_mtime
+    ), """The artifacts of an unchanged track were rebuilt"""
+    assert changed.content_hash != first.content_hash, """The change was missed"""
+    assert not os.path.exists(
+        first.path(audio_path, "preview")
+    ), """The outdated preview was not deleted"""
+    assert os.path.exists(
+        changed.path(audio_path, "waveform")
+    ), """The new waveform was not written"""
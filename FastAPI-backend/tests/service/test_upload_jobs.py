@@ -0,0 +1,206 @@
+import asyncio
+
+import pytest
+
+from src.models.enumerations import JobStatus
+from src.models.exceptions.exceptions import AudioFileTooLarge, JobQueueFull
+from src.models.models import UploadedTrack
+from src.service.upload_jobs import UploadJobQueue
+
+
+def uploaded_track(name: str) -> UploadedTrack:
+    return UploadedTrack(most_similar_tracks=[], genre_prediction={name: 1.0})
+
+
+def test_upload_job_queue__given_priorities__runs_highest_priority_first():
+    # given
+    queue = UploadJobQueue(workers=1)
+    order: list[str] = []
+
+    def job(name: str):
+        async def run():
+            order.append(name)
+            return uploaded_track(name)
+
+        return run
+
+    # when
+    async def run():
+        jobs = [
+            queue.submit(job("low"), priority=0),
+            queue.submit(job("high"), priority=9),
+            queue.submit(job("medium"), priority=5),
+            queue.submit(job("low again"), priority=0),
+        ]
+        finished = [await queue.wait(j.job_id, timeout=1) for j in jobs]
+        await queue.stop()
+        return finished
+
+    finished = asyncio.run(run())
+
+    # then
+    assert order == [
+        "high",
+        "medium",
+        "low",
+        "low again",
+    ], """Jobs did not run by priority, then in the order of submission"""
+    assert all(
+        j.status == JobStatus.SUCCEEDED and j.result is not None for j in finished
+    ), """Finished jobs did not carry their result"""
+
+
+def test_upload_job_queue__given_failing_job__reports_error_and_expires():
+    # given
+    queue = UploadJobQueue(workers=2, result_ttl_seconds=0.05)
+
+    async def fail():
+        raise AudioFileTooLarge()
+
+    # when
+    async def run():
+        job = queue.submit(fail)
+        failed = await queue.wait(job.job_id, timeout=1)
+        await asyncio.sleep(0.1)
+        expired = queue.get(job.job_id)
+        await queue.stop()
+        return failed, expired
+
+    failed, expired = asyncio.run(run())
+
+    # then
+    assert (
+        failed is not None and failed.status == JobStatus.FAILED
+    ), """The failing job was not marked as failed"""
+    assert failed.error == AudioFileTooLarge().message, """The error was not reported"""
+    assert expired is None, """The finished job was kept after its TTL"""
+
+
+def test_upload_job_queue__given_full_queue__rejects_and_cleans_up_on_stop():
+    # given
+    queue = UploadJobQueue(workers=1, max_queued=2)
+    cleaned: list[int] = []
+
+    # when
+    async def run():
+        blocker = asyncio.Event()
+
+        async def block():
+            await blocker.wait()
+            return uploaded_track("blocked")
+
+        running = queue.submit(block)
+        # Lets the worker take the first job off the queue
+        await asyncio.sleep(0)
+        waiting = [
+            queue.submit(block, cleanup=lambda i=i: cleaned.append(i)) for i in range(2)
+        ]
+        with pytest.raises(JobQueueFull):
+            queue.submit(block)
+        pending = (await queue.wait(waiting[0].job_id, timeout=0.01)).status
+        await queue.stop()
+        return running, pending, [queue.get(j.job_id) for j in waiting]
+
+    running, pending, stopped = asyncio.run(run())
+
+    # then
+    assert (
+        pending == JobStatus.QUEUED
+    ), """The job did not wait behind the running one"""
+    assert running.status == JobStatus.FAILED, """The running job was not stopped"""
+    assert sorted(cleaned) == [0, 1], """Jobs that never ran were not cleaned up"""
+    assert all(
+        j is not None and j.status == JobStatus.FAILED for j in stopped
+    ), """Jobs that never ran were not marked as failed"""
+
+
+def test_upload_job_queue__given_failing_cleanup__stops_the_other_jobs():
+    # given
+    queue = UploadJobQueue(workers=1)
+    cleaned: list[int] = []
+
+    def cleanup(i: int):
+        if i == 0:
+            raise FileNotFoundError("Already deleted")
+        cleaned.append(i)
+
+    # when
+    async def run():
+        blocker = asyncio.Event()
+
+        async def block():
+            await blocker.wait()
+            return uploaded_track("blocked")
+
+        queue.submit(block)
+        await asyncio.sleep(0)
+        waiting = [
+            queue.submit(block, cleanup=lambda i=i: cleanup(i)) for i in range(3)
+        ]
+        await queue.stop()
+        return [queue.get(j.job_id) for j in waiting]
+
+    stopped = asyncio.run(run())
+
+    # then
+    assert cleaned == [1, 2], """A failed cleanup aborted the shutdown"""
+    assert all(
+        j is not None and j.status == JobStatus.FAILED for j in stopped
+    ), """Jobs that never ran were not marked as failed"""
+
+
+def test_upload_job_queue__given_new_event_loop__fails_jobs_left_in_old_queue():
+    # given
+    queue = UploadJobQueue(workers=1)
+    cleaned: list[str] = []
+
+    async def block():
+        await asyncio.Event().wait()
+        return uploaded_track("blocked")
+
+    async def submit():
+        queue.submit(block)
+        await asyncio.sleep(0)
+        return queue.submit(block, cleanup=lambda: cleaned.append("left"))
+
+    # The loop ends with the second job still queued
+    left = asyncio.run(submit())
+
+    # when
+    async def restart():
+        await queue.start()
+        stopped = queue.get(left.job_id)
+        await queue.stop()
+        return stopped
+
+    stopped = asyncio.run(restart())
+
+    # then
+    assert (
+        stopped is not None and stopped.status == JobStatus.FAILED
+    ), """The job left in the queue of the old loop was never finished"""
+    assert cleaned == ["left"], """The job left in the old queue was not cleaned up"""
+
+
+def test_upload_job_queue__given_expired_jobs__does_not_count_them():
+    # given
+    queue = UploadJobQueue(workers=1, result_ttl_seconds=0.05)
+
+    async def succeed():
+        return uploaded_track("done")
+
+    # when
+    async def run():
+        job = queue.submit(succeed)
+        await queue.wait(job.job_id, timeout=1)
+        await asyncio.sleep(0.1)
+        stats = queue.stats()
+        await queue.stop()
+        return stats
+
+    stats = asyncio.run(run())
+
+    # then
+    assert (
+        stats[JobStatus.SUCCEEDED.value] == 0
+    ), """Expired jobs were counted in the stats"""
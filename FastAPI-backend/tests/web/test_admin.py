@@ -0,0 +1,92 @@
+from dataclasses import dataclass
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.service.artifact_registry import artifact_registry
+from src.service.result_cache import result_cache
+from src.utils import admin_auth
+
+client = TestClient(app)
+
+
+@dataclass(frozen=True)
+class FakeBundle:
+    version: str
+
+
+@pytest.fixture
+def admin_token(monkeypatch):
+    monkeypatch.setattr(admin_auth, "ADMIN_TOKEN", "secret")
+    return "secret"
+
+
+@pytest.mark.parametrize("headers", [{}, {"X-Admin-Token": "wrong"}])
+def test_reload_artifacts__given_missing_or_wrong_token__is_forbidden(
+    admin_token, monkeypatch, headers
+):
+    # given
+    monkeypatch.setattr(artifact_registry, "reload", lambda: FakeBundle("new"))
+
+    # when
+    response = client.post("/artifacts/reload", headers=headers)
+
+    # then
+    assert response.status_code == 403, """The reload was not protected"""
+
+
+def test_reload_artifacts__given_no_configured_token__is_disabled(monkeypatch):
+    # given
+    monkeypatch.setattr(admin_auth, "ADMIN_TOKEN", "")
+    monkeypatch.setattr(artifact_registry, "reload", lambda: FakeBundle("new"))
+
+    # when
+    response = client.post("/artifacts/reload", headers={"X-Admin-Token": ""})
+
+    # then
+    assert response.status_code == 403, """The reload was enabled without a token"""
+
+
+def test_reload_artifacts__given_token__reloads(admin_token, monkeypatch):
+    # given
+    monkeypatch.setattr(artifact_registry, "reload", lambda: FakeBundle("new"))
+
+    # when
+    response = client.post("/artifacts/reload", headers={"X-Admin-Token": admin_token})
+
+    # then
+    assert response.status_code == 200
+    assert response.json() == {"version": "new"}, """The new version was not reported"""
+
+
+def test_reload_artifacts__given_token__invalidates_result_cache(
+    admin_token, monkeypatch
+):
+    # given
+    monkeypatch.setattr(artifact_registry, "reload", lambda: FakeBundle("new"))
+    generation = result_cache.stats()["generation"]
+
+    # when
+    client.post("/artifacts/reload", headers={"X-Admin-Token": admin_token})
+
+    # then
+    assert (
+        result_cache.stats()["generation"] == generation + 1
+    ), """Results of the previous artifacts were still served from the cache"""
+
+
+@pytest.mark.parametrize(
+    "headers, status_code",
+    [({}, 403), ({"X-Admin-Token": "wrong"}, 403), ({"X-Admin-Token": "secret"}, 204)],
+)
+def test_invalidate_result_cache__given_token__requires_it(
+    admin_token, headers, status_code
+):
+    # when
+    response = client.post("/tracks-library/cache/invalidate", headers=headers)
+
+    # then
+    assert (
+        response.status_code == status_code
+    ), """The cache invalidation was not protected by the admin token"""
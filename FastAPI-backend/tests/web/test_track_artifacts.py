@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+import soundfile as sf
+from fastapi.testclient import TestClient
+from qdrant_client.http.models.models import Record
+
+from src.main import app
+from src.models.enumerations import TrackFields
+from src.models.exceptions.exceptions import DatabaseError
+from src.service import track_operations
+from src.service.result_cache import create_result_cache
+from src.service.track_artifacts import build_track_artifacts
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def track_paths(tmp_path, monkeypatch):
+    sample_rate = 22050
+    t = np.arange(sample_rate * 5) / sample_rate
+    paths = {}
+    lookups: list[int] = []
+    for track_id, frequency in [(1, 220), (2, 880)]:
+        path = tmp_path / f"{track_id}.wav"
+        sf.write(path, 0.5 * np.sin(2 * np.pi * frequency * t), sample_rate)
+        paths[track_id] = str(path)
+
+    async def get_track_by_id(track_id, with_payload, **kwargs):
+        lookups.append(track_id)
+        if track_id not in paths:
+            raise DatabaseError(f"Track with id: {track_id} does not exist.")
+        return Record(
+            id=track_id, payload={TrackFields.TRACK_PATH.value: paths[track_id]}
+        )
+
+    monkeypatch.setattr(
+        track_operations.tracks_repository, "get_track_by_id", get_track_by_id
+    )
+    # The paths of the other tests are not cached
+    monkeypatch.setattr(
+        track_operations, "result_cache", create_result_cache(redis_url="")
+    )
+    return paths, lookups
+
+
+@pytest.mark.parametrize("kind", ["preview", "waveform"])
+def test_get_artifact__given_tracks__serves_artifact_of_requested_track(
+    track_paths, kind
+):
+    # given
+    paths, _ = track_paths
+    artifacts = {
+        track_id: build_track_artifacts(path) for track_id, path in paths.items()
+    }
+
+    # when
+    response = client.get(f"/tracks-upload/get_{kind}/2")
+
+    # then
+    assert response.status_code == 200
+    with open(artifacts[2].path(paths[2], kind), "rb") as f:
+        assert (
+            response.content == f.read()
+        ), """The artifact is not the one of the requested track"""
+    assert (
+        artifacts[2].content_hash[:16] in response.headers["ETag"]
+    ), """The ETag is not the one of the requested track"""
+
+
+def test_get_artifact__given_track_without_artifacts__is_not_found(track_paths):
+    # when
+    response = client.get("/tracks-upload/get_preview/1")
+
+    # then
+    assert (
+        response.status_code == 404
+    ), """A track without artifacts was served something"""
+
+
+def test_get_artifact__given_repeated_requests__looks_path_up_once(track_paths):
+    # given
+    paths, lookups = track_paths
+    build_track_artifacts(paths[2])
+
+    # when
+    for kind in ["preview", "preview", "waveform"]:
+        client.get(f"/tracks-upload/get_{kind}/2", headers={"Range": "bytes=0-99"})
+
+    # then
+    assert lookups == [2], """Every request of the track went to Qdrant"""
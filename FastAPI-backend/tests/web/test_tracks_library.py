@@ -9,6 +9,13 @@ from src.repository import tracks_repository
 client = TestClient(app)
 
 
+@pytest.fixture(scope="module", autouse=True)
+def lifespan():
+    # Runs the startup of the app, and serves all the requests on the event loop of its client
+    with client:
+        yield
+
+
 @pytest.fixture
 def track_json_keys():
     return set(Track.__annotations__.keys())
@@ -142,19 +149,66 @@ def test_get_tracks_pagination(
         assert response.status_code == 422, """Validation error not detected"""
 
 
+def test_get_tracks_by_title__given_cursor__returns_next_pages():
+    q_params = {"track_title": "life", "limit": 2}
+    response = client.get(url="/tracks-library/get_tracks/track-title", params=q_params)
+    track_ids = [t["track_id"] for t in response.json()]
+
+    while "X-Next-Cursor" in response.headers:
+        response = client.get(
+            url="/tracks-library/get_tracks/track-title",
+            params={**q_params, "cursor": response.headers["X-Next-Cursor"]},
+        )
+        assert response.status_code == 200, """Response status code should be 200"""
+        track_ids += [t["track_id"] for t in response.json()]
+
+    all_tracks = client.get(
+        url="/tracks-library/get_tracks/track-title", params={"track_title": "life"}
+    ).json()
+
+    assert track_ids == [
+        t["track_id"] for t in all_tracks
+    ], """Pages do not add up to the streamed results"""
+
+
+def test_get_tracks_by_artist__given_ndjson__streams_tracks(track_json_keys):
+    response = client.get(
+        url="/tracks-library/get_tracks/artist-name",
+        params={"artist_name": "AWOL"},
+        headers={"Accept": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200, """Response status code should be 200"""
+    assert response.headers["content-type"].startswith(
+        "application/x-ndjson"
+    ), """Response is not NDJSON"""
+    assert all(
+        key in json.loads(line).keys()
+        for line in response.text.splitlines()
+        for key in track_json_keys
+    ), """Necessary keys not present in the response"""
+
+
+@pytest.fixture
+def number_of_tracks():
+    assert client.portal is not None
+    return client.portal.call(
+        lambda: tracks_repository.get_number_of_datapoints(
+            collection_name="fma-music-data"
+        )
+    )
+
+
 @pytest.mark.parametrize(
-    "limit, next_page_flag",
+    "all_tracks, next_page_flag",
     [
-        (1, True),
-        (
-            tracks_repository.get_number_of_datapoints(
-                collection_name="fma-music-data"
-            ),
-            False,
-        ),  # noqa: E501
+        (False, True),
+        (True, False),
     ],
 )
-def test_get_tracks_next_page(limit, next_page_flag):
+def test_get_tracks_next_page(all_tracks, next_page_flag, number_of_tracks):
+    # The number of tracks is only counted when the test runs, not when it is collected
+    limit = number_of_tracks if all_tracks else 1
     q_params = dict(offset=0, limit=limit)
 
     response = client.get(url="/tracks-library/get_tracks_pagination", params=q_params)
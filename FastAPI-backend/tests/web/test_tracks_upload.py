@@ -4,6 +4,13 @@ from src.main import app
 
 client = TestClient(app)
 
+
+@pytest.fixture(scope="module", autouse=True)
+def lifespan():
+    # Runs the startup of the app, and serves all the requests on the event loop of its client
+    with client:
+        yield
+
 @pytest.fixture
 def track_path():
     return ".\\src\\audio\\Kid Bloom Cowboy Official Visualizer.mp3"
@@ -79,3 +86,35 @@ def test_upload_audio_file_missing_file():
     assert response.status_code == 422, """Processed request without a required filed"""
     assert "file" in response.json()["detail"][0]["loc"]
 
+
+
+def test_upload_audio_files_batch__given_invalid_file__returns_per_file_results(track_path):
+    # given
+    TOP_N_SIMILAR = 10
+    TOP_N_GENRES = 5
+
+    # when
+    with open(track_path, "rb") as audio_file:
+        contents = audio_file.read()
+
+    response = client.post(
+        "/tracks-upload/upload-tracks",
+        files=[
+            ("files", ("first.mp3", contents, "audio/mpeg")),
+            ("files", ("notes.txt", b"not audio", "text/plain")),
+            ("files", ("second.mp3", contents, "audio/mpeg")),
+        ],
+        params={"top_n_genres": TOP_N_GENRES, "top_n_similar": TOP_N_SIMILAR},
+    )
+
+    # then
+    assert response.status_code == 200, """One invalid file failed the whole batch"""
+
+    results = response.json()
+    assert [r["file_name"] for r in results] == ["first.mp3", "notes.txt", "second.mp3"], """Results are not in the order of the files"""
+    assert results[1]["error"] is not None and results[1]["result"] is None, """Invalid file was processed"""
+
+    for r in (results[0], results[2]):
+        assert r["error"] is None, """Valid file was not processed"""
+        assert len(r["result"]["most_similar_tracks"]) == TOP_N_SIMILAR, """Wrong number of similar tracks returned"""
+        assert len(r["result"]["genre_prediction"]) == TOP_N_GENRES, """Wrong number of genre predictions returned"""
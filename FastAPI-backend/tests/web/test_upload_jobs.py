@@ -0,0 +1,137 @@
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.models.models import UploadedTrack
+from src.routers import tracks_upload
+from src.service.audio_decoding import StagedUpload
+from src.service.upload_jobs import UploadJobQueue
+from src.utils import admin_auth
+
+MP3 = ("track.mp3", b"ID3", "audio/mpeg")
+
+
+@pytest.fixture
+def client():
+    # Only the upload routes, without the lifespan of the application and its Qdrant client.
+    # The context keeps a single event loop, the one the workers of the queue run on.
+    app = FastAPI()
+    app.include_router(tracks_upload.tracks_upload_router, prefix="/tracks-upload")
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def staged_paths(tmp_path, monkeypatch):
+    paths: list[str] = []
+
+    async def stage_upload(file):
+        path = str(tmp_path / f"{len(paths)}.mp3")
+        with open(path, "wb") as f:
+            f.write(await file.read())
+        paths.append(path)
+        return StagedUpload(path=path, content_hash="0" * 64, size=3)
+
+    async def analyse(staged, track_name, top_n_genres, top_n_similar):
+        os.remove(staged.path)
+        return UploadedTrack(most_similar_tracks=[], genre_prediction={"Rock": 1.0})
+
+    monkeypatch.setattr(tracks_upload, "stage_upload", stage_upload)
+    monkeypatch.setattr(
+        tracks_upload.track_operations, "clf_and_most_similar_tracks_staged", analyse
+    )
+    return paths
+
+
+@pytest.fixture
+def upload_jobs(client, monkeypatch):
+    queue = UploadJobQueue(workers=1)
+    monkeypatch.setattr(tracks_upload, "upload_jobs", queue)
+    yield queue
+    client.portal.call(queue.stop)
+
+
+def test_submit_upload_job__given_mp3__accepts_it_and_locates_it(
+    client, staged_paths, upload_jobs
+):
+    # when
+    response = client.post("/tracks-upload/upload-track/jobs", files={"file": MP3})
+
+    # then
+    assert response.status_code == 202, """The job was not accepted"""
+    job_id = response.json()["job_id"]
+    assert response.headers["Location"].endswith(
+        f"/tracks-upload/upload-track/jobs/{job_id}"
+    ), """The Location header does not point to the job"""
+
+
+def test_submit_upload_job__given_full_queue__asks_to_retry_later(
+    client, staged_paths, upload_jobs
+):
+    # given
+    upload_jobs.max_queued = 0
+
+    # when
+    response = client.post("/tracks-upload/upload-track/jobs", files={"file": MP3})
+
+    # then
+    assert response.status_code == 503, """A full queue accepted the job"""
+    assert "Retry-After" in response.headers, """No Retry-After header"""
+    assert not os.path.exists(
+        staged_paths[0]
+    ), """The staged upload of a rejected job was kept"""
+
+
+@pytest.mark.parametrize(
+    "headers, status_code",
+    [({}, 403), ({"X-Admin-Token": "wrong"}, 403), ({"X-Admin-Token": "secret"}, 202)],
+)
+def test_submit_upload_job__given_priority__requires_admin_token(
+    client, staged_paths, upload_jobs, monkeypatch, headers, status_code
+):
+    # given
+    monkeypatch.setattr(admin_auth, "ADMIN_TOKEN", "secret")
+
+    # when
+    response = client.post(
+        "/tracks-upload/upload-track/jobs",
+        params={"priority": 9},
+        files={"file": MP3},
+        headers=headers,
+    )
+
+    # then
+    assert (
+        response.status_code == status_code
+    ), """Any client could submit a job ahead of the others"""
+
+
+def test_get_upload_job__given_wait__returns_finished_job_and_counts_it(
+    client, staged_paths, upload_jobs
+):
+    # given
+    submitted = client.post("/tracks-upload/upload-track/jobs", files={"file": MP3})
+
+    # when
+    response = client.get(submitted.headers["Location"], params={"wait": 1})
+    stats = client.get("/tracks-upload/upload-track/jobs-stats")
+
+    # then
+    assert response.status_code == 200
+    assert response.json()["status"] == "succeeded" and response.json()["result"] == {
+        "most_similar_tracks": [],
+        "genre_prediction": {"Rock": 1.0},
+    }, """The wait did not return the finished job and its result"""
+    assert (
+        stats.json()["succeeded"] == 1
+    ), """The finished job was not counted in the stats"""
+
+
+def test_get_upload_job__given_unknown_id__is_not_found(client, upload_jobs):
+    # when
+    response = client.get("/tracks-upload/upload-track/jobs/unknown")
+
+    # then
+    assert response.status_code == 404